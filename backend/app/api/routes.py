@@ -1,12 +1,50 @@
-import re
-from datetime import datetime, timezone
+import asyncio
+import hashlib
+import io
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, Header, HTTPException, Query, Response, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..core.config import settings
 from ..models.schemas import AnalysisResult, PlagiarismMatch
+from ..services import profiling, prometheus
+from ..services.crossref import NOT_FOUND, DoiResolution, get_doi_resolver, normalize_doi, resolve_dois_blocking
+from ..services.doi_registry import get_doi_registry
+from ..services.docx_extract import DOCX_FORMAT, profile_docx
+from ..services.embedding_batcher import MicroBatchEncoder
+from ..services.embedding_cache import CachedEncoder
+from ..services.embeddings import loaded_encoder
+from ..services.executor import AnalysisExecutor, TextRef, get_executor, share
+from ..services.history import list_history
+from ..services.index_segments import Snapshot
+from ..services.ingest import IngestedUpload, ingest_stream, ingest_upload
+from ..services.jobs import enqueue_job, get_job
+from ..services.metrics import get_metrics, summarize
+from ..services.minhash_index import MinHashParams, find_near_duplicates, get_minhash_index
+from ..services.pdf_extract import PDF_FORMAT, count_pages, page_ranges, profile_pages
+from ..services.persistence import get_result_writer
+from ..services.phrase_lexicon import get_phrase_matcher
+from ..services.plagiarism_index import find_similar_sources
+from ..services.profiling import RequestTrace
+from ..services.reports import (
+    clear_pending,
+    get_report_sweeper,
+    publish,
+    render_in_background,
+    report_name,
+    reuse,
+    staging_path,
+)
+from ..services.result_cache import get_result_cache
+from ..services.text_profile import TextProfile, UnreadableDocumentError
+from ..services.timing import StageTimer
 import json
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
@@ -14,34 +52,50 @@ from reportlab.pdfgen import canvas
 router = APIRouter(prefix="/api", tags=["analysis"])
 
 OPTIMAL_AI_THRESHOLD = 0.45
+DETECTOR_MODEL_VERSION = "1.0"
+# Bump when analyzer behaviour changes in ways the detector version does not capture.
+PIPELINE_REVISION = 7
+# Cached results are only reused while the detector, threshold, pipeline and lexicon are unchanged.
+ANALYSIS_VERSION = (
+    f"detector-{DETECTOR_MODEL_VERSION}/threshold-{OPTIMAL_AI_THRESHOLD}/pipeline-{PIPELINE_REVISION}"
+    f"/lexicon-{get_phrase_matcher().digest[:12]}"
+)
 MAX_UPLOAD_BYTES = settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024
+# Binary formats are shipped to the analysis worker as raw bytes and profiled there.
+BINARY_FORMATS = {".pdf": PDF_FORMAT, ".docx": DOCX_FORMAT}
+DOCUMENT_PROFILERS: Dict[str, Callable[[TextRef], TextProfile]] = {
+    PDF_FORMAT: profile_pages,
+    DOCX_FORMAT: profile_docx,
+}
 
 
-def _validate_file(file: UploadFile, payload: bytes) -> None:
-    if not file.filename:
+def _validate_file(file: UploadFile) -> None:
+    _validate_filename(file.filename)
+
+
+def _validate_filename(filename: str) -> None:
+    if not filename:
         raise HTTPException(status_code=400, detail="Missing filename")
 
-    extension = Path(file.filename).suffix.lower()
+    extension = Path(filename).suffix.lower()
     if extension not in settings.ALLOWED_FILE_EXTENSIONS:
         allowed = ", ".join(sorted(settings.ALLOWED_FILE_EXTENSIONS))
         raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {allowed}")
 
-    if len(payload) == 0:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty")
-
-    if len(payload) > MAX_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Max size is {settings.MAX_UPLOAD_SIZE_MB} MB",
-        )
-
 
-def _extract_text(file: UploadFile, payload: bytes) -> str:
-    extension = Path(file.filename).suffix.lower()
-    if extension == ".txt":
-        return payload.decode("utf-8", errors="ignore")
-    # Production baseline fallback: safely decode bytes for non-txt while preserving API behavior.
-    return payload.decode("utf-8", errors="ignore")
+def _extract_text(upload: IngestedUpload) -> TextRef:
+    document_format = BINARY_FORMATS.get(upload.extension)
+    if document_format is not None:
+        if upload.spooled:
+            return TextRef(path=str(upload.path), size=upload.size, format=document_format)
+        return TextRef(data=upload.data, size=upload.size, format=document_format)
+    if upload.spooled:
+        # Large uploads stay on disk; the analysis worker memory-maps and decodes them.
+        return TextRef(path=str(upload.path), size=upload.size)
+    if upload.extension == ".txt":
+        return TextRef(text=upload.data.decode("utf-8", errors="ignore"))
+    # Production baseline fallback: safely decode bytes for other text-like extensions.
+    return TextRef(text=upload.data.decode("utf-8", errors="ignore"))
 
 
 def _safe_ratio(numerator: float, denominator: float) -> float:
@@ -50,27 +104,16 @@ def _safe_ratio(numerator: float, denominator: float) -> float:
     return numerator / denominator
 
 
-def _ai_probability(text: str) -> float:
-    lowered = text.lower()
-    words = re.findall(r"\b[a-zA-Z]{2,}\b", lowered)
-    unique_words = len(set(words))
-    word_count = len(words)
+def _ai_probability(profile: TextProfile) -> float:
+    unique_words = profile.unique_word_count
+    word_count = profile.word_count
 
     repetitive_ratio = 1.0 - _safe_ratio(unique_words, max(word_count, 1))
-    sentence_count = max(1, len(re.findall(r"[.!?]", text)))
+    sentence_count = max(1, profile.sentence_marks)
     avg_sentence_length = _safe_ratio(word_count, sentence_count)
-    bursty_punctuation = len(re.findall(r"[;:,]", text))
-
-    keyword_score = sum(
-        lowered.count(token)
-        for token in [
-            "we propose",
-            "in this paper",
-            "state-of-the-art",
-            "novel framework",
-            "significant improvement",
-        ]
-    )
+    bursty_punctuation = profile.clause_marks
+
+    keyword_score = get_phrase_matcher().score(profile.words)
 
     score = (
         0.12
@@ -82,14 +125,12 @@ def _ai_probability(text: str) -> float:
     return max(0.02, min(0.98, score))
 
 
-def _plagiarism_score(text: str) -> tuple[int, List[PlagiarismMatch]]:
-    paragraphs = [part.strip() for part in re.split(r"\n\s*\n", text) if part.strip()]
-    normalized = [re.sub(r"\s+", " ", p.lower()) for p in paragraphs]
+def _plagiarism_score(profile: TextProfile, query_paragraphs: List[str]) -> tuple[int, List[PlagiarismMatch]]:
+    normalized = profile.normalized_paragraphs
     duplicate_count = len(normalized) - len(set(normalized))
     duplicate_ratio = _safe_ratio(duplicate_count, max(len(normalized), 1))
 
-    quote_blocks = len(re.findall(r'"[^"]{40,}"', text))
-    quote_ratio = min(1.0, _safe_ratio(quote_blocks, 8))
+    quote_ratio = min(1.0, _safe_ratio(profile.quote_blocks, 8))
 
     score = int(min(100, max(0, round((duplicate_ratio * 70 + quote_ratio * 30) * 100))))
 
@@ -102,31 +143,88 @@ def _plagiarism_score(text: str) -> tuple[int, List[PlagiarismMatch]]:
                 source="Internal similarity heuristic",
             )
         )
+
+    near_duplicates = find_near_duplicates(query_paragraphs)
+    if near_duplicates:
+        matches = [
+            PlagiarismMatch(title=hit.title, similarity=round(hit.similarity * 100, 1), source=hit.url or "Reference corpus")
+            for hit in near_duplicates
+        ] + matches
+        score = max(score, int(min(100, round(near_duplicates[0].similarity * 100))))
     return score, matches
 
 
-def _citation_validity(text: str) -> tuple[int, List[str], List[str], List[str]]:
-    dois = re.findall(r"10\.\d{4,9}/[-._;()/:A-Za-z0-9]+", text)
-    unique_dois = sorted(set(doi.rstrip(".,;") for doi in dois))
-    invalid_dois = [doi for doi in unique_dois if len(doi) < 10 or " " in doi]
+def _cited_dois(profile: TextProfile) -> List[str]:
+    """Unique DOIs of the document's reference entries."""
+    return sorted(set(reference.doi for reference in profile.references if reference.doi))
 
-    reference_lines = [line for line in text.splitlines() if "doi" in line.lower() or "http" in line.lower()]
-    missing_dois = [line[:80] for line in reference_lines if "doi" not in line.lower()][:5]
 
-    year_values = [int(year) for year in re.findall(r"\b(19\d{2}|20\d{2})\b", text)]
-    current_year = datetime.now(timezone.utc).year
-    year_mismatches = [str(year) for year in year_values if year > current_year + 1 or year < 1900][:5]
+def _well_formed_dois(profile: TextProfile) -> List[str]:
+    """Unique DOIs that pass the local checks (the ones worth asking CrossRef about)."""
+    return [doi for doi in _cited_dois(profile) if len(doi) >= 10 and " " not in doi]
+
+
+def _citation_percent(valid_count: int, reference_count: int) -> int:
+    return int(min(100, max(0, round(_safe_ratio(valid_count, max(reference_count, 1)) * 100))))
 
-    if not reference_lines:
+
+@dataclass
+class RegistryCheck:
+    """A document's DOIs checked against the offline DOI registry."""
+
+    unregistered: List[str]  # well-formed DOIs the registry does not list
+    year_mismatches: List[str]  # "doi: cited 2019, registered 2016"
+
+
+def _check_doi_registry(profile: TextProfile) -> Optional[RegistryCheck]:
+    registry = get_doi_registry()
+    if registry is None:
+        return None
+    lookups = {doi: registry.lookup(doi) for doi in _well_formed_dois(profile)}
+    year_mismatches = []
+    for reference in profile.references:
+        if not reference.doi or not reference.year:
+            continue
+        registered, year = lookups.get(reference.doi, (False, None))
+        # Online-first and issue dates are often a year apart.
+        if registered and year and abs(reference.year - year) > 1:
+            year_mismatches.append(f"{reference.doi}: cited {reference.year}, registered {year}")
+    return RegistryCheck(
+        unregistered=[doi for doi, (registered, _) in lookups.items() if not registered],
+        year_mismatches=year_mismatches,
+    )
+
+
+def _citation_validity(
+    profile: TextProfile, registry_check: Optional[RegistryCheck] = None
+) -> tuple[int, List[str], List[str], List[str]]:
+    references = profile.references
+    unique_dois = _cited_dois(profile)
+    invalid_dois = [doi for doi in unique_dois if len(doi) < 10 or " " in doi]
+    missing_dois = [reference.raw[:80] for reference in references if not reference.doi][:5]
+
+    current_year = datetime.now(timezone.utc).year
+    year_mismatches = [
+        str(reference.year)
+        for reference in references
+        if reference.year and (reference.year > current_year + 1 or reference.year < 1900)
+    ]
+    if registry_check is not None:
+        year_mismatches += registry_check.year_mismatches
+        if settings.CROSSREF_DISABLE:
+            # Offline, the registry has the last word; otherwise CrossRef decides on the unregistered DOIs.
+            invalid_dois = sorted(set(invalid_dois) | set(registry_check.unregistered))
+    year_mismatches = year_mismatches[:5]
+
+    if not references:
         return 70, invalid_dois, [], year_mismatches
 
     valid_count = max(0, len(unique_dois) - len(invalid_dois))
-    validity = int(min(100, max(0, round(_safe_ratio(valid_count, max(len(reference_lines), 1)) * 100))))
-    return validity, invalid_dois, missing_dois, year_mismatches
+    return _citation_percent(valid_count, len(references)), invalid_dois, missing_dois, year_mismatches
 
 
-def _statistical_risk(text: str) -> int:
-    p_values = [float(val) for val in re.findall(r"p\s*[<=>]\s*(0?\.\d+)", text.lower())]
+def _statistical_risk(profile: TextProfile) -> int:
+    p_values = profile.p_values
     if not p_values:
         return 10
 
@@ -135,12 +233,15 @@ def _statistical_risk(text: str) -> int:
     return risk
 
 
-def _write_pdf_report(filename: str, result: AnalysisResult) -> str:
-    safe_stem = re.sub(r"[^A-Za-z0-9_.-]", "_", Path(filename).stem)[:80] or "paper"
-    output_name = f"{safe_stem}_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.pdf"
-    output_path = settings.REPORTS_DIR / output_name
+def _report_hash(result: AnalysisResult) -> str:
+    """Hash of the result a report shows; identical results share one stored report."""
+    content = result.model_dump_json(exclude={"analyzed_at", "report_path"})
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
 
-    c = canvas.Canvas(str(output_path), pagesize=A4)
+def _write_pdf_report(output_name: str, filename: str, result: AnalysisResult) -> str:
+    staged = staging_path(output_name)
+    c = canvas.Canvas(str(staged), pagesize=A4)
     c.setFont("Helvetica-Bold", 14)
     c.drawString(50, 800, "VeriPaper Analysis Report")
     c.setFont("Helvetica", 11)
@@ -161,10 +262,226 @@ def _write_pdf_report(filename: str, result: AnalysisResult) -> str:
         y -= 22
 
     c.showPage()
-    c.save()
+    try:
+        c.save()
+        publish(output_name, staged)
+    except Exception:
+        staged.unlink(missing_ok=True)
+        raise
     return f"/files/{output_name}"
 
 
+@dataclass
+class DocumentScores:
+    """What the analysis workers compute for a document; small enough to pickle back."""
+
+    ai_probability_raw: float
+    plagiarism_score: int
+    plagiarism_matches: List[PlagiarismMatch]
+    citation_validity: int
+    invalid_dois: List[str]
+    missing_dois: List[str]
+    year_mismatches: List[str]
+    statistical_risk: int
+    suspicious_paragraphs: List[str]
+    query_paragraphs: List[str]  # normalized paragraphs for the semantic plagiarism search
+    dois: List[str] = field(default_factory=list)  # well-formed DOIs for CrossRef (minus those the registry lists)
+    doi_count: int = 0  # unique DOIs cited, well-formed or not
+    reference_count: int = 0
+    text_chars: int = 0  # characters of extracted paragraph text
+    timings: Dict[str, float] = field(default_factory=dict)  # {stage: milliseconds}
+
+
+@dataclass
+class PipelineOutput:
+    result: AnalysisResult
+    timings: Dict[str, float]  # {stage: milliseconds}
+    text_chars: int = 0
+
+
+def _score_document(text_ref: TextRef) -> DocumentScores:
+    """Profile the document and run every analyzer. Executes inside an analysis worker."""
+    timer = StageTimer()
+    profiler = DOCUMENT_PROFILERS.get(text_ref.format)
+    if profiler is not None:
+        with timer.stage(f"extract_{text_ref.format}"):
+            profile = profiler(text_ref)
+    else:
+        with timer.stage("load_text"):
+            text = text_ref.load()
+        with timer.stage("text_profile"):
+            profile = TextProfile.build(text)
+        del text
+    return _score_profile(profile, timer)
+
+
+def _score_parts(parts: List[TextProfile]) -> DocumentScores:
+    """Finish a page-parallel run: combine the slice profiles, then analyze. Executes inside an analysis worker."""
+    timer = StageTimer()
+    with timer.stage("combine_profiles"):
+        profile = TextProfile.combine(parts)
+    del parts
+    return _score_profile(profile, timer)
+
+
+def _query_paragraphs(profile: TextProfile) -> List[str]:
+    paragraphs = dict.fromkeys(
+        paragraph
+        for paragraph in profile.normalized_paragraphs
+        if len(paragraph) >= settings.PLAGIARISM_MIN_PARAGRAPH_CHARS
+    )
+    return list(paragraphs)[: settings.PLAGIARISM_MAX_QUERY_PARAGRAPHS]
+
+
+def _score_profile(profile: TextProfile, timer: StageTimer) -> DocumentScores:
+    if profile.is_empty:
+        raise UnreadableDocumentError("Could not extract readable text from file")
+
+    query_paragraphs = _query_paragraphs(profile)
+    with timer.stage("ai_probability"):
+        ai_probability_raw = _ai_probability(profile)
+    with timer.stage("plagiarism_score"):
+        plagiarism_score, plagiarism_matches = _plagiarism_score(profile, query_paragraphs)
+    with timer.stage("citation_validity"):
+        registry_check = _check_doi_registry(profile)
+        citation_validity, invalid_dois, missing_dois, year_mismatches = _citation_validity(profile, registry_check)
+    with timer.stage("statistical_risk"):
+        statistical_risk = _statistical_risk(profile)
+
+    return DocumentScores(
+        ai_probability_raw=ai_probability_raw,
+        plagiarism_score=plagiarism_score,
+        plagiarism_matches=plagiarism_matches,
+        citation_validity=citation_validity,
+        invalid_dois=invalid_dois,
+        missing_dois=missing_dois,
+        year_mismatches=year_mismatches,
+        statistical_risk=statistical_risk,
+        suspicious_paragraphs=[p[:220] for p in profile.paragraphs if len(p) > 220][:3],
+        query_paragraphs=query_paragraphs,
+        dois=_well_formed_dois(profile) if registry_check is None else registry_check.unregistered,
+        doi_count=len(_cited_dois(profile)),
+        reference_count=len(profile.references),
+        text_chars=sum(map(len, profile.paragraphs)),
+        timings=timer.timings,
+    )
+
+
+def _apply_semantic_matches(scores: DocumentScores) -> None:
+    """Search the plagiarism index for the document's paragraphs and fold the hits into ``scores``. Blocking."""
+    if not scores.query_paragraphs:
+        return
+    timer = StageTimer()
+    with timer.stage("semantic_search"):
+        hits = find_similar_sources(scores.query_paragraphs)
+    scores.timings.update(timer.timings)
+    if not hits:
+        return
+    # A source the near-duplicate screen already reported keeps its (lexical) entry.
+    reported = {(match.title, match.source) for match in scores.plagiarism_matches}
+    scores.plagiarism_matches = [
+        PlagiarismMatch(title=hit.title, similarity=round(hit.similarity * 100, 1), source=hit.url or "Reference corpus")
+        for hit in hits
+        if (hit.title, hit.url or "Reference corpus") not in reported
+    ] + scores.plagiarism_matches
+    scores.plagiarism_score = max(scores.plagiarism_score, int(min(100, round(hits[0].similarity * 100))))
+
+
+def _apply_doi_resolutions(scores: DocumentScores, resolutions: Dict[str, DoiResolution]) -> None:
+    """Count DOIs CrossRef does not know as invalid. Lookups that failed keep the local verdict."""
+    unknown = [doi for doi in scores.dois if getattr(resolutions.get(normalize_doi(doi)), "status", None) == NOT_FOUND]
+    if not unknown:
+        return
+    scores.invalid_dois = sorted(set(scores.invalid_dois) | set(unknown))
+    if scores.reference_count:
+        scores.citation_validity = _citation_percent(scores.doi_count - len(scores.invalid_dois), scores.reference_count)
+
+
+async def _resolve_dois(scores: DocumentScores) -> None:
+    """Verify the document's DOIs with CrossRef from the event loop and fold the outcome into ``scores``."""
+    resolver = get_doi_resolver()
+    if resolver is None or not scores.dois:
+        return
+    timer = StageTimer()
+    with timer.stage("doi_resolution"):
+        resolutions = await resolver.resolve_many(scores.dois)
+    scores.timings.update(timer.timings)
+    _apply_doi_resolutions(scores, resolutions)
+
+
+def _build_result(filename: str, scores: DocumentScores) -> AnalysisResult:
+    ai_probability = int(round(scores.ai_probability_raw * 100))
+    plagiarism_score = scores.plagiarism_score
+    citation_validity = scores.citation_validity
+    statistical_risk = scores.statistical_risk
+    overall_credibility = calculate_credibility_score(
+        scores.ai_probability_raw, plagiarism_score, citation_validity, statistical_risk
+    )
+
+    return AnalysisResult(
+        filename=filename,
+        analyzed_at=datetime.now(timezone.utc).isoformat(),
+        overall_research_credibility=overall_credibility,
+        plagiarism_score=plagiarism_score,
+        plagiarism_summary="Potential overlap detected" if plagiarism_score > 20 else "Low overlap detected",
+        plagiarism_matches=scores.plagiarism_matches,
+        ai_probability=ai_probability,
+        ai_confidence="High" if ai_probability > (OPTIMAL_AI_THRESHOLD * 100 + 15) else "Low",
+        citation_validity_score=citation_validity,
+        citation_summary="Most citations appear well-formed" if citation_validity >= 70 else "Citation quality needs review",
+        citation_invalid_dois=scores.invalid_dois,
+        citation_missing_dois=scores.missing_dois,
+        citation_year_mismatches=scores.year_mismatches,
+        statistical_risk_score=statistical_risk,
+        statistical_summary="Statistical integrity appears sound" if statistical_risk < 30 else "Potential p-value edge-case concentration",
+        suspicious_paragraphs=scores.suspicious_paragraphs,
+        explanations=[
+            f"Plagiarism check: {plagiarism_score}% similarity found",
+            f"AI Detection: {ai_probability}% probability of AI generation",
+            f"Citation Validation: {citation_validity}% of citations are valid",
+            f"Statistical Analysis: {statistical_risk}% statistical risk detected"
+        ],
+        report_path="",
+    )
+
+
+def _render_report(output_name: str, filename: str, result: AnalysisResult) -> Tuple[str, Dict[str, float]]:
+    """Write the PDF report. Executes inside an analysis worker."""
+    timer = StageTimer()
+    try:
+        with timer.stage("write_pdf_report"):
+            report_path = _write_pdf_report(output_name, filename, result)
+    finally:
+        clear_pending(output_name)
+    return report_path, timer.timings
+
+
+def _run_pipeline(filename: str, text_ref: TextRef) -> PipelineOutput:
+    """The whole pipeline in the calling process (job workers and benchmarks)."""
+    scores = _score_document(text_ref)
+    _apply_semantic_matches(scores)
+    if scores.dois:
+        timer = StageTimer()
+        with timer.stage("doi_resolution"):
+            resolutions = resolve_dois_blocking(scores.dois)
+        if resolutions:
+            scores.timings.update(timer.timings)
+        _apply_doi_resolutions(scores, resolutions)
+    result = _build_result(filename, scores)
+    report_timings = _ensure_report(result)
+    return PipelineOutput(result=result, timings={**scores.timings, **report_timings}, text_chars=scores.text_chars)
+
+
+def _ensure_report(result: AnalysisResult) -> Dict[str, float]:
+    """Point ``result`` at its stored report, rendering it here unless it exists or is under way."""
+    name = report_name(result.filename, _report_hash(result))
+    result.report_path = f"/files/{name}"
+    if reuse(name):
+        return {}
+    result.report_path, timings = _render_report(name, result.filename, result)
+    return timings
+
+
 def calculate_credibility_score(ai_prob: float, plagiarism: int, citations: int, stats_risk: int) -> int:
     """Calculate overall research credibility (0-100)"""
     credibility = 100
@@ -176,60 +493,357 @@ def calculate_credibility_score(ai_prob: float, plagiarism: int, citations: int,
 
 
 @router.post("/analyze", response_model=AnalysisResult)
-async def analyze_paper(file: UploadFile = File(...)) -> AnalysisResult:
-    """Analyze a research paper for authenticity with deterministic production-safe heuristics."""
-
+async def analyze_paper(
+    response: Response,
+    file: UploadFile = File(...),
+    x_admin_token: Optional[str] = Header(None),
+    x_profile: Optional[str] = Header(None),
+) -> AnalysisResult:
+    """Analyze a research paper for authenticity with deterministic production-safe heuristics.
+
+    Admins (``X-Admin-Token``) get a ``Server-Timing`` header, and with ``X-Profile`` a saved profile of the request.
+    """
+
+    trace = _admin_trace(x_admin_token, x_profile)
+    if trace is None:
+        return await _analyze_file(file)
+    started = time.perf_counter()
     try:
-        content = await file.read()
-        _validate_file(file, content)
-        text = _extract_text(file, content)
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="Could not extract readable text from file")
-
-        ai_probability_raw = _ai_probability(text)
-        ai_probability = int(round(ai_probability_raw * 100))
-        plagiarism_score, plagiarism_matches = _plagiarism_score(text)
-        citation_validity, invalid_dois, missing_dois, year_mismatches = _citation_validity(text)
-        statistical_risk = _statistical_risk(text)
-
-        overall_credibility = calculate_credibility_score(
-            ai_probability_raw, plagiarism_score, citation_validity, statistical_risk
-        )
+        result = await _analyze_file(file, trace)
+    except HTTPException as e:
+        e.headers = {**(e.headers or {}), **_trace_headers(trace, started)}
+        raise
+    response.headers.update(_trace_headers(trace, started))
+    return result
 
-        result = AnalysisResult(
-            filename=file.filename,
-            analyzed_at=datetime.now(timezone.utc).isoformat(),
-            overall_research_credibility=overall_credibility,
-            plagiarism_score=plagiarism_score,
-            plagiarism_summary="Potential overlap detected" if plagiarism_score > 20 else "Low overlap detected",
-            plagiarism_matches=plagiarism_matches,
-            ai_probability=ai_probability,
-            ai_confidence="High" if ai_probability > (OPTIMAL_AI_THRESHOLD * 100 + 15) else "Low",
-            citation_validity_score=citation_validity,
-            citation_summary="Most citations appear well-formed" if citation_validity >= 70 else "Citation quality needs review",
-            citation_invalid_dois=invalid_dois,
-            citation_missing_dois=missing_dois,
-            citation_year_mismatches=year_mismatches,
-            statistical_risk_score=statistical_risk,
-            statistical_summary="Statistical integrity appears sound" if statistical_risk < 30 else "Potential p-value edge-case concentration",
-            suspicious_paragraphs=[p[:220] for p in text.split("\n\n") if len(p) > 220][:3],
-            explanations=[
-                f"Plagiarism check: {plagiarism_score}% similarity found",
-                f"AI Detection: {ai_probability}% probability of AI generation",
-                f"Citation Validation: {citation_validity}% of citations are valid",
-                f"Statistical Analysis: {statistical_risk}% statistical risk detected"
-            ],
-            report_path="",
-        )
 
-        result.report_path = _write_pdf_report(file.filename, result)
+async def _analyze_file(file: UploadFile, trace: Optional[RequestTrace] = None) -> AnalysisResult:
+    _validate_file(file)
+    timer = StageTimer()
+    try:
+        with timer.stage("upload_read"):
+            upload = await ingest_upload(file, MAX_UPLOAD_BYTES)
+    finally:
+        prometheus.observe_stages(timer.timings)
+        if trace is not None:
+            trace.timer.merge(timer.timings)
+    try:
+        return await _analyze_upload(upload, trace)
+    finally:
+        upload.cleanup()
+
+
+def _admin_trace(token: Optional[str], profiler: Optional[str]) -> Optional[RequestTrace]:
+    """A trace for requests from admins; None (and no further cost) for everyone else or when profiling is off."""
+    if token is None or not profiling.enabled():
+        return None
+    if not profiling.authorized(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if profiler is not None and profiler not in profiling.PROFILERS:
+        allowed = ", ".join(profiling.PROFILERS)
+        raise HTTPException(status_code=400, detail=f"Unknown profiler {profiler!r}. Allowed: {allowed}")
+    return RequestTrace(profiler=profiler)
+
+
+def _trace_headers(trace: RequestTrace, started: float) -> Dict[str, str]:
+    trace.timer.record("total", time.perf_counter() - started)
+    headers = {"Server-Timing": trace.server_timing()}
+    if trace.artifact is not None:
+        headers["X-Profile-Url"] = f"{router.prefix}/profiles/{trace.artifact}"
+    return headers
+
+
+async def _analyze_upload(upload: IngestedUpload, trace: Optional[RequestTrace] = None) -> AnalysisResult:
+    """Analyze an ingested upload, serving repeat uploads from the result cache.
+
+    A ``trace`` collects the stage timings; one that asks for a profile skips the cache.
+    """
+    prometheus.UPLOAD_BYTES.observe(upload.size)
+    profiler = trace.profiler if trace is not None else None
+    timer = StageTimer()
+    try:
+        cache = get_result_cache(ANALYSIS_VERSION)
+        if profiler is None:
+            with timer.stage("cache_lookup"):
+                cached = cache.get(upload.sha256)
+                if cached is None:
+                    cached = await run_in_threadpool(cache.get_persistent, upload.sha256)
+            if cached is not None:
+                # Evicted reports come back under the same name; the scores need not be recomputed.
+                served = cached.model_copy(update={"filename": upload.filename})
+                _schedule_report(get_executor(), served)
+                cache.record_hit(upload.sha256, upload.size, served)
+                if trace is not None:
+                    trace.timer.merge(timer.timings)
+                return served
+
+        executor = get_executor()
+        with prometheus.ANALYSES_IN_PROGRESS.track(source="api"):
+            with timer.stage("extract_text"):
+                text_ref = _extract_text(upload)
+            if profiler is not None:
+                # The whole pipeline in one thread here, where the profiler can see it.
+                output, trace.artifact = await run_in_threadpool(
+                    profiling.run_profiled, profiler, _run_pipeline, upload.filename, text_ref
+                )
+            else:
+                with share(text_ref, use_shared_memory=executor.uses_processes) as text_ref:
+                    output = await _run_analysis(executor, upload.filename, text_ref)
+        timer.merge(output.timings)
+        get_metrics().observe_stages(timer.timings)
+        prometheus.observe_stages(timer.timings)
+        prometheus.TEXT_CHARS.observe(output.text_chars)
+        if trace is not None:
+            trace.timer.merge(timer.timings)
+        result = output.result
+        cache.put(upload.sha256, upload.size, result)  # persisted behind the response
         return result
+    except UnreadableDocumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+async def _run_analysis(executor: AnalysisExecutor, filename: str, text_ref: TextRef) -> PipelineOutput:
+    """Score in the analysis workers, search the plagiarism index and verify DOIs here.
+
+    The PDF report is rendered by a worker after the caller has its result; its path is already in the result.
+    """
+    if text_ref.format == PDF_FORMAT and executor.uses_processes:
+        scores = await _score_pdf(executor, text_ref)
+    else:
+        scores = await executor.run(_score_document, text_ref)
+    await asyncio.gather(run_in_threadpool(_apply_semantic_matches, scores), _resolve_dois(scores))
+    result = _build_result(filename, scores)
+    _schedule_report(executor, result)
+    return PipelineOutput(result=result, timings=scores.timings, text_chars=scores.text_chars)
+
+
+def _schedule_report(executor: AnalysisExecutor, result: AnalysisResult) -> None:
+    """Point ``result`` at its stored report, rendering it in the background unless it exists or is under way."""
+    name = report_name(result.filename, _report_hash(result))
+    result.report_path = f"/files/{name}"
+    if not reuse(name):
+        render_in_background(name, _render_and_record(executor, name, result.model_copy()))
+
+
+async def _render_and_record(executor: AnalysisExecutor, name: str, result: AnalysisResult) -> str:
+    report_path, timings = await executor.run(_render_report, name, result.filename, result)
+    prometheus.observe_stages(timings)
+    return report_path
+
+
+async def _score_pdf(executor: AnalysisExecutor, text_ref: TextRef) -> DocumentScores:
+    """Profile page slices of a long PDF on all workers at once, then analyze the combined profile."""
+    page_count = await executor.run(count_pages, text_ref)
+    ranges = page_ranges(page_count, executor.workers, settings.PDF_PAGES_PER_TASK)
+    if len(ranges) == 1:
+        return await executor.run(_score_document, text_ref)
+
+    timer = StageTimer()
+    with timer.stage("extract_pdf"):
+        parts = await asyncio.gather(*(executor.run(profile_pages, text_ref, start, stop) for start, stop in ranges))
+    scores = await executor.run(_score_parts, list(parts))
+    scores.timings.update(timer.timings)
+    return scores
+
+
+# A batch entry is a display name plus a blocking loader that yields the ingested
+# upload (or raises HTTPException, which is reported inline for that entry).
+BatchEntry = Tuple[str, Callable[[], IngestedUpload]]
+
+
+def _ready(upload: IngestedUpload) -> Callable[[], IngestedUpload]:
+    return lambda: upload
+
+
+def _failed(error: HTTPException) -> Callable[[], IngestedUpload]:
+    def loader() -> IngestedUpload:
+        raise error
+
+    return loader
+
+
+def _zip_member_loader(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Callable[[], IngestedUpload]:
+    def loader() -> IngestedUpload:
+        _validate_filename(info.filename)
+        if info.file_size > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"File too large. Max size is {settings.MAX_UPLOAD_SIZE_MB} MB")
+        try:
+            with archive.open(info) as member:
+                return ingest_stream(member, info.filename, MAX_UPLOAD_BYTES)
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError) as e:
+            raise HTTPException(status_code=400, detail=f"Unreadable archive member: {e}")
+
+    return loader
+
+
+def _open_zip_entries(archive_upload: IngestedUpload) -> Tuple[zipfile.ZipFile, List[BatchEntry]]:
+    source = archive_upload.path if archive_upload.spooled else io.BytesIO(archive_upload.data)
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Uploaded archive is not a valid zip file")
+
+    members = [
+        info
+        for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+    ]
+    if len(members) > settings.BATCH_MAX_FILES:
+        archive.close()
+        raise HTTPException(status_code=400, detail=f"Too many files. Max per batch is {settings.BATCH_MAX_FILES}")
+    return archive, [(info.filename, _zip_member_loader(archive, info)) for info in members]
+
+
+async def _stream_batch(entries: List[BatchEntry], on_close: Callable[[], None]) -> AsyncIterator[str]:
+    concurrency = settings.BATCH_MAX_CONCURRENCY or max(1, settings.ANALYSIS_WORKERS)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, filename: str, loader: Callable[[], IngestedUpload]) -> dict:
+        async with semaphore:
+            upload = None
+            try:
+                upload = await run_in_threadpool(loader)
+                result = await _analyze_upload(upload)
+                return {"index": index, "filename": filename, "status": "ok", "result": result.model_dump(mode="json")}
+            except HTTPException as e:
+                return {"index": index, "filename": filename, "status": "error", "status_code": e.status_code, "detail": e.detail}
+            except Exception as e:
+                return {"index": index, "filename": filename, "status": "error", "status_code": 500, "detail": f"Analysis failed: {e}"}
+            finally:
+                if upload is not None:
+                    upload.cleanup()
+
+    tasks = [asyncio.create_task(run(index, name, loader)) for index, (name, loader) in enumerate(entries)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield json.dumps(await finished) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        on_close()
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile] = File(...)) -> StreamingResponse:
+    """Analyze many papers, or a single .zip of papers, streaming one NDJSON line per paper.
+
+    Lines are emitted in completion order and carry the submission ``index``; a
+    failing paper yields an inline ``"status": "error"`` line instead of failing the batch.
+    """
+    batch_max_bytes = settings.BATCH_MAX_UPLOAD_SIZE_MB * 1024 * 1024
+    uploads: List[IngestedUpload] = []
+    archive = None
+
+    def close() -> None:
+        for upload in uploads:
+            upload.cleanup()
+        if archive is not None:
+            archive.close()
+
+    try:
+        if len(files) == 1 and Path(files[0].filename or "").suffix.lower() == ".zip":
+            archive_upload = await ingest_upload(files[0], batch_max_bytes)
+            uploads.append(archive_upload)
+            archive, entries = await run_in_threadpool(_open_zip_entries, archive_upload)
+        else:
+            if len(files) > settings.BATCH_MAX_FILES:
+                raise HTTPException(status_code=400, detail=f"Too many files. Max per batch is {settings.BATCH_MAX_FILES}")
+            # FastAPI closes form files when the handler returns, so ingest them before streaming.
+            entries = []
+            for file in files:
+                try:
+                    _validate_file(file)
+                    upload = await ingest_upload(file, MAX_UPLOAD_BYTES)
+                except HTTPException as e:
+                    entries.append((file.filename or "", _failed(e)))
+                    continue
+                uploads.append(upload)
+                entries.append((upload.filename, _ready(upload)))
+    except BaseException:
+        close()
+        raise
+
+    return StreamingResponse(_stream_batch(entries, close), media_type="application/x-ndjson")
+
+
+@router.post("/jobs", status_code=202)
+async def create_analysis_job(file: UploadFile = File(...)) -> dict:
+    """Queue a paper for asynchronous analysis and return its job id."""
+    _validate_file(file)
+    upload = await ingest_upload(file, MAX_UPLOAD_BYTES)
+    try:
+        job = await run_in_threadpool(enqueue_job, upload)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not queue analysis: {str(e)}")
+    finally:
+        upload.cleanup()
+    return {"job_id": job.id, "status": job.status, "status_url": f"/api/jobs/{job.id}"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str) -> dict:
+    """Return the status, per-stage timings and (once finished) the result of a job."""
+    job = await run_in_threadpool(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/history")
+async def get_analysis_history(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    filename: Optional[str] = None,
+    band: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    include: List[str] = Query([]),
+):
+    """Stored analyses newest first; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    try:
+        return await run_in_threadpool(
+            list_history,
+            since=since,
+            until=until,
+            filename=filename,
+            band=band,
+            cursor=cursor,
+            limit=limit,
+            include=include,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/metrics/summary")
+async def get_metrics_summary(
+    minutes: float = Query(60, gt=0),
+    until: Optional[datetime] = None,
+    metric_type: Optional[str] = None,
+    name: Optional[str] = None,
+):
+    """Latency percentiles per endpoint and pipeline stage, and error counts, over the last ``minutes`` (to ``until``)"""
+    if until is None:
+        end = datetime.utcnow() + timedelta(seconds=1)
+    else:
+        end = until.astimezone(timezone.utc).replace(tzinfo=None) if until.tzinfo else until
+    start = end - timedelta(minutes=minutes)
+    metrics = await run_in_threadpool(
+        summarize, start, end, metric_type=metric_type, name=name, aggregator=get_metrics()
+    )
+    return {
+        "since": start.replace(tzinfo=timezone.utc).isoformat(),
+        "until": end.replace(tzinfo=timezone.utc).isoformat(),
+        "interval_seconds": settings.METRICS_INTERVAL_SECONDS,
+        "metrics": metrics,
+    }
+
+
 @router.get("/validation/report")
 async def get_validation_report():
     """Get AI detector validation report with 5-step test results"""
@@ -257,7 +871,8 @@ async def get_validation_report():
 async def get_detector_config():
     """Get AI detector configuration and calibration parameters"""
     return {
-        "model_version": "1.0",
+        "model_version": DETECTOR_MODEL_VERSION,
+        "analysis_version": ANALYSIS_VERSION,
         "optimal_threshold": OPTIMAL_AI_THRESHOLD,
         "thresholds": {
             "high_confidence_ai": round(OPTIMAL_AI_THRESHOLD + 0.15, 3),
@@ -272,3 +887,82 @@ async def get_detector_config():
         "roc_auc": 0.88,
         "f1_score": 0.86
     }
+
+
+def _minhash_index_summary(snapshot: Snapshot) -> dict:
+    return {
+        "generation": snapshot.generation,
+        "documents": snapshot.documents,
+        "segments": [
+            {
+                "name": segment.name,
+                "bands": segment.index.params.bands,
+                "rows": segment.index.params.rows,
+                "shingle_words": segment.index.params.shingle_words,
+                "paragraphs": len(segment.index),
+                "documents": segment.index.documents,
+                "tombstoned": len(segment.deleted),
+            }
+            for segment in snapshot.segments
+        ],
+    }
+
+
+@router.get("/plagiarism/config")
+async def get_plagiarism_config():
+    """Near-duplicate (MinHash/LSH) and semantic plagiarism search parameters"""
+    configured = MinHashParams.from_settings()
+    index = await run_in_threadpool(get_minhash_index)
+    return {
+        "near_duplicate": {
+            "bands": configured.bands,
+            "rows": configured.rows,
+            "shingle_words": configured.shingle_words,
+            "candidate_threshold": round(configured.threshold, 3),
+            "min_jaccard": settings.MINHASH_MIN_JACCARD,
+            "index": None if index is None else _minhash_index_summary(index.snapshot()),
+        },
+        "semantic": {
+            "model": settings.SBERT_MODEL,
+            "quantization": settings.SBERT_QUANTIZE,
+            "min_similarity": settings.PLAGIARISM_MIN_SIMILARITY,
+            "top_k": settings.PLAGIARISM_TOP_K,
+        },
+    }
+
+
+@router.get("/reports/storage")
+async def get_report_storage_stats():
+    """Report store disk usage, retention limits and this API process's evictions"""
+    return await run_in_threadpool(get_report_sweeper().stats)
+
+
+@router.get("/profiles/{name}")
+async def get_profile(name: str, x_admin_token: Optional[str] = Header(None)) -> FileResponse:
+    """A profile saved by an admin's ``X-Profile`` request to /api/analyze"""
+    if not profiling.enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.authorized(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    path = profiling.artifact_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if path.suffix == ".folded" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@router.get("/persistence/queue")
+async def get_persistence_queue_stats():
+    """Write-behind result persistence: queue depth, batches flushed and failures in this API process"""
+    return get_result_writer().stats()
+
+
+@router.get("/plagiarism/embedding-cache")
+async def get_embedding_cache_stats():
+    """Paragraph embedding cache hit rates, encoder time saved and micro-batching in this API process"""
+    encoder = loaded_encoder()
+    batcher = getattr(encoder, "encoder", encoder)
+    batching = batcher.stats() if isinstance(batcher, MicroBatchEncoder) else None
+    if not isinstance(encoder, CachedEncoder):
+        return {"enabled": settings.EMBEDDING_CACHE_ENABLED, "loaded": False, "batching": batching}
+    return {"enabled": True, "loaded": True, **encoder.stats(), "batching": batching}
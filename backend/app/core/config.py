@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from typing import List
 
@@ -15,10 +16,135 @@ class Settings:
 
     ROOT_DIR = Path(__file__).resolve().parents[3]
     REPORTS_DIR = Path(os.getenv("REPORTS_DIR", str(ROOT_DIR / "reports"))).resolve()
+    # PDF reports are rendered after /api/analyze answers; GET /files/... answers 202 until they exist
+    REPORT_RETRY_AFTER_SECONDS = int(os.getenv("REPORT_RETRY_AFTER_SECONDS", "1"))
+    # A report still pending after this long was lost (worker crash, restart) and is treated as missing
+    REPORT_RENDER_TIMEOUT_SECONDS = float(os.getenv("REPORT_RENDER_TIMEOUT_SECONDS", "120"))
+    # Report store retention: reports unused (not handed out or downloaded) this long are deleted, then the
+    # least recently used ones until the store fits REPORTS_MAX_MB. 0 disables a limit / the sweeper.
+    REPORTS_MAX_MB = int(os.getenv("REPORTS_MAX_MB", "1024"))
+    REPORTS_MAX_AGE_SECONDS = float(os.getenv("REPORTS_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+    REPORTS_SWEEP_INTERVAL_SECONDS = float(os.getenv("REPORTS_SWEEP_INTERVAL_SECONDS", "300"))
     MODEL_PATH = Path(os.getenv("AI_MODEL_PATH", str(ROOT_DIR / "models" / "ai_detector.joblib"))).resolve()
+    # Weighted AI-style phrases (phrase<TAB>weight per line)
+    AI_LEXICON_PATH = Path(
+        os.getenv("AI_LEXICON_PATH", str(ROOT_DIR / "backend" / "data" / "ai_phrase_lexicon.tsv"))
+    ).resolve()
 
     MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "15"))
     ALLOWED_FILE_EXTENSIONS = {".txt", ".pdf", ".docx"}
+    # Uploads at or above this size are spooled to UPLOAD_SPOOL_DIR instead of held in memory
+    UPLOAD_SPOOL_MIN_BYTES = int(os.getenv("UPLOAD_SPOOL_MIN_BYTES", str(256 * 1024)))
+    UPLOAD_SPOOL_DIR = Path(
+        os.getenv("UPLOAD_SPOOL_DIR", str(Path(tempfile.gettempdir()) / "veripaper-uploads"))
+    ).resolve()
+
+    # Batch analysis (/api/analyze/batch)
+    BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+    BATCH_MAX_UPLOAD_SIZE_MB = int(os.getenv("BATCH_MAX_UPLOAD_SIZE_MB", "500"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "0"))  # 0 = ANALYSIS_WORKERS
+
+    # Asynchronous analysis jobs (/api/jobs)
+    JOBS_DIR = Path(os.getenv("JOBS_DIR", str(ROOT_DIR / "jobs"))).resolve()
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1.0"))
+
+    # Analysis result cache (in-process LRU in front of the analysis_results table)
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+    RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    RESULT_CACHE_PERSISTENT = os.getenv("RESULT_CACHE_PERSISTENT", "true").lower() == "true"
+    # Write-behind persistence of results: flushed in batches of PERSIST_BATCH_SIZE or after PERSIST_FLUSH_INTERVAL_MS
+    PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "64"))
+    PERSIST_FLUSH_INTERVAL_MS = float(os.getenv("PERSIST_FLUSH_INTERVAL_MS", "200"))
+    PERSIST_MAX_PENDING = int(os.getenv("PERSIST_MAX_PENDING", "10000"))
+    PERSIST_JOURNAL_DIR = os.getenv("PERSIST_JOURNAL_DIR", "")  # empty: no journal
+    # Failed batches are retried; after PERSIST_MAX_ATTEMPTS, rows that still fail go to the dead-letter file
+    PERSIST_MAX_ATTEMPTS = int(os.getenv("PERSIST_MAX_ATTEMPTS", "3"))
+    PERSIST_DEAD_LETTER_PATH = os.getenv(
+        "PERSIST_DEAD_LETTER_PATH", str(ROOT_DIR / "cache" / "persist-dead-letter.jsonl")
+    )
+    # Request and pipeline-stage latencies, aggregated in memory and written to system_metrics once per interval
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_INTERVAL_SECONDS = float(os.getenv("METRICS_INTERVAL_SECONDS", "60"))
+    # Per-process files behind GET /metrics (Prometheus); shared by every worker, cleared on deploy
+    METRICS_MULTIPROC_DIR = Path(os.getenv("METRICS_MULTIPROC_DIR", str(ROOT_DIR / "cache" / "metrics"))).resolve()
+    # Admin-only Server-Timing and per-request profiles of /api/analyze (X-Admin-Token); empty disables both
+    PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+    PROFILES_DIR = Path(os.getenv("PROFILES_DIR", str(ROOT_DIR / "cache" / "profiles"))).resolve()
+    PROFILES_MAX_FILES = int(os.getenv("PROFILES_MAX_FILES", "50"))
+    PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "1"))
+    # GET /api/history page sizes
+    HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+    HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "500"))
+
+    # Analysis execution engine: "process" (default), "thread" or "inline"
+    ANALYSIS_EXECUTOR = os.getenv("ANALYSIS_EXECUTOR", "process").lower()
+    ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", str(min(4, os.cpu_count() or 1))))
+    ANALYSIS_SHARED_MEMORY_MIN_BYTES = int(os.getenv("ANALYSIS_SHARED_MEMORY_MIN_BYTES", str(256 * 1024)))
+    # PDFs are split across analysis workers in slices of at least this many pages
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "50"))
+
+    # Semantic plagiarism search: SBERT paragraph embeddings against an index of corpus
+    # abstracts built offline by backend/scripts/build_plagiarism_index.py
+    SBERT_MODEL = os.getenv("SBERT_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    # API-side query encoding only: "int8" dynamically quantizes the model's linear layers
+    # (index builds stay full precision); measure with backend/scripts/bench_sentence_encoder.py
+    SBERT_QUANTIZE = os.getenv("SBERT_QUANTIZE", "none").lower()
+    ARXIV_DATASET_PATH = Path(
+        os.getenv("ARXIV_DATASET_PATH", str(ROOT_DIR / "backend" / "data" / "arxiv_abstracts.jsonl"))
+    ).resolve()
+    PLAGIARISM_INDEX_DIR = Path(os.getenv("PLAGIARISM_INDEX_DIR", str(ROOT_DIR / "indexes" / "plagiarism"))).resolve()
+    PLAGIARISM_TOP_K = int(os.getenv("PLAGIARISM_TOP_K", "5"))
+    PLAGIARISM_MIN_SIMILARITY = float(os.getenv("PLAGIARISM_MIN_SIMILARITY", "0.75"))
+    PLAGIARISM_MIN_PARAGRAPH_CHARS = int(os.getenv("PLAGIARISM_MIN_PARAGRAPH_CHARS", "40"))
+    PLAGIARISM_MAX_QUERY_PARAGRAPHS = int(os.getenv("PLAGIARISM_MAX_QUERY_PARAGRAPHS", "256"))
+    # Corpora at least this large get a FAISS IVF index instead of exact search
+    PLAGIARISM_IVF_MIN_VECTORS = int(os.getenv("PLAGIARISM_IVF_MIN_VECTORS", "50000"))
+    PLAGIARISM_IVF_NPROBE = int(os.getenv("PLAGIARISM_IVF_NPROBE", "16"))
+    # Paragraph embeddings are cached by normalized-paragraph hash: an in-process LRU
+    # in front of a float16 SQLite file shared by the API processes (empty path: memory only)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "50000"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(ROOT_DIR / "cache" / "embeddings.sqlite3"))
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_ENTRIES", "2000000"))
+    # Concurrent analyses share encoder forward passes: requests are collected for up to
+    # EMBEDDING_BATCH_MAX_WAIT_MS or EMBEDDING_BATCH_MAX_ITEMS paragraphs (a wait of 0 disables batching)
+    EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv("EMBEDDING_BATCH_MAX_ITEMS", "128"))
+    EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+    # Near-duplicate screen: MinHash/LSH over word-shingled corpus paragraphs, built offline
+    # by backend/scripts/build_minhash_index.py. Pairs above about (1/bands)**(1/rows)
+    # Jaccard similarity become candidates; MINHASH_MIN_JACCARD decides what is reported.
+    MINHASH_INDEX_DIR = Path(os.getenv("MINHASH_INDEX_DIR", str(ROOT_DIR / "indexes" / "minhash"))).resolve()
+    MINHASH_BANDS = int(os.getenv("MINHASH_BANDS", "32"))
+    MINHASH_ROWS = int(os.getenv("MINHASH_ROWS", "4"))
+    MINHASH_SHINGLE_WORDS = int(os.getenv("MINHASH_SHINGLE_WORDS", "3"))
+    MINHASH_MIN_JACCARD = float(os.getenv("MINHASH_MIN_JACCARD", "0.5"))
+    # Both corpus indexes grow by delta segments (backend/scripts/update_plagiarism_index.py).
+    # Readers re-check for new segments this often; a background thread in each API
+    # process compacts a root once it has this many segments or tombstoned documents.
+    INDEX_REFRESH_SECONDS = float(os.getenv("INDEX_REFRESH_SECONDS", "5"))
+    INDEX_COMPACTION_INTERVAL_SECONDS = float(os.getenv("INDEX_COMPACTION_INTERVAL_SECONDS", "300"))
+    INDEX_COMPACT_MIN_SEGMENTS = int(os.getenv("INDEX_COMPACT_MIN_SEGMENTS", "4"))
+    INDEX_COMPACT_TOMBSTONE_RATIO = float(os.getenv("INDEX_COMPACT_TOMBSTONE_RATIO", "0.1"))
+    INDEX_SEGMENT_RETENTION_SECONDS = float(os.getenv("INDEX_SEGMENT_RETENTION_SECONDS", "600"))
+
+    # Citation DOIs are verified against CrossRef from the event loop (CROSSREF_DISABLE=1 keeps
+    # the checks local). Outcomes are cached in SQLite; unknown DOIs for the shorter negative TTL.
+    CROSSREF_DISABLE = os.getenv("CROSSREF_DISABLE", "0") == "1"
+    CROSSREF_API_URL = os.getenv("CROSSREF_API_URL", "https://api.crossref.org/works/")
+    CROSSREF_MAILTO = os.getenv("CROSSREF_MAILTO", "")  # contact address for CrossRef's polite pool
+    CROSSREF_MAX_CONCURRENCY = int(os.getenv("CROSSREF_MAX_CONCURRENCY", "8"))
+    CROSSREF_TIMEOUT_SECONDS = float(os.getenv("CROSSREF_TIMEOUT_SECONDS", "10"))
+    CROSSREF_DEADLINE_SECONDS = float(os.getenv("CROSSREF_DEADLINE_SECONDS", "15"))  # per analysis; 0 waits
+    CROSSREF_CACHE_PATH = os.getenv("CROSSREF_CACHE_PATH", str(ROOT_DIR / "cache" / "crossref.sqlite3"))
+    CROSSREF_CACHE_TTL_SECONDS = float(os.getenv("CROSSREF_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+    CROSSREF_NEGATIVE_TTL_SECONDS = float(os.getenv("CROSSREF_NEGATIVE_TTL_SECONDS", str(24 * 3600)))
+    # Offline DOI registry built by backend/scripts/build_doi_registry.py from a DOI dump.
+    # Registered DOIs skip CrossRef; with CROSSREF_DISABLE=1, unregistered ones count as invalid.
+    DOI_REGISTRY_DIR = Path(os.getenv("DOI_REGISTRY_DIR", str(ROOT_DIR / "indexes" / "doi-registry"))).resolve()
+    DOI_REGISTRY_FALSE_POSITIVE_RATE = float(os.getenv("DOI_REGISTRY_FALSE_POSITIVE_RATE", "0.01"))  # Bloom filter, build time
 
     _default_cors = "http://localhost:5173,http://127.0.0.1:5173"
     CORS_ORIGINS = _parse_csv(os.getenv("CORS_ORIGINS", _default_cors))
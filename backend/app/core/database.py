@@ -3,13 +3,13 @@ Database connection management and initialization.
 Handles SQLAlchemy engine, sessions, and migrations.
 """
 from typing import Generator
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import QueuePool, StaticPool
 import logging
 
 from .config import settings
-from ..models.database import Base
+from ..models.database import CREDIBILITY_BANDS, AnalysisHistory, AnalysisResult, Base, SystemMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +51,9 @@ def init_db():
     }
     if db_url.startswith("sqlite"):
         engine_kwargs["connect_args"] = {"check_same_thread": False}
+        if db_url == "sqlite:///:memory:":
+            # Every pooled connection would otherwise get its own empty database.
+            engine_kwargs["poolclass"] = StaticPool
     else:
         engine_kwargs.update(
             {
@@ -65,6 +68,7 @@ def init_db():
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     
     # Verify connection
     try:
@@ -78,6 +82,44 @@ def init_db():
     return engine
 
 
+# Nullable columns added since the first release, with no backfill (rows predating them read as NULL).
+ADDED_COLUMNS = (
+    AnalysisResult.__table__.c.analysis_version,  # NULL never matches ANALYSIS_VERSION: old rows are cache misses
+    AnalysisResult.__table__.c.suspicious_paragraphs,
+    SystemMetrics.__table__.c.name,
+)
+
+
+def upgrade_schema(engine) -> None:
+    """Bring tables created by older releases up to date; create_all only creates missing tables."""
+    inspector = inspect(engine)
+    tables = [
+        table
+        for table in (AnalysisResult.__table__, AnalysisHistory.__table__, SystemMetrics.__table__)
+        if inspector.has_table(table.name)
+    ]
+    columns = {table.name: {column["name"] for column in inspector.get_columns(table.name)} for table in tables}
+    indexes = {table.name: {index["name"] for index in inspector.get_indexes(table.name)} for table in tables}
+    with engine.begin() as conn:
+        if "credibility_band" not in columns.get("analysis_history", {"credibility_band"}):
+            logger.info("Adding analysis_history.credibility_band")
+            conn.execute(text("ALTER TABLE analysis_history ADD COLUMN credibility_band VARCHAR(16)"))
+            cases = " ".join(f"WHEN credibility_score >= {floor} THEN '{name}'" for name, floor in CREDIBILITY_BANDS)
+            conn.execute(text(f"UPDATE analysis_history SET credibility_band = CASE {cases} END"))
+        if "ix_analysis_history_analyzed_at" in indexes.get("analysis_history", ()):
+            # Superseded by ix_analysis_history_recent (analyzed_at, id).
+            conn.execute(text("DROP INDEX ix_analysis_history_analyzed_at"))
+        for column in ADDED_COLUMNS:
+            table = column.table.name
+            if column.name not in columns.get(table, {column.name}):
+                logger.info(f"Adding {table}.{column.name}")
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}"))
+    for table in tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
 # Global engine instance (initialized once)
 engine = None
 SessionLocal = None
@@ -0,0 +1,85 @@
+"""
+ASGI middleware shared by the API.
+"""
+from typing import Mapping
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _too_large_detail(limit: int) -> str:
+    return f"Request body too large. Max size is {limit // (1024 * 1024)} MB"
+
+
+class _BodyTooLarge(HTTPException):
+    # An HTTPException so FastAPI's body parsing re-raises it instead of turning it into a 400.
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=_too_large_detail(limit), headers={"Connection": "close"})
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies that exceed a per-path byte limit while they stream in.
+
+    ``limits`` maps a path prefix to its maximum body size; the longest matching
+    prefix wins. A declared ``Content-Length`` above the limit is refused before
+    any body is read, and chunked bodies are cut off at the first chunk past it.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Mapping[str, int]):
+        self.app = app
+        self.limits = sorted(limits.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def _limit_for(self, path: str):
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self._limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                await self._reject(scope, receive, send, limit)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge(limit)
+            return message
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, limit)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, limit: int) -> None:
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": _too_large_detail(limit)},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
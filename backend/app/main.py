@@ -3,13 +3,18 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
+from starlette.concurrency import run_in_threadpool
 
 from .api.routes import router as api_router
 from .core.config import settings
 from .core.logging_config import configure_logging
+from .core.middleware import BodySizeLimitMiddleware
+from .services import prometheus
+from .services.metrics import MetricsMiddleware
+from .services.reports import ReportFiles
 
 configure_logging(settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
@@ -26,8 +31,97 @@ async def lifespan(_: FastAPI):
         logger.error(f"❌ Database initialization failed: {e}")
         # Don't crash the app - allow degraded mode
 
+    from .services.metrics import get_metrics
+
+    metrics = get_metrics()
+    metrics.start()
+
+    from .services.persistence import close_result_writer, get_result_writer
+
+    # Started before anything can submit, so journaled writes from a crashed run are replayed first.
+    result_writer = get_result_writer()
+    try:
+        result_writer.start()
+    except Exception as e:
+        logger.error(f"❌ Result writer failed to start: {e}")
+
+    from .services.executor import get_executor, shutdown_executor
+
+    executor = get_executor()
+    try:
+        await run_in_threadpool(executor.start)
+        logger.info(f"✅ Analysis executor started ({executor.mode})")
+    except Exception as e:
+        logger.error(f"❌ Analysis executor warm-up failed: {e}")
+
+    from .services.embeddings import get_encoder
+    from .services.plagiarism_index import load_plagiarism_index
+
+    try:
+        # Memory-mapped: every API worker on the host shares the index pages.
+        if await run_in_threadpool(load_plagiarism_index) is None:
+            logger.warning(f"⚠️ No plagiarism index at {settings.PLAGIARISM_INDEX_DIR}; semantic search disabled")
+        else:
+            await run_in_threadpool(get_encoder)
+            logger.info("✅ Plagiarism index and sentence encoder loaded")
+    except Exception as e:
+        logger.error(f"❌ Plagiarism index failed to load: {e}")
+
+    from .services.doi_registry import load_doi_registry
+
+    if await run_in_threadpool(load_doi_registry) is None:
+        logger.info(f"ℹ️ No DOI registry at {settings.DOI_REGISTRY_DIR}; DOIs are verified with CrossRef only")
+    else:
+        logger.info("✅ Offline DOI registry mapped")
+
+    from .services import minhash_index, plagiarism_index
+    from .services.index_segments import IndexCompactor
+
+    # Delta segments appended by update_plagiarism_index.py are merged back in the background.
+    compactor = IndexCompactor(
+        [
+            (settings.PLAGIARISM_INDEX_DIR, plagiarism_index.merge_segments),
+            (settings.MINHASH_INDEX_DIR, minhash_index.merge_segments),
+        ],
+        settings.INDEX_COMPACTION_INTERVAL_SECONDS,
+    )
+    compactor.start()
+
+    from .services.reports import get_report_sweeper
+
+    report_sweeper = get_report_sweeper()
+    report_sweeper.start()
+
+    from .services.jobs import JobWorkerPool
+
+    job_workers = JobWorkerPool(settings.JOB_WORKERS)
+    try:
+        job_workers.start()
+        logger.info(f"✅ Started {settings.JOB_WORKERS} job worker(s)")
+    except Exception as e:
+        logger.error(f"❌ Job workers failed to start: {e}")
+
     yield
 
+    job_workers.stop()
+    compactor.stop()
+    report_sweeper.stop()
+
+    from .services.reports import wait_for_renders
+
+    await wait_for_renders(settings.REPORT_RENDER_TIMEOUT_SECONDS)
+    shutdown_executor()
+
+    from .services.crossref import close_doi_resolver
+
+    await close_doi_resolver()
+
+    # Last producer (job workers, the executor) is gone; flush what is buffered before the engine goes.
+    await run_in_threadpool(close_result_writer)
+    await run_in_threadpool(metrics.stop)
+    prometheus.mark_process_dead()
+    logger.info(f"✅ Result writer flushed ({result_writer.stats()['flushed']} writes this run)")
+
     try:
         from .core.database import close_db
 
@@ -48,10 +142,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files for PDF reports
+# Reject oversized uploads while they stream in, before multipart parsing buffers them.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/jobs": settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES,
+        "/api/analyze": settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES,
+        "/api/analyze/batch": settings.BATCH_MAX_UPLOAD_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES,
+    },
+)
+
+# Outermost, so rejected uploads and CORS preflights are counted too.
+app.add_middleware(MetricsMiddleware)
+
+# Mount static files for PDF reports (202 + Retry-After while a report is still being rendered)
 reports_dir = settings.REPORTS_DIR
 reports_dir.mkdir(exist_ok=True)
-app.mount("/files", StaticFiles(directory=str(reports_dir)), name="static")
+app.mount("/files", ReportFiles(directory=str(reports_dir)), name="static")
 
 # Mount frontend static files under /static to avoid shadowing API routes
 frontend_dir = settings.ROOT_DIR / "frontend" / "dist"
@@ -73,6 +181,7 @@ def root():
         "message": "VeriPaper AI Research Authenticity Platform API",
         "docs": "/docs",
         "health": "/health",
+        "metrics": "/metrics",
     }
 
 
@@ -91,6 +200,12 @@ def readiness_check() -> dict:
     return {"status": "ready" if ready else "degraded", "checks": checks}
 
 
+@app.get("/metrics")
+def prometheus_metrics() -> Response:
+    """Prometheus text exposition, summed over every API and job worker process."""
+    return Response(prometheus.render(), media_type=prometheus.CONTENT_TYPE)
+
+
 @app.get("/api/test")
 def test_endpoint() -> dict:
     return {"message": "Backend is working!"}
@@ -4,7 +4,7 @@ Uses SQLAlchemy ORM for PostgreSQL persistence.
 """
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
@@ -22,6 +22,7 @@ class AnalysisResult(Base):
     filename = Column(String(255), nullable=False, index=True)
     file_size = Column(Integer, nullable=False)  # bytes
     file_hash = Column(String(64), unique=True, index=True)  # SHA256
+    analysis_version = Column(String(128), nullable=True)  # ANALYSIS_VERSION that produced the row
     
     # Analysis scores
     plagiarism_score = Column(Integer, nullable=False)  # 0-100
@@ -43,6 +44,7 @@ class AnalysisResult(Base):
     
     # Explanations for each analysis
     explanations = Column(JSON, nullable=False)  # Array of 4 strings
+    suspicious_paragraphs = Column(JSON, nullable=True)  # Array of paragraph excerpts
     
     # Report generation
     report_path = Column(String(255), nullable=True)  # Path to PDF report
@@ -75,6 +77,14 @@ class AnalysisResult(Base):
         }
 
 
+# Lowest credibility score of each band, as the frontend's verdicts draw them.
+CREDIBILITY_BANDS = (("high", 80), ("moderate", 60), ("low", 0))
+
+
+def credibility_band(score: float) -> str:
+    return next((name for name, floor in CREDIBILITY_BANDS if score >= floor), CREDIBILITY_BANDS[-1][0])
+
+
 class AnalysisHistory(Base):
     """Track analysis trends and user behavior."""
     __tablename__ = "analysis_history"
@@ -83,7 +93,34 @@ class AnalysisHistory(Base):
     result_id = Column(Integer, nullable=False, index=True)  # FK to AnalysisResult
     filename = Column(String(255), nullable=False)
     credibility_score = Column(Integer, nullable=False)
-    analyzed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    credibility_band = Column(String(16), nullable=True)  # credibility_band(credibility_score)
+    analyzed_at = Column(DateTime, default=datetime.utcnow)
+
+    # /api/history pages newest first by (analyzed_at, id); each filter gets an index that seeks straight to
+    # the page and returns rows in that order. On PostgreSQL the listed columns are carried in the index
+    # so pages are answered by index-only scans.
+    __table_args__ = (
+        Index(
+            "ix_analysis_history_recent",
+            "analyzed_at",
+            "id",
+            postgresql_include=["result_id", "filename", "credibility_score", "credibility_band"],
+        ),
+        Index(
+            "ix_analysis_history_filename_recent",
+            "filename",
+            "analyzed_at",
+            "id",
+            postgresql_include=["result_id", "credibility_score", "credibility_band"],
+        ),
+        Index(
+            "ix_analysis_history_band_recent",
+            "credibility_band",
+            "analyzed_at",
+            "id",
+            postgresql_include=["result_id", "filename", "credibility_score"],
+        ),
+    )
 
 
 class SystemMetrics(Base):
@@ -92,6 +129,63 @@ class SystemMetrics(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     metric_type = Column(String(50), nullable=False)  # "api_call", "error", "performance"
-    value = Column(Float, nullable=False)
-    details = Column(JSON, nullable=True)
-    recorded_at = Column(DateTime, default=datetime.utcnow, index=True)
+    name = Column(String(128), nullable=True)  # endpoint or pipeline stage
+    value = Column(Float, nullable=False)  # events in the interval
+    details = Column(JSON, nullable=True)  # latency histogram, see services.metrics
+    recorded_at = Column(DateTime, default=datetime.utcnow, index=True)  # interval start
+
+    __table_args__ = (
+        Index("ix_system_metrics_type_name_recorded", "metric_type", "name", "recorded_at"),
+    )
+
+
+class AnalysisJob(Base):
+    """Queued asynchronous analysis, claimed by job workers under a lease."""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    status = Column(String(20), nullable=False, default="queued")  # "queued"/"running"/"succeeded"/"failed"
+
+    # Upload metadata; the payload itself lives in JOBS_DIR until the job finishes
+    filename = Column(String(255), nullable=False)
+    file_size = Column(Integer, nullable=False)  # bytes
+    file_hash = Column(String(64), nullable=False, index=True)  # SHA256
+    payload_path = Column(String(512), nullable=False)
+
+    # Claiming and retries
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    worker_id = Column(String(64), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    # Outcome
+    result = Column(JSON, nullable=True)  # AnalysisResult payload
+    error = Column(Text, nullable=True)
+    stage_timings = Column(JSON, nullable=True)  # {stage: milliseconds}
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_created", "status", "created_at"),
+    )
+
+    def to_dict(self):
+        """Convert model to dictionary for API responses."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "filename": self.filename,
+            "file_size": self.file_size,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "stage_timings": self.stage_timings or {},
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,140 @@
+"""
+On-disk artifacts built offline (plagiarism and MinHash indexes, the DOI
+registry) and the process-wide handles that serve them.
+
+``publish_directory`` assembles an artifact in a new versioned directory next
+to its destination (``<name>.v<ns>-<pid>``), flushes it to disk, then points
+the destination, a symlink, at it with one ``os.replace``. Whenever a reader
+resolves the destination it finds a whole artifact, old or new, and a crash at
+any point leaves the previous one published. The replaced version is deleted
+right after the swap; processes that already opened it keep their memory maps.
+A build killed outright leaves its version directory behind, unreferenced.
+A destination published before versioning (a plain directory) is moved aside
+on its first republish, the one moment it is briefly missing. Index segments,
+which are written once under a fresh name and never replaced, skip the
+versioning (``versioned=False``) and are renamed into place.
+
+``ProcessWide`` holds the opened artifact of one process: loaded on first use
+(job and analysis workers skip the API lifespan), replaced by tests and
+benchmarks with ``configure``.
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Generic, Iterator, Optional, TypeVar, Union
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _fsync(path: Path) -> None:
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def _fsync_tree(directory: Path) -> None:
+    for parent, _, files in os.walk(directory, topdown=False):
+        for name in files:
+            _fsync(Path(parent) / name)
+        _fsync(Path(parent))
+
+
+@contextmanager
+def publish_directory(directory: Union[str, Path], versioned: bool = True) -> Iterator[Path]:
+    """Yield a new version directory that ``directory`` points at once the block completes.
+
+    If the block raises, the version is removed and ``directory`` is left
+    untouched. With ``versioned=False``, ``directory`` must not exist yet and
+    the finished directory is renamed to it.
+    """
+    directory = Path(directory)
+    suffix = f"v{time.time_ns()}" if versioned else "building"
+    version = directory.with_name(f"{directory.name}.{suffix}-{os.getpid()}")
+    shutil.rmtree(version, ignore_errors=True)
+    version.mkdir(parents=True)
+    try:
+        yield version
+        _fsync_tree(version)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+
+    if not versioned:
+        os.rename(version, directory)  # fails rather than replace a published directory
+        _fsync(directory.parent)
+        return
+    previous = _published_version(directory)
+    link = directory.with_name(f"{directory.name}.link-{os.getpid()}")
+    link.unlink(missing_ok=True)
+    link.symlink_to(version.name)
+    if previous is None and directory.is_dir():
+        previous = directory.with_name(f"{directory.name}.v0-{os.getpid()}")
+        directory.rename(previous)
+    os.replace(link, directory)
+    _fsync(directory.parent)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def _published_version(directory: Path) -> Optional[Path]:
+    if not directory.is_symlink():
+        return None
+    return directory.parent / os.readlink(directory)
+
+
+def remove_published(directory: Union[str, Path]) -> None:
+    """Delete ``directory`` and the version it points at (benchmarks and tests clean up with this)."""
+    directory = Path(directory)
+    version = _published_version(directory)
+    if version is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    directory.unlink(missing_ok=True)
+    shutil.rmtree(version, ignore_errors=True)
+
+
+class ProcessWide(Generic[T]):
+    """One process's handle on an artifact, opened by ``load`` on first use.
+
+    ``load`` takes a directory (None for the configured one) and returns the
+    opened artifact, or None if there is none.
+    """
+
+    def __init__(self, load: Callable[[Optional[Union[str, Path]]], Optional[T]], description: str):
+        self._load = load
+        self._description = description
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self, directory: Optional[Union[str, Path]] = None) -> Optional[T]:
+        """Open the artifact at ``directory`` and make it the process-wide one."""
+        value = self._load(directory)
+        self.configure(value)
+        return value
+
+    def get(self) -> Optional[T]:
+        """The process-wide artifact; the first call loads it, once, however many threads ask."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        self._value = self._load(None)
+                    except Exception as e:
+                        logger.error(f"Could not load {self._description}: {e}")
+                        self._value = None
+                    self._loaded = True
+        return self._value
+
+    def configure(self, value: Optional[T]) -> None:
+        """Replace the process-wide artifact (used by tests and benchmarks)."""
+        with self._lock:
+            self._value, self._loaded = value, True
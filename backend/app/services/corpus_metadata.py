@@ -0,0 +1,66 @@
+"""
+Title/URL sidecar shared by the on-disk corpus indexes.
+
+Records are JSON lines in ``metadata.jsonl``; ``metadata.offsets.npy`` holds
+the byte offset of every line (plus the end offset), so a reader can fetch
+record ``i`` from a memory map without parsing or holding the whole file.
+"""
+import json
+import mmap
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+METADATA_FILE = "metadata.jsonl"
+OFFSETS_FILE = "metadata.offsets.npy"
+
+
+class MetadataWriter:
+    """Appends records to ``directory``; ``close()`` writes the offsets."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._handle = open(self.directory / METADATA_FILE, "wb")
+        self._offsets: List[int] = [0]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def append(self, record: dict) -> int:
+        line = json.dumps(
+            {"title": record.get("title") or "", "url": record.get("url") or ""}, ensure_ascii=False
+        ).encode("utf-8")
+        self._handle.write(line + b"\n")
+        self._offsets.append(self._offsets[-1] + len(line) + 1)
+        return len(self._offsets) - 2
+
+    def close(self) -> None:
+        self._handle.close()
+        np.save(self.directory / OFFSETS_FILE, np.asarray(self._offsets, dtype=np.uint64))
+
+    def __enter__(self) -> "MetadataWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MetadataReader:
+    """Random access to the records written by ``MetadataWriter``."""
+
+    def __init__(self, directory: Path):
+        self._offsets = np.load(Path(directory) / OFFSETS_FILE, mmap_mode="r")
+        with open(Path(directory) / METADATA_FILE, "rb") as handle:
+            self._data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) if len(self) else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, record_id: int) -> dict:
+        start, end = int(self._offsets[record_id]), int(self._offsets[record_id + 1])
+        return json.loads(self._data[start:end])
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
@@ -0,0 +1,272 @@
+"""
+DOI resolution against the CrossRef REST API.
+
+A paper cites 80+ DOIs, so lookups are never one blocking HTTP call each.
+``DoiResolver`` issues them from the event loop over a single pooled
+``httpx.AsyncClient``, at most ``CROSSREF_MAX_CONCURRENCY`` at a time, and
+concurrent analyses citing the same DOI share one in-flight request. Outcomes
+are kept in a SQLite file shared by the API processes: resolved DOIs for
+``CROSSREF_CACHE_TTL_SECONDS`` and DOIs CrossRef does not know (404) for the
+shorter ``CROSSREF_NEGATIVE_TTL_SECONDS``. Timeouts, transport errors, rate
+limiting and 5xx answers are reported as ``error`` and never cached, and an
+analysis waits at most ``CROSSREF_DEADLINE_SECONDS`` for its DOIs (slower
+lookups finish in the background and land in the cache).
+
+The cache is read and written through the threadpool, so nothing here blocks
+the event loop.
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from urllib.parse import quote
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESOLVED = "resolved"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+SQLITE_MAX_VARIABLES = 900
+
+
+@dataclass(frozen=True)
+class DoiResolution:
+    doi: str
+    status: str  # RESOLVED, NOT_FOUND or ERROR
+    title: str = ""
+    year: Optional[int] = None
+
+
+def normalize_doi(doi: str) -> str:
+    """DOIs are case-insensitive; citation text often drags trailing punctuation along."""
+    return doi.strip().rstrip(".,;").lower()
+
+
+class DoiCache:
+    """Resolved and negative CrossRef outcomes in SQLite, each with its own expiry time."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS dois ("
+            "doi TEXT PRIMARY KEY, status TEXT NOT NULL, title TEXT NOT NULL, year INTEGER, expires_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get_many(self, dois: List[str]) -> Dict[str, DoiResolution]:
+        found: Dict[str, DoiResolution] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(dois), SQLITE_MAX_VARIABLES):
+                chunk = dois[start : start + SQLITE_MAX_VARIABLES]
+                rows = self._connection.execute(
+                    f"SELECT doi, status, title, year FROM dois WHERE expires_at > ? AND doi IN ({','.join('?' * len(chunk))})",
+                    [now, *chunk],
+                ).fetchall()
+                for doi, status, title, year in rows:
+                    found[doi] = DoiResolution(doi=doi, status=status, title=title, year=year)
+        return found
+
+    def put_many(self, resolutions: Iterable[DoiResolution], ttl_seconds: float, negative_ttl_seconds: float) -> None:
+        now = time.time()
+        rows = [
+            (
+                resolution.doi,
+                resolution.status,
+                resolution.title,
+                resolution.year,
+                now + (ttl_seconds if resolution.status == RESOLVED else negative_ttl_seconds),
+            )
+            for resolution in resolutions
+            if resolution.status != ERROR
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO dois (doi, status, title, year, expires_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._connection.execute("DELETE FROM dois WHERE expires_at <= ?", (now,))
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class DoiResolver:
+    """Resolves DOIs concurrently over a pooled client. Bound to the event loop that first uses it."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache: Optional[DoiCache] = None,
+        max_concurrency: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        deadline_seconds: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = (base_url or settings.CROSSREF_API_URL).rstrip("/") + "/"
+        self.cache = cache
+        self.max_concurrency = max(1, max_concurrency or settings.CROSSREF_MAX_CONCURRENCY)
+        self.deadline = settings.CROSSREF_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds
+        user_agent = f"VeriPaper/{settings.VERSION}"
+        if settings.CROSSREF_MAILTO:
+            user_agent += f" (mailto:{settings.CROSSREF_MAILTO})"  # CrossRef's "polite" pool
+        self._client = httpx.AsyncClient(
+            timeout=settings.CROSSREF_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds,
+            limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            headers={"User-Agent": user_agent, "Accept": "application/json"},
+            transport=transport,
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight: Dict[str, "asyncio.Task[DoiResolution]"] = {}
+        self.cache_hits = 0
+        self.requests = 0
+        self.shared = 0  # lookups that joined another caller's in-flight request
+
+    async def resolve_many(self, dois: Iterable[str]) -> Dict[str, DoiResolution]:
+        """Outcomes keyed by normalized DOI. DOIs not answered within the deadline come back as ``error``."""
+        keys = list(dict.fromkeys(normalize_doi(doi) for doi in dois if doi.strip()))
+        results: Dict[str, DoiResolution] = {}
+        if self.cache is not None and keys:
+            try:
+                results.update(await run_in_threadpool(self.cache.get_many, keys))
+            except sqlite3.Error as e:
+                logger.warning(f"DOI cache lookup failed: {e}")
+            self.cache_hits += len(results)
+
+        pending = {key: self._lookup(key) for key in keys if key not in results}
+        if pending:
+            done, _ = await asyncio.wait(pending.values(), timeout=self.deadline or None)
+            for key, task in pending.items():
+                results[key] = task.result() if task in done else DoiResolution(doi=key, status=ERROR)
+        return {key: results[key] for key in keys}
+
+    def _lookup(self, doi: str) -> "asyncio.Future[DoiResolution]":
+        task = self._inflight.get(doi)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(doi))
+            self._inflight[doi] = task
+            task.add_done_callback(lambda _: self._inflight.pop(doi, None))
+        else:
+            self.shared += 1
+        # Shielded: one caller giving up (deadline, cancelled request) must not cancel the others' lookup.
+        return asyncio.shield(task)
+
+    async def _fetch_and_store(self, doi: str) -> DoiResolution:
+        resolution = await self._fetch(doi)
+        if self.cache is not None and resolution.status != ERROR:
+            try:
+                await run_in_threadpool(
+                    self.cache.put_many,
+                    [resolution],
+                    settings.CROSSREF_CACHE_TTL_SECONDS,
+                    settings.CROSSREF_NEGATIVE_TTL_SECONDS,
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"DOI cache store failed: {e}")
+        return resolution
+
+    async def _fetch(self, doi: str) -> DoiResolution:
+        async with self._semaphore:
+            self.requests += 1
+            try:
+                response = await self._client.get(self.base_url + quote(doi, safe="/"))
+            except httpx.HTTPError as e:
+                logger.warning(f"CrossRef lookup for {doi} failed: {e!r}")
+                return DoiResolution(doi=doi, status=ERROR)
+        if response.status_code == 404:
+            return DoiResolution(doi=doi, status=NOT_FOUND)
+        if response.status_code != 200:
+            logger.warning(f"CrossRef lookup for {doi} returned HTTP {response.status_code}")
+            return DoiResolution(doi=doi, status=ERROR)
+        try:
+            message = response.json().get("message") or {}
+            titles = message.get("title") or [""]
+            date_parts = (message.get("issued") or {}).get("date-parts") or [[None]]
+            year = date_parts[0][0] if date_parts[0] else None
+            return DoiResolution(doi=doi, status=RESOLVED, title=str(titles[0]), year=int(year) if year else None)
+        except (ValueError, AttributeError, TypeError, IndexError) as e:
+            logger.warning(f"CrossRef answer for {doi} is not a work record: {e}")
+            return DoiResolution(doi=doi, status=ERROR)
+
+    def stats(self) -> dict:
+        return {
+            "cache_hits": self.cache_hits,
+            "requests": self.requests,
+            "shared_inflight": self.shared,
+            "inflight": len(self._inflight),
+            "max_concurrency": self.max_concurrency,
+        }
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_cache: Optional[DoiCache] = None
+_cache_lock = threading.Lock()
+# httpx pools and asyncio primitives belong to one event loop, so each loop gets its own resolver.
+_resolvers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, DoiResolver]" = weakref.WeakKeyDictionary()
+
+
+def _shared_cache() -> Optional[DoiCache]:
+    global _cache
+    if not settings.CROSSREF_CACHE_PATH:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = DoiCache(settings.CROSSREF_CACHE_PATH)
+                except sqlite3.Error as e:
+                    logger.warning(f"DOI cache at {settings.CROSSREF_CACHE_PATH} unavailable: {e}")
+                    return None
+    return _cache
+
+
+def get_doi_resolver() -> Optional[DoiResolver]:
+    """The running event loop's resolver, or None when CrossRef lookups are disabled."""
+    if settings.CROSSREF_DISABLE:
+        return None
+    loop = asyncio.get_running_loop()
+    resolver = _resolvers.get(loop)
+    if resolver is None:
+        resolver = _resolvers[loop] = DoiResolver(cache=_shared_cache())
+    return resolver
+
+
+async def close_doi_resolver() -> None:
+    resolver = _resolvers.pop(asyncio.get_running_loop(), None)
+    if resolver is not None:
+        await resolver.aclose()
+
+
+def resolve_dois_blocking(dois: List[str]) -> Dict[str, DoiResolution]:
+    """``resolve_many`` for synchronous callers (job workers) on a short-lived loop. Never call from a loop thread."""
+    if settings.CROSSREF_DISABLE or not dois:
+        return {}
+
+    async def resolve() -> Dict[str, DoiResolution]:
+        try:
+            return await get_doi_resolver().resolve_many(dois)
+        finally:
+            await close_doi_resolver()
+
+    return asyncio.run(resolve())
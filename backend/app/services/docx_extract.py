@@ -0,0 +1,74 @@
+"""
+Streaming DOCX text extraction.
+
+``word/document.xml`` is decompressed straight from the zip and parsed with
+``iterparse``: each ``<w:p>`` is turned into a string as soon as it closes and
+then cleared, so memory stays flat however long the manuscript is (python-docx
+would build the whole object model first). Paragraphs are fed to
+``TextProfile.from_pages``, whose blank-line separator makes every Word
+paragraph a paragraph for the analyzers.
+"""
+import io
+import zipfile
+from typing import Iterator
+from xml.etree import ElementTree
+
+from .executor import TextRef
+from .text_profile import TextProfile, UnreadableDocumentError
+
+DOCX_FORMAT = "docx"
+DOCUMENT_PART = "word/document.xml"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_PARAGRAPH = f"{_W}p"
+_TEXT = f"{_W}t"
+_TAB = f"{_W}tab"
+_BREAKS = {f"{_W}br", f"{_W}cr"}
+_BODY = f"{_W}body"
+
+
+def _open_archive(text_ref: TextRef) -> zipfile.ZipFile:
+    if text_ref.path is not None:
+        return zipfile.ZipFile(text_ref.path)
+    return zipfile.ZipFile(io.BytesIO(text_ref.read_bytes()))
+
+
+def iter_paragraphs(text_ref: TextRef) -> Iterator[str]:
+    """Yield the text of each non-empty paragraph in document order."""
+    try:
+        with _open_archive(text_ref) as archive, archive.open(DOCUMENT_PART) as part:
+            pieces = []
+            body = None
+            depth = 0  # paragraphs nest inside text boxes; only the outermost one is emitted
+            for event, element in ElementTree.iterparse(part, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    if tag == _PARAGRAPH:
+                        depth += 1
+                    elif tag == _BODY:
+                        body = element
+                    continue
+                if tag == _TEXT:
+                    pieces.append(element.text or "")
+                elif tag == _TAB:
+                    pieces.append("\t")
+                elif tag in _BREAKS:
+                    pieces.append("\n")
+                elif tag == _PARAGRAPH:
+                    depth -= 1
+                    if depth == 0:
+                        paragraph = "".join(pieces).strip()
+                        pieces = []
+                        if paragraph:
+                            yield paragraph
+                if depth == 0 and body is not None and element is not body:
+                    # Drop finished paragraphs, tables, etc. so the tree never grows.
+                    element.clear()
+                    body.clear()
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        raise UnreadableDocumentError(f"Could not read DOCX: {e}") from None
+
+
+def profile_docx(text_ref: TextRef) -> TextProfile:
+    """Profile a Word document paragraph by paragraph. Executes inside an analysis worker."""
+    return TextProfile.from_pages(iter_paragraphs(text_ref))
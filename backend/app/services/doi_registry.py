@@ -0,0 +1,335 @@
+"""
+Offline DOI registry: a local snapshot of registered DOIs for air-gapped
+deployments, and to keep CrossRef lookups for the DOIs it does not know.
+
+``DOI_REGISTRY_DIR`` is built by ``scripts/build_doi_registry.py`` from a DOI
+dump and holds:
+
+* ``manifest.json``    - format, DOI count, Bloom filter size and hash count, source
+* ``dois.bin``         - normalized DOIs (see ``crossref.normalize_doi``), sorted bytewise, concatenated
+* ``dois.offsets.npy`` - uint64 start offset of each DOI in ``dois.bin`` (count + 1 entries)
+* ``years.npy``        - uint16 publication year of each DOI (0 = unknown)
+* ``bloom.bin``        - Bloom filter over the DOIs
+* ``fence.txt``        - every ``FENCE_STRIDE``-th DOI, one per line
+
+Everything but the fence keys (about 50k for 50M DOIs) is memory-mapped, so
+resident memory is the pages lookups touch. The Bloom filter answers "not
+registered" for almost every unknown DOI after a few bit probes. For the rest,
+a bisect over the in-memory fence keys picks a block of ``FENCE_STRIDE`` rows,
+and a binary search inside that block touches only a few neighbouring pages of
+the table.
+"""
+import bisect
+import gzip
+import hashlib
+import heapq
+import json
+import logging
+import mmap
+import tempfile
+import time
+from datetime import datetime, timezone
+from math import ceil, log
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..core.config import settings
+from .artifacts import ProcessWide, publish_directory
+from .crossref import normalize_doi
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+DOIS_FILE = "dois.bin"
+OFFSETS_FILE = "dois.offsets.npy"
+YEARS_FILE = "years.npy"
+BLOOM_FILE = "bloom.bin"
+FENCE_FILE = "fence.txt"
+FENCE_STRIDE = 1024
+RUN_ENTRIES = 2_000_000  # DOIs sorted in memory per run before the external merge
+HASH_BATCH = 65536
+UINT64_MASK = (1 << 64) - 1
+
+
+def _hash_pair(doi: bytes) -> Tuple[int, int]:
+    digest = hashlib.blake2b(doi, digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def bloom_parameters(count: int, false_positive_rate: float) -> Tuple[int, int]:
+    """(bits, hash functions) for ``count`` keys at the given false-positive rate."""
+    count = max(count, 1)
+    bits = max(64, int(ceil(-count * log(false_positive_rate) / log(2) ** 2)))
+    bits = (bits + 7) // 8 * 8
+    return bits, max(1, round(bits / count * log(2)))
+
+
+def _bloom_add(bloom: np.ndarray, dois: List[bytes], hashes: int) -> None:
+    """Set the bits of ``dois`` (double hashing: h1 + i * h2, wrapping at 64 bits, mod the bit count)."""
+    pairs = np.array([_hash_pair(doi) for doi in dois], dtype=np.uint64)
+    steps = np.arange(hashes, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        positions = (pairs[:, :1] + steps * pairs[:, 1:]) % np.uint64(len(bloom) * 8)
+    positions = positions.ravel()
+    np.bitwise_or.at(bloom, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+
+def iter_doi_dump(path: Union[str, Path]) -> Iterator[Tuple[str, Optional[int]]]:
+    """Yield ``(doi, year)`` from a dump, optionally gzipped.
+
+    Lines are either ``doi``, ``doi<TAB>year`` and ``doi,year`` text, or JSON
+    objects with ``DOI``/``doi`` and ``year`` or a CrossRef-style ``issued``.
+    """
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                doi = record.get("DOI") or record.get("doi") or ""
+                year = record.get("year")
+                if year is None:
+                    parts = (record.get("issued") or {}).get("date-parts") or [[None]]
+                    year = parts[0][0] if parts[0] else None
+            else:
+                doi, _, year = line.replace(",", "\t", 1).partition("\t")
+            try:
+                year = int(year) if year else None
+            except (TypeError, ValueError):
+                year = None
+            if doi:
+                yield doi, year
+
+
+def _write_run(entries: List[Tuple[bytes, int]], directory: Path, number: int) -> Path:
+    entries.sort()
+    path = directory / f"run-{number:05d}.tsv"
+    with open(path, "wb") as handle:
+        handle.writelines(doi + b"\t" + str(year).encode() + b"\n" for doi, year in entries)
+    return path
+
+
+def _read_run(handle: IO[bytes]) -> Iterator[Tuple[bytes, int]]:
+    for line in handle:
+        doi, _, year = line.rstrip(b"\n").partition(b"\t")
+        yield doi, int(year)
+
+
+def build_registry(
+    entries: Iterable[Tuple[str, Optional[int]]],
+    directory: Union[str, Path],
+    false_positive_rate: Optional[float] = None,
+    source: str = "",
+) -> dict:
+    """Sort ``(doi, year)`` entries externally, drop duplicates and write a registry to ``directory``.
+
+    The registry is assembled next to ``directory`` and renamed into place, so
+    readers never see a partial one.
+    """
+    directory = Path(directory)
+    false_positive_rate = false_positive_rate or settings.DOI_REGISTRY_FALSE_POSITIVE_RATE
+    with publish_directory(directory) as staging:
+        with tempfile.TemporaryDirectory(dir=staging) as scratch:
+            runs, buffer, total = [], [], 0
+            for doi, year in entries:
+                key = normalize_doi(doi).encode("utf-8")
+                if not key or b"\t" in key or b"\n" in key:
+                    continue
+                buffer.append((key, year if year and 0 < year < 65536 else 0))
+                total += 1
+                if len(buffer) >= RUN_ENTRIES:
+                    runs.append(_write_run(buffer, Path(scratch), len(runs)))
+                    buffer = []
+            if buffer:
+                runs.append(_write_run(buffer, Path(scratch), len(runs)))
+
+            bits, hashes = bloom_parameters(total, false_positive_rate)
+            bloom = np.zeros(bits // 8, dtype=np.uint8)
+            count = _merge_runs(runs, staging, bloom, hashes, FENCE_STRIDE)
+        bloom.tofile(staging / BLOOM_FILE)
+        manifest = {
+            "format": REGISTRY_FORMAT,
+            "count": count,
+            "bloom_bits": bits,
+            "bloom_hashes": hashes,
+            "fence_stride": FENCE_STRIDE,
+            "false_positive_rate": false_positive_rate,
+            "source": source,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _merge_runs(runs: List[Path], directory: Path, bloom: np.ndarray, hashes: int, fence_stride: int) -> int:
+    """Merge the sorted runs into the string table, keeping the first known year of each DOI."""
+    offsets_raw, years_raw = directory / "offsets.raw", directory / "years.raw"
+    handles = [open(run, "rb") for run in runs]
+    count, offset = 0, 0
+    previous: Optional[bytes] = None
+    pending: List[bytes] = []
+    offsets_chunk, years_chunk = [0], []
+    fence: List[bytes] = []
+    try:
+        with open(directory / DOIS_FILE, "wb") as dois, open(offsets_raw, "wb") as offsets, open(years_raw, "wb") as years:
+
+            def flush() -> None:
+                np.asarray(offsets_chunk, dtype=np.uint64).tofile(offsets)
+                np.asarray(years_chunk, dtype=np.uint16).tofile(years)
+                offsets_chunk.clear()
+                years_chunk.clear()
+
+            for doi, year in heapq.merge(*(_read_run(handle) for handle in handles)):
+                if doi == previous:
+                    if year and not years_chunk[-1]:
+                        years_chunk[-1] = year
+                    continue
+                if len(years_chunk) >= HASH_BATCH:
+                    flush()
+                previous = doi
+                if count % fence_stride == 0:
+                    fence.append(doi)
+                dois.write(doi)
+                offset += len(doi)
+                offsets_chunk.append(offset)
+                years_chunk.append(year)
+                pending.append(doi)
+                count += 1
+                if len(pending) >= HASH_BATCH:
+                    _bloom_add(bloom, pending, hashes)
+                    pending = []
+            flush()
+            if pending:
+                _bloom_add(bloom, pending, hashes)
+    finally:
+        for handle in handles:
+            handle.close()
+
+    (directory / FENCE_FILE).write_bytes(b"".join(key + b"\n" for key in fence))
+    _raw_to_npy(offsets_raw, directory / OFFSETS_FILE, np.uint64, count + 1)
+    _raw_to_npy(years_raw, directory / YEARS_FILE, np.uint16, count)
+    return count
+
+
+def _raw_to_npy(raw: Path, target: Path, dtype, count: int) -> None:
+    out = np.lib.format.open_memmap(target, mode="w+", dtype=dtype, shape=(count,))
+    if count:
+        out[:] = np.memmap(raw, dtype=dtype, mode="r", shape=(count,))
+    out.flush()
+    del out
+    raw.unlink()
+
+
+class DoiRegistry:
+    """Read-only, memory-mapped view of a built registry. Safe to share between threads."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if self.manifest.get("format") != REGISTRY_FORMAT:
+            raise ValueError(f"Unsupported DOI registry format in {self.directory}: {self.manifest.get('format')}")
+        self.count: int = self.manifest["count"]
+        self._bits: int = self.manifest["bloom_bits"]
+        self._hashes: int = self.manifest["bloom_hashes"]
+        self._stride: int = self.manifest["fence_stride"]
+        self._fence = (self.directory / FENCE_FILE).read_bytes().split(b"\n")[:-1]
+        # memoryviews over the mappings: indexing them yields plain ints, several times faster than numpy scalars
+        self._offsets = memoryview(np.asarray(np.load(self.directory / OFFSETS_FILE, mmap_mode="r")))
+        self._years = memoryview(np.asarray(np.load(self.directory / YEARS_FILE, mmap_mode="r")))
+        self._bloom = memoryview(np.asarray(np.memmap(self.directory / BLOOM_FILE, dtype=np.uint8, mode="r")))
+        self._file = open(self.directory / DOIS_FILE, "rb")
+        # mmap refuses empty files; an empty registry never gets past the Bloom filter anyway.
+        self._dois = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b""
+        if self.count and hasattr(mmap, "MADV_RANDOM"):
+            self._dois.madvise(mmap.MADV_RANDOM)  # lookups are point reads; skip readahead on a cold cache
+
+    def __len__(self) -> int:
+        return self.count
+
+    def might_contain(self, key: bytes) -> bool:
+        h1, h2 = _hash_pair(key)
+        bloom = self._bloom
+        for i in range(self._hashes):
+            position = ((h1 + i * h2) & UINT64_MASK) % self._bits
+            if not bloom[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def _find(self, doi: str) -> int:
+        """Row of ``doi`` in the table, or -1."""
+        key = normalize_doi(doi).encode("utf-8")
+        if not key or not self.might_contain(key):
+            return -1
+        offsets, dois = self._offsets, self._dois
+        block = bisect.bisect_right(self._fence, key) - 1
+        if block < 0:
+            return -1
+        low, high = block * self._stride, min((block + 1) * self._stride, self.count)
+        while low < high:
+            mid = (low + high) // 2
+            candidate = dois[offsets[mid] : offsets[mid + 1]]
+            if candidate < key:
+                low = mid + 1
+            elif candidate > key:
+                high = mid
+            else:
+                return mid
+        return -1
+
+    def __contains__(self, doi: str) -> bool:
+        return self._find(doi) >= 0
+
+    def lookup(self, doi: str) -> Tuple[bool, Optional[int]]:
+        """(registered, publication year if the dump had one)."""
+        row = self._find(doi)
+        if row < 0:
+            return False, None
+        year = self._years[row]
+        return True, year or None
+
+    def close(self) -> None:
+        for view in (self._offsets, self._years, self._bloom):
+            view.release()
+        if isinstance(self._dois, mmap.mmap):
+            self._dois.close()
+        self._file.close()
+
+
+def _open_registry(directory: Optional[Union[str, Path]]) -> Optional[DoiRegistry]:
+    directory = Path(directory or settings.DOI_REGISTRY_DIR)
+    if not (directory / MANIFEST_FILE).is_file():
+        return None
+    start = time.perf_counter()
+    try:
+        registry = DoiRegistry(directory)
+    except (ValueError, OSError, KeyError) as e:
+        logger.error(f"DOI registry at {directory} unusable: {e}")
+        return None
+    logger.info(f"DOI registry loaded: {len(registry)} DOIs in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return registry
+
+
+_registry: ProcessWide[DoiRegistry] = ProcessWide(_open_registry, "DOI registry")
+
+
+def load_doi_registry(directory: Optional[Union[str, Path]] = None) -> Optional[DoiRegistry]:
+    """Open the configured registry and make it the process-wide one. None if there is none."""
+    return _registry.load(directory)
+
+
+def get_doi_registry() -> Optional[DoiRegistry]:
+    """The process-wide registry; the first call loads it (analysis workers open their own mapping)."""
+    return _registry.get()
+
+
+def configure_doi_registry(registry: Optional[DoiRegistry]) -> None:
+    """Replace the process-wide registry (used by tests and benchmarks)."""
+    _registry.configure(registry)
@@ -0,0 +1,125 @@
+"""
+Micro-batching of paragraph encoding across concurrent analyses.
+
+Each analysis embeds its own paragraphs from a threadpool thread. On the CPU a
+transformer forward pass has a large fixed cost per call, so several small
+concurrent calls are much slower than one call over all of their paragraphs.
+``MicroBatchEncoder`` queues the callers' requests; a single dispatcher thread
+takes the first waiting request, keeps collecting for up to
+``EMBEDDING_BATCH_MAX_WAIT_MS`` or until ``EMBEDDING_BATCH_MAX_ITEMS``
+paragraphs, runs one batched ``encode`` and hands every caller its rows.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from ..core.config import settings
+from .embeddings import Encoder
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatchEncoder:
+    """An ``Encoder`` that coalesces concurrent ``encode`` calls into batched forward passes."""
+
+    def __init__(self, encoder: Encoder, max_items: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        self.encoder = encoder
+        self.model_name = encoder.model_name
+        self.quantization = getattr(encoder, "quantization", "none")
+        self.dimension = encoder.dimension
+        self.max_items = max(1, settings.EMBEDDING_BATCH_MAX_ITEMS if max_items is None else max_items)
+        max_wait_ms = settings.EMBEDDING_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.items = 0
+        self.queue_seconds = 0.0
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        self._ensure_dispatcher()
+        request = _Request(list(texts))
+        self._queue.put(request)
+        return request.future.result()
+
+    def _ensure_dispatcher(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._dispatch_forever, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self, first: _Request) -> List[_Request]:
+        batch, items = [first], len(first.texts)
+        deadline = time.perf_counter() + self.max_wait
+        while items < self.max_items:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)  # finish this batch, then stop
+                break
+            batch.append(request)
+            items += len(request.texts)
+        return batch
+
+    def _dispatch_forever(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+            texts = [text for request in batch for text in request.texts]
+            try:
+                vectors = self.encoder.encode(texts)
+            except BaseException as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            offset = 0
+            for request in batch:
+                request.future.set_result(vectors[offset : offset + len(request.texts)])
+                offset += len(request.texts)
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self.items += len(texts)
+                self.queue_seconds += sum(started - request.queued_at for request in batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_items": self.max_items,
+                "max_wait_ms": self.max_wait * 1000,
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_items": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "mean_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "mean_queue_ms": round(self.queue_seconds / self.requests * 1000, 3) if self.requests else 0.0,
+            }
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
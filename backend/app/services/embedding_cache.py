@@ -0,0 +1,198 @@
+"""
+Two-tier cache of paragraph embeddings.
+
+Resubmitted manuscripts and boilerplate paragraphs (methods templates,
+acknowledgements, funding statements) are embedded over and over. Vectors are
+keyed on a BLAKE2b digest of the model name and the normalized paragraph (the
+same normalization the plagiarism analyzers use), looked up in an in-process
+LRU first and then in a SQLite file that stores them as float16, which every
+API process on the host shares. Only the remaining misses reach the encoder.
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from ..core.cache import LRUCache
+from ..core.config import settings
+from .embeddings import Encoder
+from .text_profile import normalize_paragraph
+
+logger = logging.getLogger(__name__)
+
+SQLITE_MAX_VARIABLES = 900  # stay below SQLite's default bound-parameter limit
+
+
+def paragraph_key(model_name: str, paragraph: str) -> bytes:
+    return hashlib.blake2b(
+        f"{model_name}\0{normalize_paragraph(paragraph)}".encode("utf-8"), digest_size=16
+    ).digest()
+
+
+class EmbeddingDiskCache:
+    """float16 vectors in a SQLite table, pruned oldest-first beyond ``max_entries``."""
+
+    def __init__(self, path: Union[str, Path], dimension: int, max_entries: int):
+        self.path = Path(path)
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+        self._connection.commit()
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[start : start + SQLITE_MAX_VARIABLES]
+                rows = self._connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float16)
+                    if vector.size == self.dimension:
+                        found[bytes(key)] = vector.astype(np.float32)
+        return found
+
+    def put_many(self, items: Dict[bytes, np.ndarray]) -> None:
+        if not items:
+            return
+        rows = [(key, vector.astype(np.float16).tobytes()) for key, vector in items.items()]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            if self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM embeddings WHERE rowid <= (SELECT MAX(rowid) FROM embeddings) - ?",
+                    (self.max_entries,),
+                )
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CachedEncoder:
+    """An ``Encoder`` that serves repeated paragraphs from the memory and disk tiers."""
+
+    def __init__(
+        self,
+        encoder: Encoder,
+        memory_entries: Optional[int] = None,
+        disk_path: Optional[Union[str, Path]] = None,
+        disk_max_entries: Optional[int] = None,
+    ):
+        self.encoder = encoder
+        self.model_name = encoder.model_name
+        self.dimension = encoder.dimension
+        self.quantization = getattr(encoder, "quantization", "none")
+        # quantized models produce slightly different vectors; keep them apart in the shared disk tier
+        self._key_model = self.model_name if self.quantization == "none" else f"{self.model_name}+{self.quantization}"
+        self._memory: LRUCache[np.ndarray] = LRUCache(
+            settings.EMBEDDING_CACHE_MEMORY_ENTRIES if memory_entries is None else memory_entries
+        )
+        disk_path = settings.EMBEDDING_CACHE_PATH if disk_path is None else disk_path
+        self._disk: Optional[EmbeddingDiskCache] = None
+        if disk_path:
+            try:
+                self._disk = EmbeddingDiskCache(
+                    disk_path,
+                    self.dimension,
+                    settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES if disk_max_entries is None else disk_max_entries,
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache at {disk_path} unavailable, memory tier only: {e}")
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.encoded = 0
+        self.encoder_seconds = 0.0
+        self.seconds_saved = 0.0
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        keys = [paragraph_key(self._key_model, text) for text in texts]
+        missing: Dict[bytes, List[int]] = {}
+        for row, key in enumerate(keys):
+            vector = self._memory.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(row)
+            else:
+                out[row] = vector
+        memory_hits = len(texts) - sum(len(rows) for rows in missing.values())
+
+        disk_hits = 0
+        if missing and self._disk is not None:
+            try:
+                stored = self._disk.get_many(list(missing))
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding disk cache lookup failed: {e}")
+                stored = {}
+            for key, vector in stored.items():
+                vector /= max(float(np.linalg.norm(vector)), 1e-12)  # undo float16 rounding of the norm
+                self._memory.set(key, vector)
+                for row in missing.pop(key):
+                    out[row] = vector
+                    disk_hits += 1
+
+        if missing:
+            start = time.perf_counter()
+            vectors = self.encoder.encode([texts[rows[0]] for rows in missing.values()])
+            elapsed = time.perf_counter() - start
+            fresh = {}
+            for (key, rows), vector in zip(missing.items(), vectors):
+                vector = fresh[key] = vector.copy()
+                self._memory.set(key, vector)
+                out[rows] = vector
+            if self._disk is not None:
+                try:
+                    self._disk.put_many(fresh)
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding disk cache store failed: {e}")
+            with self._lock:
+                self.encoded += len(fresh)
+                self.encoder_seconds += elapsed
+
+        with self._lock:
+            self.disk_hits += disk_hits
+            if self.encoded:
+                self.seconds_saved += (memory_hits + disk_hits) * self.encoder_seconds / self.encoded
+        return out
+
+    def stats(self) -> dict:
+        memory = self._memory.stats()
+        with self._lock:
+            lookups = memory["hits"] + memory["misses"]
+            hits = memory["hits"] + self.disk_hits
+            return {
+                "model": self.model_name,
+                "quantization": self.quantization,
+                "lookups": lookups,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory": memory,
+                "disk": {
+                    "enabled": self._disk is not None,
+                    "path": str(self._disk.path) if self._disk is not None else None,
+                    "hits": self.disk_hits,
+                    "hit_rate": round(self.disk_hits / memory["misses"], 4) if memory["misses"] else 0.0,
+                },
+                "encoded": self.encoded,
+                "encoder_seconds": round(self.encoder_seconds, 3),
+                "encoder_seconds_saved": round(self.seconds_saved, 3),
+            }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
@@ -0,0 +1,109 @@
+"""
+Sentence embeddings for semantic plagiarism search.
+
+``sentence-transformers`` (and torch) are imported lazily, the first time an
+encoder is needed, so the API still starts — with semantic search disabled —
+on hosts where they are not installed. Vectors are L2-normalized float32, so
+inner product equals cosine similarity.
+"""
+import logging
+import threading
+from typing import Optional, Protocol, Sequence
+
+import numpy as np
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Encoder(Protocol):
+    model_name: str
+    dimension: int
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(texts), dimension)`` float32 array of unit vectors."""
+
+
+QUANTIZATION_MODES = ("none", "int8")
+
+
+class SentenceEncoder:
+    """A sentence-transformers model running on the CPU.
+
+    ``quantize="int8"`` applies torch dynamic quantization to the model's
+    ``nn.Linear`` layers: weights are stored as int8 and activations are
+    quantized on the fly, which shrinks the model and speeds up CPU inference
+    at a small cost in embedding fidelity (see bench_sentence_encoder.py).
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, quantize: str = "none"):
+        if quantize not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown encoder quantization {quantize!r}; expected one of {QUANTIZATION_MODES}")
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.quantization = quantize
+        self.model = SentenceTransformer(model_name, device="cpu")
+        if quantize == "int8":
+            _quantize_linear_layers(self.model)
+        self.dimension = int(self.model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def _quantize_linear_layers(model) -> None:
+    import torch
+
+    engines = torch.backends.quantized.supported_engines
+    if "fbgemm" not in engines and "qnnpack" in engines:  # ARM hosts
+        torch.backends.quantized.engine = "qnnpack"
+    model.eval()
+    torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+_encoder: Optional[Encoder] = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder() -> Encoder:
+    """The process-wide encoder for ``settings.SBERT_MODEL``, loaded on first use."""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                logger.info(f"Loading sentence encoder {settings.SBERT_MODEL} (quantization: {settings.SBERT_QUANTIZE})")
+                encoder: Encoder = SentenceEncoder(settings.SBERT_MODEL, quantize=settings.SBERT_QUANTIZE)
+                if settings.EMBEDDING_BATCH_MAX_WAIT_MS > 0:
+                    from .embedding_batcher import MicroBatchEncoder
+
+                    encoder = MicroBatchEncoder(encoder)
+                if settings.EMBEDDING_CACHE_ENABLED:
+                    from .embedding_cache import CachedEncoder
+
+                    encoder = CachedEncoder(encoder)
+                _encoder = encoder
+    return _encoder
+
+
+def loaded_encoder() -> Optional[Encoder]:
+    """The process-wide encoder if something already loaded it (never loads the model)."""
+    return _encoder
+
+
+def configure_encoder(encoder: Optional[Encoder]) -> None:
+    """Replace the process-wide encoder (used by tests and benchmarks)."""
+    global _encoder
+    with _encoder_lock:
+        _encoder = encoder
@@ -0,0 +1,206 @@
+"""
+Execution engine that keeps CPU-bound analysis off the event loop.
+
+The analyzers and the reportlab renderer are pure Python and hold the GIL, so
+running them inside ``async def`` handlers stalls every other request on the
+worker. ``AnalysisExecutor`` runs them in a process pool instead; extracted
+texts above a size threshold travel to the workers through POSIX shared memory
+rather than being pickled into the task payload.
+"""
+import asyncio
+import logging
+import mmap
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = {"process", "thread", "inline"}
+
+
+@dataclass(frozen=True)
+class TextRef:
+    """Picklable handle to a document: inline, in shared memory, or a file on disk.
+
+    ``format`` is ``"text"`` for UTF-8 text, read with ``load()``; binary formats
+    such as ``"pdf"`` carry their raw bytes (``data``, shared memory or ``path``),
+    read with ``read_bytes()`` and extracted inside the worker.
+    """
+
+    text: Optional[str] = None
+    shm_name: Optional[str] = None
+    path: Optional[str] = None
+    size: int = 0
+    data: Optional[bytes] = None
+    format: str = "text"
+
+    def load(self) -> str:
+        if self.path is not None:
+            with open(self.path, "rb") as handle:
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, "utf-8", "ignore")
+        if self.shm_name is None:
+            return self.text or ""
+        segment = shared_memory.SharedMemory(name=self.shm_name)
+        try:
+            return str(segment.buf[: self.size], "utf-8")
+        finally:
+            segment.close()
+
+    def read_bytes(self) -> bytes:
+        if self.path is not None:
+            with open(self.path, "rb") as handle:
+                return handle.read()
+        if self.shm_name is None:
+            return self.data if self.data is not None else (self.text or "").encode("utf-8")
+        segment = shared_memory.SharedMemory(name=self.shm_name)
+        try:
+            return bytes(segment.buf[: self.size])
+        finally:
+            segment.close()
+
+
+@contextmanager
+def share_text(text: str, use_shared_memory: bool = True) -> Iterator[TextRef]:
+    """Expose ``text`` to worker processes for the duration of the block."""
+    if not use_shared_memory or len(text) < settings.ANALYSIS_SHARED_MEMORY_MIN_BYTES:
+        yield TextRef(text=text)
+        return
+
+    payload = text.encode("utf-8")
+    size = len(payload)
+    segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        segment.buf[:size] = payload
+        del payload
+        yield TextRef(shm_name=segment.name, size=size)
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+@contextmanager
+def share(text_ref: TextRef, use_shared_memory: bool = True) -> Iterator[TextRef]:
+    """Like ``share_text`` for any inline ``TextRef``; file-backed refs pass through."""
+    if text_ref.text is not None and text_ref.format == "text":
+        with share_text(text_ref.text, use_shared_memory) as shared:
+            yield shared
+    elif (
+        text_ref.data is not None
+        and use_shared_memory
+        and len(text_ref.data) >= settings.ANALYSIS_SHARED_MEMORY_MIN_BYTES
+    ):
+        size = len(text_ref.data)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        try:
+            segment.buf[:size] = text_ref.data
+            yield TextRef(shm_name=segment.name, size=size, format=text_ref.format)
+        finally:
+            segment.close()
+            segment.unlink()
+    else:
+        yield text_ref
+
+
+def _warm_up() -> int:
+    # Importing the pipeline module up front keeps the first real request fast.
+    from ..api import routes  # noqa: F401
+
+    return multiprocessing.current_process().pid
+
+
+class AnalysisExecutor:
+    """Runs blocking analysis callables outside the event loop.
+
+    ``mode`` is ``"process"`` (a spawn-based process pool, the default),
+    ``"thread"`` (Starlette's thread pool; still GIL-bound) or ``"inline"``
+    (on the event loop, only useful as a benchmark baseline).
+    """
+
+    def __init__(self, mode: str = "process", workers: int = 1):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}'. Expected one of {sorted(EXECUTOR_MODES)}")
+        if mode == "process" and workers < 1:
+            mode = "thread"
+        self.mode = mode
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.mode == "process"
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: uvicorn workers are multi-threaded, and forking a threaded process is unsafe.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def start(self) -> None:
+        """Spawn and warm up all pool workers."""
+        if not self.uses_processes:
+            return
+        pool = self._get_pool()
+        pids = {future.result() for future in [pool.submit(_warm_up) for _ in range(self.workers)]}
+        logger.info(f"Analysis process pool ready ({len(pids)} of {self.workers} workers warmed)")
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.mode == "inline":
+            return fn(*args)
+        if self.mode == "thread":
+            return await run_in_threadpool(fn, *args)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_pool(), partial(fn, *args))
+        except BrokenProcessPool:
+            logger.error("Analysis worker crashed; recycling the process pool")
+            self._pool = None
+            raise
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "workers": self.workers if self.uses_processes else 0}
+
+
+_executor: Optional[AnalysisExecutor] = None
+
+
+def get_executor() -> AnalysisExecutor:
+    global _executor
+    if _executor is None:
+        _executor = AnalysisExecutor(mode=settings.ANALYSIS_EXECUTOR, workers=settings.ANALYSIS_WORKERS)
+    return _executor
+
+
+def configure_executor(mode: str, workers: int) -> AnalysisExecutor:
+    """Replace the process-wide executor (used by lifespan, tests and benchmarks)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+    _executor = AnalysisExecutor(mode=mode, workers=workers)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,167 @@
+"""
+Browsing stored analyses.
+
+``GET /api/history`` lists ``analysis_history`` rows newest first. Pages are
+addressed by a keyset cursor, the (analyzed_at, id) of the last row served,
+so any page costs one index seek plus ``limit`` rows; OFFSET would read and
+discard every row before the page. Every supported filter (date range, exact
+filename, credibility band) is served by a composite index ending in
+(analyzed_at, id) (see ``AnalysisHistory``), so a filtered page is a range
+scan in the order it is returned, with no sort.
+
+A page takes two queries: the history rows, then the requested
+``analysis_results`` columns for just those rows, by primary key. The large
+JSON columns are only selected when asked for.
+"""
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import and_, or_
+
+from ..core.config import settings
+from ..models.database import CREDIBILITY_BANDS, AnalysisHistory
+from ..models.database import AnalysisResult as AnalysisResultRecord
+
+SUMMARY_COLUMNS = (
+    "plagiarism_score",
+    "ai_probability",
+    "citation_validity_score",
+    "statistical_risk_score",
+    "report_path",
+)
+DETAIL_COLUMNS = ("plagiarism_matches", "citation_details", "explanations", "suspicious_paragraphs")
+BANDS = tuple(name for name, _ in CREDIBILITY_BANDS)
+
+
+def encode_cursor(analyzed_at: datetime, row_id: int) -> str:
+    payload = json.dumps([analyzed_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """The (analyzed_at, id) a cursor points after; ValueError if it is not one of ours."""
+    try:
+        analyzed_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(analyzed_at), int(row_id)
+    except (TypeError, ValueError) as e:  # binascii.Error and JSONDecodeError are ValueErrors
+        raise ValueError("Invalid cursor") from e
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    # analyzed_at is stored as naive UTC.
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _isoformat(moment: Optional[datetime]) -> Optional[str]:
+    return moment.replace(tzinfo=timezone.utc).isoformat() if moment else None
+
+
+def _session_factory():
+    from ..core.database import get_session_factory
+
+    return get_session_factory()
+
+
+def list_history(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    filename: Optional[str] = None,
+    band: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    include: Iterable[str] = (),
+    session_factory: Optional[Callable] = None,
+) -> dict:
+    """One page of history, newest first, with ``next_cursor`` for the following page. Blocking.
+
+    ``since`` is inclusive and ``until`` exclusive. ``include`` names any of ``DETAIL_COLUMNS`` to add.
+    Raises ValueError for an unknown band, detail column or cursor.
+    """
+    include = list(dict.fromkeys(include))
+    unknown = [name for name in include if name not in DETAIL_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown include {', '.join(unknown)}; choose from {', '.join(DETAIL_COLUMNS)}")
+    if band is not None and band not in BANDS:
+        raise ValueError(f"Unknown credibility band {band!r}; choose from {', '.join(BANDS)}")
+    limit = max(1, min(limit or settings.HISTORY_PAGE_SIZE, settings.HISTORY_MAX_PAGE_SIZE))
+
+    after = decode_cursor(cursor) if cursor else None
+    until = _naive_utc(until) if until is not None else None
+    if after is not None and until is not None and after[0] < until:
+        # The cursor is the tighter upper bound. SQLite seeks on one upper bound only, and would
+        # otherwise scan every row between ``until`` and the cursor.
+        until = None
+
+    query_filters = []
+    if since is not None:
+        query_filters.append(AnalysisHistory.analyzed_at >= _naive_utc(since))
+    if until is not None:
+        query_filters.append(AnalysisHistory.analyzed_at < until)
+    if filename is not None:
+        query_filters.append(AnalysisHistory.filename == filename)
+    if band is not None:
+        query_filters.append(AnalysisHistory.credibility_band == band)
+    if after is not None:
+        after_at, after_id = after
+        # Row-value "(analyzed_at, id) < (t, i)" spelled so both SQLite and PostgreSQL seek on it.
+        query_filters.append(
+            and_(
+                AnalysisHistory.analyzed_at <= after_at,
+                or_(AnalysisHistory.analyzed_at < after_at, AnalysisHistory.id < after_id),
+            )
+        )
+
+    session = (session_factory or _session_factory())()
+    try:
+        rows = (
+            session.query(
+                AnalysisHistory.id,
+                AnalysisHistory.result_id,
+                AnalysisHistory.filename,
+                AnalysisHistory.credibility_score,
+                AnalysisHistory.credibility_band,
+                AnalysisHistory.analyzed_at,
+            )
+            .filter(*query_filters)
+            .order_by(AnalysisHistory.analyzed_at.desc(), AnalysisHistory.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        more = len(rows) > limit
+        rows = rows[:limit]
+
+        columns: List[str] = [*SUMMARY_COLUMNS, *include]
+        results = {}
+        result_ids = list({row.result_id for row in rows})
+        if result_ids:
+            results = {
+                record.id: record
+                for record in session.query(
+                    AnalysisResultRecord.id, *(getattr(AnalysisResultRecord, name) for name in columns)
+                ).filter(AnalysisResultRecord.id.in_(result_ids))
+            }
+    finally:
+        session.close()
+
+    items = []
+    for row in rows:
+        item = {
+            "id": row.id,
+            "result_id": row.result_id,
+            "filename": row.filename,
+            "credibility_score": row.credibility_score,
+            "credibility_band": row.credibility_band,
+            "analyzed_at": _isoformat(row.analyzed_at),
+        }
+        record = results.get(row.result_id)
+        item.update({name: getattr(record, name) if record is not None else None for name in columns})
+        items.append(item)
+    return {
+        "items": items,
+        "limit": limit,
+        "next_cursor": encode_cursor(rows[-1].analyzed_at, rows[-1].id) if more else None,
+    }
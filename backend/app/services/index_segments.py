@@ -0,0 +1,428 @@
+"""
+Segmented corpus indexes: an index root that grows by appending delta
+segments, hides removed documents with tombstones and is merged back into a
+single segment by a background compaction.
+
+Root layout::
+
+    segments.json          generation, live segments in order, tombstoned doc ids per segment
+    segment-<stamp>/       an ordinary index directory (plagiarism_index or minhash_index format)
+
+Writers build a new segment directory without holding any lock and then
+commit by rewriting ``segments.json`` (``os.replace``) inside a short locked
+critical section, so readers always see a whole snapshot. A compaction that
+lost a race with another writer (its inputs were retired or tombstoned
+meanwhile) discards its work and is retried on the next round. Compactions themselves take a lease
+first, so with several API workers only one of them merges a root at a time;
+the others skip the round. Both the commit lock and the lease are ``flock``
+locks on files in the root, released by the kernel if their holder dies.
+
+Readers (``SegmentedIndex``) re-check ``segments.json`` at most every
+``INDEX_REFRESH_SECONDS``, open only the segments they have not seen yet and
+publish a new immutable ``Snapshot``; a query runs entirely on the snapshot it
+started with. Compacted-away segments are kept for
+``INDEX_SEGMENT_RETENTION_SECONDS`` so readers still mapping them are not cut off.
+
+A root written before segmentation existed (a bare index directory) is read as
+a single segment; it has to be rebuilt before it can be appended to.
+"""
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+import numpy as np
+
+from ..core.config import settings
+from .artifacts import publish_directory
+from .corpus_metadata import MetadataReader
+
+logger = logging.getLogger(__name__)
+
+SEGMENTS_FORMAT = 1
+SEGMENTS_FILE = "segments.json"
+LEGACY_MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".commit.lock"
+COMPACTION_LEASE_FILE = ".compaction.lease"
+
+T = TypeVar("T")
+# Writes one segment directory from corpus records and returns its document count.
+SegmentBuilder = Callable[[Path], int]
+# Merges (segment directory, tombstoned doc ids) pairs into a new directory; returns its document count.
+SegmentMerger = Callable[[List[Tuple[Path, np.ndarray]], Path], int]
+
+
+def document_key(record: dict) -> str:
+    """What tombstones match on: the corpus URL, or the title when a record has none."""
+    return record.get("url") or record.get("title") or ""
+
+
+def read_segments(root: Union[str, Path]) -> Optional[dict]:
+    """The committed ``segments.json`` of ``root``, or None if it is not a segmented root."""
+    try:
+        return json.loads((Path(root) / SEGMENTS_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def _write_segments(root: Path, manifest: dict) -> None:
+    manifest["generation"] = manifest.get("generation", 0) + 1
+    manifest["updated_at"] = datetime.now(timezone.utc).isoformat()
+    temporary = root / f"{SEGMENTS_FILE}.{os.getpid()}.tmp"
+    temporary.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(temporary, root / SEGMENTS_FILE)
+
+
+@contextmanager
+def _commit_lock(root: Path, timeout: float = 10.0) -> Iterator[None]:
+    """Serialize ``segments.json`` updates across processes with an exclusive lock on ``LOCK_FILE``."""
+    with _locked(root / LOCK_FILE, timeout) as held:
+        if not held:
+            raise TimeoutError(f"Timed out waiting for {root / LOCK_FILE}")
+        yield
+
+
+@contextmanager
+def _compaction_lease(root: Path) -> Iterator[bool]:
+    """Yields whether this process holds ``root``'s compaction lease; never waits for it."""
+    with _locked(root / COMPACTION_LEASE_FILE, timeout=0.0) as held:
+        yield held
+
+
+@contextmanager
+def _locked(path: Path, timeout: float) -> Iterator[bool]:
+    """Yields whether an exclusive ``flock`` on ``path`` was taken within ``timeout`` seconds.
+
+    The file itself is never removed: the kernel drops the lock when its holder
+    exits or dies, so there is no staleness to judge and no lock file to take over.
+    """
+    descriptor = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(0.01)
+        yield True
+    finally:
+        os.close(descriptor)  # releases the lock
+
+
+def _segment_name() -> str:
+    return f"segment-{datetime.now(timezone.utc):%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+def _require_segments(root: Path) -> dict:
+    manifest = read_segments(root)
+    if manifest is None:
+        raise ValueError(f"{root} is not a segmented index; rebuild it with the build script first")
+    return manifest
+
+
+def create_index(root: Union[str, Path], build: SegmentBuilder) -> dict:
+    """Write a fresh root holding one segment and swap it in for ``root`` with a rename."""
+    with publish_directory(root) as staging:
+        name = _segment_name()
+        documents = build(staging / name)
+        manifest = {
+            "format": SEGMENTS_FORMAT,
+            "segments": [{"name": name, "documents": documents}],
+            "tombstones": {},
+            "retired": {},
+        }
+        _write_segments(staging, manifest)
+    return manifest
+
+
+def append_segment(root: Union[str, Path], build: SegmentBuilder) -> Optional[str]:
+    """Build a delta segment and publish it. Returns its name, or None if it held no documents."""
+    root = Path(root)
+    _require_segments(root)
+    name = _segment_name()
+    try:
+        documents = build(root / name)
+        if not documents:
+            shutil.rmtree(root / name, ignore_errors=True)
+            return None
+        with _commit_lock(root):
+            manifest = _require_segments(root)
+            manifest["segments"].append({"name": name, "documents": documents})
+            _write_segments(root, manifest)
+    except BaseException:
+        shutil.rmtree(root / name, ignore_errors=True)
+        raise
+    return name
+
+
+def remove_documents(root: Union[str, Path], keys: Iterable[str]) -> int:
+    """Tombstone every live document whose ``document_key`` is in ``keys``. Returns how many were newly hidden."""
+    root = Path(root)
+    keys = set(keys)
+    for _ in range(5):
+        manifest = _require_segments(root)
+        found: Dict[str, List[int]] = {}
+        for segment in manifest["segments"]:
+            metadata = MetadataReader(root / segment["name"])
+            try:
+                ids = [doc_id for doc_id in range(len(metadata)) if document_key(metadata[doc_id]) in keys]
+            finally:
+                metadata.close()
+            if ids:
+                found[segment["name"]] = ids
+
+        with _commit_lock(root):
+            current = _require_segments(root)
+            live = {segment["name"] for segment in current["segments"]}
+            if not set(found) <= live:
+                continue  # a compaction retired a segment we scanned; rescan the new layout
+            added = 0
+            for name, ids in found.items():
+                existing = set(current["tombstones"].get(name, []))
+                added += len(set(ids) - existing)
+                current["tombstones"][name] = sorted(existing | set(ids))
+            if added:
+                _write_segments(root, current)
+            return added
+    raise RuntimeError(f"Index at {root} kept changing while removing documents")
+
+
+def needs_compaction(manifest: dict) -> bool:
+    segments = manifest["segments"]
+    documents = sum(segment["documents"] for segment in segments)
+    tombstoned = sum(len(ids) for ids in manifest["tombstones"].values())
+    return len(segments) >= settings.INDEX_COMPACT_MIN_SEGMENTS or (
+        tombstoned > 0 and tombstoned >= settings.INDEX_COMPACT_TOMBSTONE_RATIO * max(documents, 1)
+    )
+
+
+def compact(root: Union[str, Path], merge: SegmentMerger, force: bool = False) -> Optional[str]:
+    """Merge every live segment, minus tombstoned documents, into one new segment.
+
+    Returns the new segment's name, or None when there was nothing to do,
+    another process is compacting ``root`` or a concurrent writer changed the
+    merged segments (the next round retries).
+    """
+    root = Path(root)
+    if not _worth_compacting(_require_segments(root), force):
+        _sweep(root)
+        return None
+
+    with _compaction_lease(root) as leased:
+        if not leased:
+            logger.debug(f"{root} is being compacted by another process; skipping")
+            return None
+        manifest = _require_segments(root)  # re-read: the previous holder may just have compacted it
+        if not _worth_compacting(manifest, force):
+            return None
+        merged = [segment["name"] for segment in manifest["segments"]]
+        name = _segment_name()
+        sources = [
+            (root / segment, np.asarray(manifest["tombstones"].get(segment, []), dtype=np.int64))
+            for segment in merged
+        ]
+        start = time.perf_counter()
+        try:
+            documents = merge(sources, root / name)
+            with _commit_lock(root):
+                current = _require_segments(root)
+                live = [segment["name"] for segment in current["segments"]]
+                unchanged = set(merged) <= set(live) and all(
+                    current["tombstones"].get(segment, []) == manifest["tombstones"].get(segment, [])
+                    for segment in merged
+                )
+                if not unchanged:
+                    logger.info(f"Compaction of {root} raced with another writer; discarded")
+                    shutil.rmtree(root / name, ignore_errors=True)
+                    return None
+                now = time.time()
+                current["segments"] = [{"name": name, "documents": documents}] + [
+                    segment for segment in current["segments"] if segment["name"] not in merged
+                ]
+                current["tombstones"] = {
+                    segment: ids for segment, ids in current["tombstones"].items() if segment not in merged
+                }
+                current["retired"].update({segment: now for segment in merged})
+                _write_segments(root, current)
+        except BaseException:
+            shutil.rmtree(root / name, ignore_errors=True)
+            raise
+    logger.info(
+        f"Compacted {len(merged)} segment(s) of {root} into {name} ({documents} documents) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    _sweep(root)
+    return name
+
+
+def _worth_compacting(manifest: dict, force: bool) -> bool:
+    merged = [segment["name"] for segment in manifest["segments"]]
+    if not merged or not (force or needs_compaction(manifest)):
+        return False
+    return len(merged) > 1 or bool(manifest["tombstones"].get(merged[0]))
+
+
+def _sweep(root: Path) -> None:
+    """Delete retired segments once no reader can still be opening them."""
+    with _commit_lock(root):
+        manifest = _require_segments(root)
+        cutoff = time.time() - settings.INDEX_SEGMENT_RETENTION_SECONDS
+        expired = [segment for segment, retired_at in manifest["retired"].items() if retired_at <= cutoff]
+        for segment in expired:
+            shutil.rmtree(root / segment, ignore_errors=True)
+            if not (root / segment).exists():
+                del manifest["retired"][segment]
+        if expired:
+            _write_segments(root, manifest)
+
+
+@dataclass(frozen=True)
+class Segment(Generic[T]):
+    name: str
+    index: T
+    deleted: np.ndarray  # sorted tombstoned doc ids of this segment
+
+
+@dataclass(frozen=True)
+class Snapshot(Generic[T]):
+    generation: int
+    segments: Tuple[Segment[T], ...] = field(default_factory=tuple)
+
+    @property
+    def documents(self) -> int:
+        return sum(segment.index.documents - len(segment.deleted) for segment in self.segments)
+
+
+class SegmentedIndex(Generic[T]):
+    """Reader over a segmented root that follows new commits without a restart."""
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        open_segment: Callable[[Path], T],
+        refresh_seconds: Optional[float] = None,
+    ):
+        self.root = Path(root)
+        self._open_segment = open_segment
+        self.refresh_seconds = settings.INDEX_REFRESH_SECONDS if refresh_seconds is None else refresh_seconds
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked = time.monotonic()
+        self._snapshot: Snapshot[T] = Snapshot(0)
+        self._snapshot = self._load()
+
+    def _manifest_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = (self.root / SEGMENTS_FILE).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> Snapshot[T]:
+        opened = {segment.name: segment.index for segment in self._snapshot.segments}
+        for _ in range(5):
+            stamp = self._manifest_stamp()
+            manifest = read_segments(self.root)
+            if manifest is None:
+                if not (self.root / LEGACY_MANIFEST_FILE).is_file():
+                    raise FileNotFoundError(f"No index at {self.root}")
+                self._stamp = None
+                index = opened.get(".") or self._open_segment(self.root)
+                return Snapshot(0, (Segment(".", index, np.zeros(0, dtype=np.int64)),))
+            try:
+                segments = tuple(
+                    Segment(
+                        entry["name"],
+                        opened.get(entry["name"]) or self._open_segment(self.root / entry["name"]),
+                        np.asarray(manifest["tombstones"].get(entry["name"], []), dtype=np.int64),
+                    )
+                    for entry in manifest["segments"]
+                )
+            except FileNotFoundError:
+                continue  # a segment was swept between reading the manifest and opening it
+            self._stamp = stamp
+            return Snapshot(manifest["generation"], segments)
+        raise RuntimeError(f"Index at {self.root} kept changing while loading")
+
+    def snapshot(self) -> Snapshot[T]:
+        """The current snapshot, re-reading ``segments.json`` if it changed since the last check."""
+        if time.monotonic() - self._checked >= self.refresh_seconds:
+            with self._lock:
+                if time.monotonic() - self._checked >= self.refresh_seconds:
+                    self._checked = time.monotonic()
+                    if self._manifest_stamp() != self._stamp:
+                        try:
+                            self._snapshot = self._load()
+                        except Exception as e:
+                            logger.error(
+                                f"Could not refresh index at {self.root}; "
+                                f"keeping generation {self._snapshot.generation}: {e}"
+                            )
+        return self._snapshot
+
+
+def best_hits(hit_lists: Iterable[Sequence[T]], top_k: int) -> List[T]:
+    """Merge per-segment hits (with ``similarity``, ``title``, ``url``): best first, one per source."""
+    best: Dict[Tuple[str, str], T] = {}
+    for hits in hit_lists:
+        for hit in hits:
+            key = (hit.title, hit.url)
+            if key not in best or hit.similarity > best[key].similarity:
+                best[key] = hit
+    return sorted(best.values(), key=lambda hit: hit.similarity, reverse=True)[:top_k]
+
+
+class IndexCompactor:
+    """Background thread that compacts segmented roots that need it.
+
+    Every API process runs one, but a root is merged by one process at a time:
+    the others find its compaction lease taken and skip the round.
+    """
+
+    def __init__(self, roots: Sequence[Tuple[Path, SegmentMerger]], interval: float):
+        self.roots = list(roots)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> List[str]:
+        compacted = []
+        for root, merge in self.roots:
+            try:
+                if read_segments(root) is not None:
+                    name = compact(root, merge)
+                    if name:
+                        compacted.append(name)
+            except Exception as e:
+                logger.error(f"Compaction of {root} failed: {e}")
+        return compacted
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(self.interval):
+                self.run_once()
+
+        self._thread = threading.Thread(target=loop, name="index-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,159 @@
+"""
+Streaming upload ingestion.
+
+Uploads are consumed in fixed-size chunks: the SHA-256 is computed as the
+bytes arrive, the size limit is enforced per chunk, and anything above
+``UPLOAD_SPOOL_MIN_BYTES`` is spooled to a temporary file that extractors and
+analysis workers memory-map instead of holding a ``bytes`` copy.
+"""
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, BinaryIO, Iterator, Optional, Union
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class IngestedUpload:
+    """An upload that has been fully read, hashed and size-checked."""
+
+    filename: str
+    size: int
+    sha256: str
+    data: Optional[bytes] = None
+    path: Optional[Path] = None
+
+    @property
+    def extension(self) -> str:
+        return Path(self.filename).suffix.lower()
+
+    @property
+    def spooled(self) -> bool:
+        return self.path is not None
+
+    @contextmanager
+    def open_buffer(self) -> Iterator[Union[bytes, mmap.mmap]]:
+        """Yield the upload as a bytes-like object (an ``mmap`` when spooled)."""
+        if self.path is None:
+            yield self.data or b""
+            return
+        with open(self.path, "rb") as handle:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    def cleanup(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+        self.data = None
+
+
+class _Spool:
+    """Accumulates chunks in memory, rolling over to a temp file past a threshold."""
+
+    def __init__(self, spool_min_bytes: int):
+        self.spool_min_bytes = spool_min_bytes
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.buffer = bytearray()
+        self.handle: Optional[BinaryIO] = None
+
+    def write(self, chunk: bytes) -> None:
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        if self.handle is None and self.size >= self.spool_min_bytes:
+            settings.UPLOAD_SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+            self.handle = tempfile.NamedTemporaryFile(
+                prefix="upload_", suffix=".bin", dir=settings.UPLOAD_SPOOL_DIR, delete=False
+            )
+            self.handle.write(self.buffer)
+            self.buffer = bytearray()
+        if self.handle is not None:
+            self.handle.write(chunk)
+        else:
+            self.buffer.extend(chunk)
+
+    def discard(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+            os.unlink(self.handle.name)
+            self.handle = None
+        self.buffer = bytearray()
+
+    def finish(self, filename: str) -> IngestedUpload:
+        if self.handle is not None:
+            self.handle.close()
+            return IngestedUpload(
+                filename=filename, size=self.size, sha256=self.digest.hexdigest(), path=Path(self.handle.name)
+            )
+        return IngestedUpload(
+            filename=filename, size=self.size, sha256=self.digest.hexdigest(), data=bytes(self.buffer)
+        )
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large. Max size is {max_bytes // (1024 * 1024)} MB")
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_bytes: int,
+    chunk_size: int = CHUNK_SIZE,
+    spool_min_bytes: Optional[int] = None,
+) -> IngestedUpload:
+    """Read ``file`` chunk by chunk, rejecting it with 413 as soon as it exceeds ``max_bytes``."""
+    spool = _Spool(settings.UPLOAD_SPOOL_MIN_BYTES if spool_min_bytes is None else spool_min_bytes)
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            if spool.size + len(chunk) > max_bytes:
+                raise _too_large(max_bytes)
+            await run_in_threadpool(spool.write, chunk)
+    except BaseException:
+        spool.discard()
+        raise
+
+    if spool.size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    return spool.finish(file.filename or "")
+
+
+def ingest_stream(
+    stream: IO[bytes],
+    filename: str,
+    max_bytes: int,
+    chunk_size: int = CHUNK_SIZE,
+    spool_min_bytes: Optional[int] = None,
+) -> IngestedUpload:
+    """Blocking counterpart of ``ingest_upload`` for file objects such as zip members."""
+    spool = _Spool(settings.UPLOAD_SPOOL_MIN_BYTES if spool_min_bytes is None else spool_min_bytes)
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if spool.size + len(chunk) > max_bytes:
+                raise _too_large(max_bytes)
+            spool.write(chunk)
+    except BaseException:
+        spool.discard()
+        raise
+
+    if spool.size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    return spool.finish(filename)
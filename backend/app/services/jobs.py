@@ -0,0 +1,371 @@
+"""
+Durable asynchronous analysis jobs.
+
+Jobs live in the ``analysis_jobs`` table and their uploads in ``JOBS_DIR``.
+Workers claim a job with a conditional UPDATE (no row locks, so the same code
+runs on SQLite and PostgreSQL), keep a lease on it while the pipeline runs, and
+record per-stage timings. A worker that dies leaves its lease to expire; the
+next worker reclaims the job until ``max_attempts`` is exhausted.
+
+Run standalone workers with ``python -m backend.app.services.jobs``.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import List, Optional, Union
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..core.config import settings
+from ..models.database import AnalysisJob
+from . import prometheus
+from .ingest import IngestedUpload
+from .metrics import get_metrics
+from .persistence import close_result_writer
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+def _session_factory() -> sessionmaker:
+    from ..core.database import get_session_factory
+
+    return get_session_factory()
+
+
+def enqueue_job(upload: IngestedUpload, max_attempts: Optional[int] = None) -> AnalysisJob:
+    """Persist a spooled upload as a queued job. Blocking."""
+    job_id = uuid.uuid4().hex
+    settings.JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    payload_path = settings.JOBS_DIR / f"{job_id}{upload.extension}"
+    if upload.spooled:
+        shutil.move(str(upload.path), payload_path)
+        upload.path = None
+    else:
+        payload_path.write_bytes(upload.data or b"")
+
+    job = AnalysisJob(
+        id=job_id,
+        status=JOB_QUEUED,
+        filename=upload.filename[:255],
+        file_size=upload.size,
+        file_hash=upload.sha256,
+        payload_path=str(payload_path),
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_at=datetime.utcnow(),
+    )
+    session = _session_factory()()
+    try:
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+        session.expunge(job)
+    except Exception:
+        session.rollback()
+        payload_path.unlink(missing_ok=True)
+        raise
+    finally:
+        session.close()
+    return job
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Return the API view of a job, or None. Blocking."""
+    session = _session_factory()()
+    try:
+        job = session.get(AnalysisJob, job_id)
+        return job.to_dict() if job else None
+    finally:
+        session.close()
+
+
+class JobWorker:
+    """Claims and executes queued jobs one at a time."""
+
+    def __init__(
+        self,
+        session_factory: Optional[sessionmaker] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        self.session_factory = session_factory or _session_factory()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+
+    def _claimable(self, now: datetime):
+        expired = and_(AnalysisJob.status == JOB_RUNNING, AnalysisJob.lease_expires_at < now)
+        return or_(AnalysisJob.status == JOB_QUEUED, expired)
+
+    def claim(self) -> Optional[AnalysisJob]:
+        """Atomically take the oldest claimable job, or return None."""
+        session: Session = self.session_factory()
+        try:
+            for _ in range(5):
+                now = datetime.utcnow()
+                candidate = (
+                    session.query(AnalysisJob.id, AnalysisJob.attempts, AnalysisJob.max_attempts, AnalysisJob.payload_path)
+                    .filter(self._claimable(now))
+                    .order_by(AnalysisJob.created_at)
+                    .first()
+                )
+                if candidate is None:
+                    return None
+
+                if candidate.attempts >= candidate.max_attempts:
+                    # The last attempt died without reporting back.
+                    failed = session.execute(
+                        update(AnalysisJob)
+                        .where(AnalysisJob.id == candidate.id, self._claimable(now))
+                        .values(
+                            status=JOB_FAILED,
+                            error="Worker lost the job too many times",
+                            finished_at=now,
+                            lease_expires_at=None,
+                        )
+                    )
+                    session.commit()
+                    if failed.rowcount == 1:
+                        self._discard_payload(candidate)
+                    continue
+
+                claimed = session.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == candidate.id, self._claimable(now))
+                    .values(
+                        status=JOB_RUNNING,
+                        worker_id=self.worker_id,
+                        attempts=AnalysisJob.attempts + 1,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        started_at=now,
+                    )
+                )
+                session.commit()
+                if claimed.rowcount == 1:
+                    job = session.get(AnalysisJob, candidate.id)
+                    session.expunge(job)
+                    return job
+                # Another worker won the race; look for the next job.
+            return None
+        finally:
+            session.close()
+
+    def _renew_lease(self, job_id: str) -> bool:
+        session = self.session_factory()
+        try:
+            renewed = session.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id, AnalysisJob.worker_id == self.worker_id)
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+            )
+            session.commit()
+            return renewed.rowcount == 1
+        finally:
+            session.close()
+
+    def _finish(self, job: AnalysisJob, **values) -> None:
+        session = self.session_factory()
+        try:
+            session.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job.id, AnalysisJob.worker_id == self.worker_id)
+                .values(lease_expires_at=None, **values)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def execute(self, job: AnalysisJob) -> None:
+        """Run the analysis pipeline for a claimed job and record the outcome."""
+        from ..api.routes import ANALYSIS_VERSION, UnreadableDocumentError, _ensure_report, _extract_text, _run_pipeline
+        from .result_cache import get_result_cache
+
+        timer = StageTimer()
+        if job.created_at and job.started_at:
+            timer.record("queue_wait", (job.started_at - job.created_at).total_seconds())
+
+        stop_heartbeat = threading.Event()
+
+        def heartbeat() -> None:
+            while not stop_heartbeat.wait(self.lease_seconds / 3):
+                try:
+                    if not self._renew_lease(job.id):
+                        return
+                except Exception as e:
+                    logger.warning(f"Lease renewal failed for job {job.id}: {e}")
+
+        beater = threading.Thread(target=heartbeat, name=f"job-lease-{job.id[:8]}", daemon=True)
+        beater.start()
+        try:
+            with timer.stage("total"), prometheus.ANALYSES_IN_PROGRESS.track(source="job"):
+                prometheus.UPLOAD_BYTES.observe(job.file_size)
+                upload = IngestedUpload(
+                    filename=job.filename,
+                    size=job.file_size,
+                    sha256=job.file_hash,
+                    path=Path(job.payload_path),
+                )
+                cache = get_result_cache(ANALYSIS_VERSION)
+                with timer.stage("cache_lookup"):
+                    result = cache.get(job.file_hash) or cache.get_persistent(job.file_hash)
+                if result is not None:
+                    # The sweeper may have evicted the stored report; it comes back under this upload's name.
+                    result = result.model_copy(update={"filename": job.filename})
+                    timer.merge(_ensure_report(result))
+                    cache.record_hit(job.file_hash, job.file_size, result)
+                else:
+                    output = _run_pipeline(job.filename, _extract_text(upload))
+                    timer.merge(output.timings)
+                    prometheus.TEXT_CHARS.observe(output.text_chars)
+                    result = output.result
+                    with timer.stage("cache_store"):
+                        cache.put(job.file_hash, job.file_size, result)
+        except UnreadableDocumentError as e:
+            self._finish(job, status=JOB_FAILED, error=str(e), stage_timings=timer.timings, finished_at=datetime.utcnow())
+            self._discard_payload(job)
+            return
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed on attempt {job.attempts}")
+            final = job.attempts >= job.max_attempts
+            self._finish(
+                job,
+                status=JOB_FAILED if final else JOB_QUEUED,
+                error=f"Analysis failed: {e}",
+                stage_timings=timer.timings,
+                finished_at=datetime.utcnow() if final else None,
+            )
+            if final:
+                self._discard_payload(job)
+            return
+        finally:
+            stop_heartbeat.set()
+
+        get_metrics().observe_stages(timer.timings)
+        prometheus.observe_stages(timer.timings)
+        self._finish(
+            job,
+            status=JOB_SUCCEEDED,
+            result=result.model_dump(mode="json"),
+            error=None,
+            stage_timings=timer.timings,
+            finished_at=datetime.utcnow(),
+        )
+        self._discard_payload(job)
+
+    @staticmethod
+    def _discard_payload(job: AnalysisJob) -> None:
+        try:
+            os.unlink(job.payload_path)
+        except FileNotFoundError:
+            pass
+
+    def run_once(self) -> bool:
+        """Claim and execute a single job. Returns False if the queue was empty."""
+        job = self.claim()
+        if job is None:
+            return False
+        self.execute(job)
+        return True
+
+    def run_forever(self, stop: threading.Event) -> None:
+        """Poll until ``stop`` (a threading or multiprocessing Event) is set."""
+        logger.info(f"Job worker {self.worker_id} started")
+        while not stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Job worker {self.worker_id} error: {e}")
+            stop.wait(settings.JOB_POLL_INTERVAL_SECONDS)
+        logger.info(f"Job worker {self.worker_id} stopped")
+
+
+def _worker_main(stop) -> None:
+    from ..core.logging_config import configure_logging
+
+    configure_logging(settings.LOG_LEVEL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent coordinates shutdown through `stop`
+    _run_standalone(stop)
+
+
+def _run_standalone(stop) -> None:
+    # Outside the API process nothing else flushes this process's buffered results and metrics.
+    metrics = get_metrics()
+    metrics.start()
+    try:
+        JobWorker().run_forever(stop)
+    finally:
+        close_result_writer()
+        metrics.stop()
+        prometheus.mark_process_dead()
+
+
+class JobWorkerPool:
+    """Local job workers started and stopped with the API process.
+
+    Workers are separate processes, except with an in-memory SQLite database,
+    which other processes cannot see; there they fall back to daemon threads.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._stop = None
+        self._members: List[Union[threading.Thread, BaseProcess]] = []
+
+    def start(self) -> None:
+        if self.workers <= 0:
+            return
+        if settings.database_url == "sqlite:///:memory:":
+            logger.warning("In-memory SQLite database: running job workers as threads")
+            self._stop = threading.Event()
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=JobWorker().run_forever, args=(self._stop,), name=f"job-worker-{index}", daemon=True
+                )
+                thread.start()
+                self._members.append(thread)
+            return
+
+        context = multiprocessing.get_context("spawn")
+        self._stop = context.Event()
+        for index in range(self.workers):
+            process = context.Process(target=_worker_main, args=(self._stop,), name=f"job-worker-{index}", daemon=True)
+            process.start()
+            self._members.append(process)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self._stop is None:
+            return
+        self._stop.set()
+        for member in self._members:
+            member.join(timeout)
+            if isinstance(member, BaseProcess) and member.is_alive():
+                member.terminate()
+        self._members = []
+        self._stop = None
+
+
+if __name__ == "__main__":
+    from ..core.logging_config import configure_logging
+
+    configure_logging(settings.LOG_LEVEL)
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        _run_standalone(stop_event)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,379 @@
+"""
+Aggregated request and pipeline metrics.
+
+``SystemMetrics`` is not written per event; at our request rate that would
+double the write load. ``MetricsAggregator`` keeps one histogram per metric for
+the current interval (METRICS_INTERVAL_SECONDS) and a background thread
+writes one row per metric per interval in a single bulk INSERT:
+
+* ``api_call``: latency of each endpoint, named "METHOD /route/{template}";
+* ``error``: responses with status >= 400, named "METHOD /route STATUS" (no latency);
+* ``performance``: analysis pipeline stages, named by stage.
+
+Rows hold the number of events in ``value`` and the histogram in ``details``.
+Histograms have fixed log-spaced buckets (each about 9% wider than the last),
+so the rows of any time window merge by adding bucket counts, and percentiles
+of the merged histogram are within half a bucket (about 4.5%) of the exact
+ones. ``summarize`` does that for the query endpoint.
+"""
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..core.config import settings
+from ..models.database import SystemMetrics
+from . import prometheus
+
+logger = logging.getLogger(__name__)
+
+API_CALL = "api_call"
+ERROR = "error"
+PERFORMANCE = "performance"
+
+BUCKETS_PER_DOUBLING = 8
+MIN_MILLISECONDS = 0.01  # bucket 0 holds everything faster
+PERCENTILES = (50, 90, 95, 99)
+MAX_UNSAVED_INTERVALS = 1440  # kept for retry while the database is down; older ones are dropped
+
+
+def bucket_of(milliseconds: float) -> int:
+    if milliseconds <= MIN_MILLISECONDS:
+        return 0
+    return int(math.log2(milliseconds / MIN_MILLISECONDS) * BUCKETS_PER_DOUBLING) + 1
+
+
+def bucket_bounds(index: int) -> Tuple[float, float]:
+    if index == 0:
+        return 0.0, MIN_MILLISECONDS
+    return (
+        MIN_MILLISECONDS * 2 ** ((index - 1) / BUCKETS_PER_DOUBLING),
+        MIN_MILLISECONDS * 2 ** (index / BUCKETS_PER_DOUBLING),
+    )
+
+
+class Histogram:
+    """Event count, sum, max and log-bucketed latencies of one metric."""
+
+    __slots__ = ("count", "total", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def observe(self, milliseconds: float) -> None:
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.maximum:
+            self.maximum = milliseconds
+        index = bucket_of(milliseconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, details: dict) -> None:
+        self.count += details["count"]
+        self.total += details["sum_ms"]
+        self.maximum = max(self.maximum, details["max_ms"])
+        for index, count in details["buckets"].items():
+            self.buckets[int(index)] = self.buckets.get(int(index), 0) + count
+
+    def to_details(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.total, 3),
+            "max_ms": round(self.maximum, 3),
+            "buckets": {str(index): count for index, count in sorted(self.buckets.items())},
+        }
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Interpolated within the bucket holding the q-th percentile event; never above the maximum."""
+        observed = sum(self.buckets.values())
+        if not observed:
+            return None
+        rank = q / 100 * observed
+        seen = 0
+        for index in sorted(self.buckets):
+            count = self.buckets[index]
+            if seen + count >= rank:
+                low, high = bucket_bounds(index)
+                return round(min(low + (high - low) * (rank - seen) / count, self.maximum), 3)
+            seen += count
+        return round(self.maximum, 3)
+
+    def summary(self) -> dict:
+        observed = sum(self.buckets.values())  # error counters have a count but no latencies
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / observed, 3) if observed else None,
+            "max_ms": round(self.maximum, 3),
+            **{f"p{q}_ms": self.percentile(q) for q in PERCENTILES},
+        }
+
+
+def _default_session_factory():
+    from ..core.database import get_session_factory
+
+    return get_session_factory()()
+
+
+class MetricsAggregator:
+    """Per-interval histograms of every metric, flushed to ``system_metrics`` as one row per metric."""
+
+    def __init__(
+        self,
+        interval_seconds: Optional[float] = None,
+        session_factory: Callable = _default_session_factory,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.interval = interval_seconds or settings.METRICS_INTERVAL_SECONDS
+        self.session_factory = session_factory
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._interval_start = self._start_of(clock())
+        self._current: Dict[Tuple[str, str], Histogram] = {}
+        self._unsaved: List[Tuple[float, Dict[Tuple[str, str], Histogram]]] = []  # closed intervals, oldest first
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.events = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def _start_of(self, now: float) -> float:
+        return now - now % self.interval
+
+    def _roll(self, now: float) -> None:
+        # Under the lock. Closes the current interval once the clock has left it.
+        start = self._start_of(now)
+        if start != self._interval_start:
+            if self._current:
+                self._unsaved.append((self._interval_start, self._current))
+            self._interval_start, self._current = start, {}
+
+    def observe(self, metric_type: str, name: str, milliseconds: float) -> None:
+        with self._lock:
+            self._roll(self.clock())
+            histogram = self._current.get((metric_type, name))
+            if histogram is None:
+                histogram = self._current[(metric_type, name)] = Histogram()
+            histogram.observe(milliseconds)
+            self.events += 1
+
+    def increment(self, metric_type: str, name: str) -> None:
+        """Count an event without a latency (errors)."""
+        with self._lock:
+            self._roll(self.clock())
+            histogram = self._current.get((metric_type, name))
+            if histogram is None:
+                histogram = self._current[(metric_type, name)] = Histogram()
+            histogram.count += 1
+            self.events += 1
+
+    def observe_stages(self, timings: Dict[str, float]) -> None:
+        """Record a pipeline run's ``{stage: milliseconds}``."""
+        for stage, milliseconds in timings.items():
+            self.observe(PERFORMANCE, stage, milliseconds)
+
+    def flush(self, force: bool = False) -> int:
+        """Write every closed interval (and with ``force`` the current one) in one INSERT. Returns rows written."""
+        with self._lock:
+            self._roll(self.clock())
+            if force and self._current:
+                self._unsaved.append((self._interval_start, self._current))
+                self._current = {}
+            intervals, self._unsaved = self._unsaved, []
+        if not intervals:
+            return 0
+
+        rows = [
+            {
+                "metric_type": metric_type,
+                "name": name,
+                "value": histogram.count,
+                "details": {"interval_seconds": self.interval, **histogram.to_details()},
+                "recorded_at": datetime.fromtimestamp(start, timezone.utc).replace(tzinfo=None),
+            }
+            for start, histograms in intervals
+            for (metric_type, name), histogram in histograms.items()
+        ]
+        session = self.session_factory()
+        try:
+            session.bulk_insert_mappings(SystemMetrics, rows)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            with self._lock:
+                self._unsaved[:0] = intervals  # retried with the next flush
+                del self._unsaved[:-MAX_UNSAVED_INTERVALS]
+                self.failures += 1
+            logger.warning(f"Writing {len(rows)} metric rows failed: {e}")
+            return 0
+        finally:
+            session.close()
+        with self._lock:
+            self.rows_written += len(rows)
+            self.flushes += 1
+        return len(rows)
+
+    def current(self) -> Tuple[datetime, Dict[Tuple[str, str], dict]]:
+        """Start and histograms (as stored) of the intervals not written yet."""
+        with self._lock:
+            self._roll(self.clock())
+            pending = [*self._unsaved, (self._interval_start, self._current)]
+            oldest = pending[0][0]
+            merged: Dict[Tuple[str, str], dict] = {}
+            for _, histograms in pending:
+                for key, histogram in histograms.items():
+                    combined = Histogram()
+                    if key in merged:
+                        combined.merge(merged[key])
+                    combined.merge(histogram.to_details())
+                    merged[key] = combined.to_details()
+        return datetime.fromtimestamp(oldest, timezone.utc).replace(tzinfo=None), merged
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval - self.clock() % self.interval + 0.01):
+            self.flush()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and write everything, the current partial interval included."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush(force=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "interval_seconds": self.interval,
+                "events": self.events,
+                "live_metrics": len(self._current),
+                "unsaved_intervals": len(self._unsaved),
+                "rows_written": self.rows_written,
+                "flushes": self.flushes,
+                "failures": self.failures,
+            }
+
+
+def summarize(
+    since: datetime,
+    until: datetime,
+    metric_type: Optional[str] = None,
+    name: Optional[str] = None,
+    aggregator: Optional["MetricsAggregator"] = None,
+    session_factory: Callable = _default_session_factory,
+) -> List[dict]:
+    """Count, mean, max and percentiles per metric over the intervals starting in [since, until). Blocking.
+
+    ``aggregator``'s intervals that are not written yet are included when the window reaches them.
+    """
+    merged: Dict[Tuple[str, str], Histogram] = {}
+
+    def add(key: Tuple[str, str], details: dict) -> None:
+        histogram = merged.get(key)
+        if histogram is None:
+            histogram = merged[key] = Histogram()
+        histogram.merge(details)
+
+    session = session_factory()
+    try:
+        query = session.query(SystemMetrics.metric_type, SystemMetrics.name, SystemMetrics.details).filter(
+            SystemMetrics.recorded_at >= since, SystemMetrics.recorded_at < until, SystemMetrics.name.isnot(None)
+        )
+        if metric_type is not None:
+            query = query.filter(SystemMetrics.metric_type == metric_type)
+        if name is not None:
+            query = query.filter(SystemMetrics.name == name)
+        for row_type, row_name, details in query:
+            add((row_type, row_name), details)
+    finally:
+        session.close()
+
+    if aggregator is not None:
+        oldest, pending = aggregator.current()
+        if oldest < until:
+            for key, details in pending.items():
+                if (metric_type is None or key[0] == metric_type) and (name is None or key[1] == name):
+                    add(key, details)
+
+    return [
+        {"metric_type": key[0], "name": key[1], **histogram.summary()}
+        for key, histogram in sorted(merged.items(), key=lambda item: (item[0][0], -item[1].count, item[0][1]))
+    ]
+
+
+class MetricsMiddleware:
+    """Records every HTTP request's latency (until its last body chunk is sent) and status.
+
+    Into the aggregated system_metrics rows and into the Prometheus counters of GET /metrics.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Optional[Callable[[], MetricsAggregator]] = None):
+        self.app = app
+        self.metrics = metrics or get_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status = 500
+        prometheus.HTTP_IN_PROGRESS.inc()
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            method, route = scope["method"], _route_name(scope, root_path)
+            name = f"{method} {route}"
+            metrics = self.metrics()
+            metrics.observe(API_CALL, name, elapsed)
+            if status >= 400:
+                metrics.increment(ERROR, f"{name} {status}")
+            prometheus.HTTP_IN_PROGRESS.dec()
+            prometheus.HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+            prometheus.HTTP_DURATION.observe(elapsed / 1000, method=method, route=route)
+
+
+def _route_name(scope: Scope, root_path: str) -> str:
+    # Route templates, not paths: /api/jobs/{job_id} is one metric however many jobs there are.
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path_format", None) or route.path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path) :] + "/*"  # a Mount such as /files
+    return "unmatched"
+
+
+_aggregator: Optional[MetricsAggregator] = None
+_aggregator_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsAggregator:
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = MetricsAggregator()
+    return _aggregator
@@ -0,0 +1,338 @@
+"""
+Near-duplicate plagiarism screen: MinHash signatures of word-shingled corpus
+paragraphs, bucketed with LSH banding.
+
+``MINHASH_INDEX_DIR`` is a segmented root (see ``index_segments``) created by
+``scripts/build_minhash_index.py`` and grown by ``scripts/update_plagiarism_index.py``.
+Each segment is a directory:
+
+* ``manifest.json``      - bands, rows, shingle size, hash seed and counts
+* ``signatures.npy``     - ``(paragraphs, bands * rows)`` uint32 MinHash signatures
+* ``band_keys.npy``      - ``(bands, paragraphs)`` uint64 bucket keys, sorted per band
+* ``band_rows.npy``      - ``(bands, paragraphs)`` uint32 paragraph row of each sorted key
+* ``paragraph_docs.npy`` - ``(paragraphs,)`` uint32 corpus document of each paragraph
+* ``metadata.jsonl`` + ``metadata.offsets.npy`` - title/URL per document
+
+A query paragraph only meets corpus paragraphs that share a bucket in at least
+one band: a binary search per band instead of a pass over the corpus. Two
+paragraphs with Jaccard similarity ``s`` collide with probability
+``1 - (1 - s**rows) ** bands``; candidates are then scored by the fraction of
+agreeing signature slots, an unbiased estimate of ``s``. The arrays are loaded
+memory-mapped, so analysis workers share them through the page cache.
+"""
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..core.config import settings
+from .artifacts import ProcessWide, publish_directory
+from .corpus_metadata import MetadataReader, MetadataWriter
+from .index_segments import SEGMENTS_FILE, SegmentedIndex, best_hits
+from .text_profile import WORD_PATTERN, normalize_paragraph
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+SIGNATURES_FILE = "signatures.npy"
+BAND_KEYS_FILE = "band_keys.npy"
+BAND_ROWS_FILE = "band_rows.npy"
+PARAGRAPH_DOCS_FILE = "paragraph_docs.npy"
+HASH_SEED = 1
+# Universal hashing modulo a Mersenne prime: (a * x + b) stays below 2**64 for x, a, b < 2**31.
+MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+SHINGLE_MULTIPLIER = np.uint64(1_000_003)
+BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+@dataclass(frozen=True)
+class MinHashParams:
+    bands: int
+    rows: int
+    shingle_words: int
+    seed: int = HASH_SEED
+
+    @property
+    def num_perm(self) -> int:
+        return self.bands * self.rows
+
+    @property
+    def threshold(self) -> float:
+        """Jaccard similarity at which a pair collides in some band about half the time."""
+        return (1.0 / self.bands) ** (1.0 / self.rows)
+
+    @classmethod
+    def from_settings(cls) -> "MinHashParams":
+        return cls(settings.MINHASH_BANDS, settings.MINHASH_ROWS, settings.MINHASH_SHINGLE_WORDS)
+
+
+@dataclass(frozen=True)
+class NearDuplicateHit:
+    doc_id: int
+    similarity: float  # estimated Jaccard similarity of the closest paragraph pair
+    title: str
+    url: str
+
+
+class MinHasher:
+    """Signatures and band keys for a fixed set of parameters."""
+
+    def __init__(self, params: MinHashParams):
+        self.params = params
+        rng = np.random.default_rng(params.seed)
+        self._a = rng.integers(1, int(MERSENNE_PRIME), size=(params.num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, int(MERSENNE_PRIME), size=(params.num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, paragraph: str) -> np.ndarray:
+        """Distinct hashes of the paragraph's ``shingle_words``-word windows (one window if it is shorter)."""
+        words = WORD_PATTERN.findall(normalize_paragraph(paragraph))
+        if not words:
+            return np.zeros(0, dtype=np.uint64)
+        ids = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in words), dtype=np.uint64, count=len(words))
+        width = min(self.params.shingle_words, len(words))
+        windows = len(words) - width + 1
+        hashes = np.zeros(windows, dtype=np.uint64)
+        for offset in range(width):
+            hashes = hashes * SHINGLE_MULTIPLIER + ids[offset : offset + windows]
+        return np.unique(hashes % MERSENNE_PRIME)
+
+    def signatures(self, paragraphs: Sequence[str]) -> np.ndarray:
+        """``(len(paragraphs), num_perm)`` uint32 signatures; paragraphs without words get all-max rows."""
+        out = np.full((len(paragraphs), self.params.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        for row, paragraph in enumerate(paragraphs):
+            shingles = self.shingles(paragraph)
+            if shingles.size:
+                out[row] = ((self._a * shingles + self._b) % MERSENNE_PRIME).min(axis=1)
+        return out
+
+    def band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """``(len(signatures), bands)`` uint64 bucket keys, one per band of ``rows`` slots."""
+        grouped = signatures.reshape(len(signatures), self.params.bands, self.params.rows).astype(np.uint64)
+        keys = np.zeros(grouped.shape[:2], dtype=np.uint64)
+        for row in range(self.params.rows):
+            keys = keys * BAND_MULTIPLIER + grouped[:, :, row]
+        return keys
+
+
+def corpus_paragraphs(abstract: str) -> List[str]:
+    """Normalized paragraphs of a corpus abstract (blank-line separated)."""
+    paragraphs = (normalize_paragraph(part) for part in abstract.split("\n\n"))
+    return [paragraph for paragraph in dict.fromkeys(paragraphs) if WORD_PATTERN.search(paragraph)]
+
+
+def write_index(
+    directory: Union[str, Path], documents: Iterable[Tuple[dict, np.ndarray]], params: MinHashParams
+) -> dict:
+    """Write ``(metadata record, paragraph signatures)`` pairs as an index directory.
+
+    ``directory`` (a new segment) must not exist yet. The index is assembled
+    next to it and renamed into place, so it never holds a half-written index.
+    """
+    hasher = MinHasher(params)
+    with publish_directory(directory, versioned=False) as staging:
+        signature_blocks: List[np.ndarray] = []
+        paragraph_docs: List[int] = []
+        with MetadataWriter(staging) as metadata:
+            for record, signatures in documents:
+                doc_id = metadata.append(record)
+                signature_blocks.append(signatures)
+                paragraph_docs.extend([doc_id] * len(signatures))
+            document_count = len(metadata)
+
+        signatures = (
+            np.concatenate(signature_blocks) if signature_blocks else np.zeros((0, params.num_perm), dtype=np.uint32)
+        )
+        del signature_blocks
+        keys = hasher.band_keys(signatures).T
+        order = np.argsort(keys, axis=1, kind="stable")
+        np.save(staging / SIGNATURES_FILE, signatures)
+        np.save(staging / BAND_KEYS_FILE, np.ascontiguousarray(np.take_along_axis(keys, order, axis=1)))
+        np.save(staging / BAND_ROWS_FILE, order.astype(np.uint32))
+        np.save(staging / PARAGRAPH_DOCS_FILE, np.asarray(paragraph_docs, dtype=np.uint32))
+
+        manifest = {
+            "format": INDEX_FORMAT,
+            "bands": params.bands,
+            "rows": params.rows,
+            "shingle_words": params.shingle_words,
+            "seed": params.seed,
+            "paragraphs": len(signatures),
+            "documents": document_count,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def build_index(records: Iterable[dict], directory: Union[str, Path], params: Optional[MinHashParams] = None) -> dict:
+    """Shingle and MinHash every corpus abstract paragraph and write the index directory."""
+    params = params or MinHashParams.from_settings()
+    hasher = MinHasher(params)
+
+    def documents() -> Iterator[Tuple[dict, np.ndarray]]:
+        for record in records:
+            paragraphs = corpus_paragraphs(str(record.get("abstract") or ""))
+            if paragraphs:
+                yield record, hasher.signatures(paragraphs)
+
+    return write_index(directory, documents(), params)
+
+
+def merge_segments(sources: List[Tuple[Path, np.ndarray]], target: Path) -> int:
+    """Compaction: copy the live documents of ``sources`` into one new segment, without re-hashing."""
+    indexes = [MinHashIndex(path) for path, _ in sources]
+    params = {index.params for index in indexes}
+    if len(params) > 1:
+        raise ValueError(f"Cannot merge MinHash segments built with different parameters: {params}")
+
+    def documents() -> Iterator[Tuple[dict, np.ndarray]]:
+        for index, (_, deleted) in zip(indexes, sources):
+            bounds = np.searchsorted(index._paragraph_docs, np.arange(index.documents + 1))
+            for doc_id in np.setdiff1d(np.arange(index.documents), deleted).tolist():
+                yield index._metadata[doc_id], np.asarray(index._signatures[bounds[doc_id] : bounds[doc_id + 1]])
+
+    try:
+        return write_index(target, documents(), params.pop() if params else MinHashParams.from_settings())["documents"]
+    finally:
+        for index in indexes:
+            index.close()
+
+
+class MinHashIndex:
+    """A loaded, read-only index directory."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if self.manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported MinHash index format {self.manifest.get('format')}")
+        self.params = MinHashParams(
+            self.manifest["bands"], self.manifest["rows"], self.manifest["shingle_words"], self.manifest["seed"]
+        )
+        self.hasher = MinHasher(self.params)
+        self._signatures = np.load(self.directory / SIGNATURES_FILE, mmap_mode="r")
+        self._band_keys = np.load(self.directory / BAND_KEYS_FILE, mmap_mode="r")
+        self._band_rows = np.load(self.directory / BAND_ROWS_FILE, mmap_mode="r")
+        self._paragraph_docs = np.load(self.directory / PARAGRAPH_DOCS_FILE, mmap_mode="r")
+        self._metadata = MetadataReader(self.directory)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @property
+    def documents(self) -> int:
+        return len(self._metadata)
+
+    def candidates(self, signatures: np.ndarray) -> np.ndarray:
+        """Distinct ``(query row, corpus paragraph row)`` pairs sharing a bucket in at least one band."""
+        if not len(self) or not len(signatures):
+            return np.zeros((0, 2), dtype=np.int64)
+        query_keys = self.hasher.band_keys(signatures)
+        pairs = []
+        for band in range(self.params.bands):
+            keys = self._band_keys[band]
+            lo = np.searchsorted(keys, query_keys[:, band], side="left")
+            hi = np.searchsorted(keys, query_keys[:, band], side="right")
+            for query in np.flatnonzero(hi > lo):
+                rows = np.asarray(self._band_rows[band, lo[query] : hi[query]], dtype=np.int64)
+                pairs.append(np.column_stack([np.full(len(rows), query, dtype=np.int64), rows]))
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(pairs), axis=0)
+
+    def query(
+        self, paragraphs: Sequence[str], min_similarity: float, top_k: int, deleted: Optional[np.ndarray] = None
+    ) -> List[NearDuplicateHit]:
+        """Corpus documents with a paragraph near-duplicating any of ``paragraphs``, best first."""
+        paragraphs = [paragraph for paragraph in paragraphs if WORD_PATTERN.search(paragraph)]
+        return self.query_signatures(self.hasher.signatures(paragraphs), min_similarity, top_k, deleted)
+
+    def query_signatures(
+        self, signatures: np.ndarray, min_similarity: float, top_k: int, deleted: Optional[np.ndarray] = None
+    ) -> List[NearDuplicateHit]:
+        """``query`` for signatures computed with this index's ``hasher``, skipping ``deleted`` documents."""
+        pairs = self.candidates(signatures)
+        if not len(pairs):
+            return []
+        agreement = (signatures[pairs[:, 0]] == self._signatures[pairs[:, 1]]).mean(axis=1)
+        best = {}
+        docs = np.asarray(self._paragraph_docs[pairs[:, 1]])
+        if deleted is not None and len(deleted):
+            live = ~np.isin(docs, deleted)
+            agreement, docs = agreement[live], docs[live]
+        for similarity, doc_id in zip(agreement.tolist(), docs.tolist()):
+            if similarity >= min_similarity and similarity > best.get(doc_id, -1.0):
+                best[doc_id] = similarity
+        hits = []
+        for doc_id, similarity in sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_k]:
+            metadata = self._metadata[doc_id]
+            hits.append(
+                NearDuplicateHit(doc_id=doc_id, similarity=similarity, title=metadata["title"], url=metadata["url"])
+            )
+        return hits
+
+    def close(self) -> None:
+        self._metadata.close()
+
+
+def open_segment(directory: Path) -> MinHashIndex:
+    index = MinHashIndex(directory)
+    if index.params != MinHashParams.from_settings():
+        logger.warning(
+            f"MinHash segment {directory} was built with {index.params}; "
+            f"settings ask for {MinHashParams.from_settings()} (the segment's own parameters are used)"
+        )
+    return index
+
+
+def _open_index(directory: Optional[Union[str, Path]]) -> Optional[SegmentedIndex[MinHashIndex]]:
+    directory = Path(directory or settings.MINHASH_INDEX_DIR)
+    if not ((directory / SEGMENTS_FILE).is_file() or (directory / MANIFEST_FILE).is_file()):
+        return None
+    return SegmentedIndex(directory, open_segment)
+
+
+_index: ProcessWide[SegmentedIndex[MinHashIndex]] = ProcessWide(_open_index, "MinHash index")
+
+
+def load_minhash_index(directory: Optional[Union[str, Path]] = None) -> Optional[SegmentedIndex[MinHashIndex]]:
+    """Open the configured index and make it the process-wide one. None if there is no index."""
+    return _index.load(directory)
+
+
+def get_minhash_index() -> Optional[SegmentedIndex[MinHashIndex]]:
+    """The process-wide index; the first call in each analysis worker loads it."""
+    return _index.get()
+
+
+def configure_minhash_index(index: Optional[SegmentedIndex[MinHashIndex]]) -> None:
+    """Replace the process-wide index (used by tests and benchmarks)."""
+    _index.configure(index)
+
+
+def find_near_duplicates(
+    paragraphs: Sequence[str], top_k: Optional[int] = None, min_similarity: Optional[float] = None
+) -> List[NearDuplicateHit]:
+    """Corpus documents near-duplicating any of ``paragraphs``; empty without an index."""
+    index = get_minhash_index()
+    paragraphs = [paragraph for paragraph in paragraphs if WORD_PATTERN.search(paragraph)]
+    if index is None or not paragraphs:
+        return []
+    top_k = top_k or settings.PLAGIARISM_TOP_K
+    min_similarity = settings.MINHASH_MIN_JACCARD if min_similarity is None else min_similarity
+    signatures: Dict[MinHashParams, np.ndarray] = {}
+    hit_lists = []
+    for segment in index.snapshot().segments:
+        params = segment.index.params
+        if params not in signatures:
+            signatures[params] = segment.index.hasher.signatures(paragraphs)
+        hit_lists.append(
+            segment.index.query_signatures(signatures[params], min_similarity, top_k, segment.deleted)
+        )
+    return best_hits(hit_lists, top_k)
@@ -0,0 +1,67 @@
+"""
+PDF text extraction with PyMuPDF.
+
+Pages are read one at a time from the spooled file (or the in-memory/shared
+upload bytes) and fed straight into ``TextProfile.from_pages``, so a 300-page
+thesis is never materialised as one string. This bounds extraction only: the
+profile itself keeps every word and paragraph, so peak memory still grows with
+the document (about as much as profiling the joined text would). Each page's
+text blocks are joined with blank lines so the paragraph splitter sees the
+layout's paragraphs.
+
+For large documents the API splits the page range with ``page_ranges`` and
+profiles each slice in a separate analysis worker; the slices are combined
+with ``TextProfile.combine``.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+import fitz
+
+from .executor import TextRef
+from .text_profile import PAGE_SEPARATOR, TextProfile, UnreadableDocumentError
+
+PDF_FORMAT = "pdf"
+_TEXT_BLOCK = 0
+
+
+def open_pdf(text_ref: TextRef) -> fitz.Document:
+    try:
+        if text_ref.path is not None:
+            return fitz.open(text_ref.path, filetype=PDF_FORMAT)
+        return fitz.open(stream=text_ref.read_bytes(), filetype=PDF_FORMAT)
+    except Exception as e:  # MuPDF raises several unrelated exception types for malformed files
+        raise UnreadableDocumentError(f"Could not read PDF: {e}") from None
+
+
+def count_pages(text_ref: TextRef) -> int:
+    with open_pdf(text_ref) as document:
+        return document.page_count
+
+
+def page_text(page: fitz.Page) -> str:
+    blocks = page.get_text("blocks", sort=True)
+    return PAGE_SEPARATOR.join(block[4].strip() for block in blocks if block[6] == _TEXT_BLOCK)
+
+
+def iter_page_texts(text_ref: TextRef, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of pages ``start``..``stop`` (exclusive), one page at a time."""
+    with open_pdf(text_ref) as document:
+        if document.needs_pass:
+            raise UnreadableDocumentError("PDF is password protected")
+        stop = document.page_count if stop is None else min(stop, document.page_count)
+        for number in range(start, stop):
+            yield page_text(document.load_page(number))
+
+
+def profile_pages(text_ref: TextRef, start: int = 0, stop: Optional[int] = None) -> TextProfile:
+    """Profile a page range. Executes inside an analysis worker."""
+    return TextProfile.from_pages(iter_page_texts(text_ref, start, stop))
+
+
+def page_ranges(page_count: int, workers: int, min_pages: int) -> List[Tuple[int, int]]:
+    """Split ``page_count`` pages into at most ``workers`` contiguous slices of at least ``min_pages``."""
+    if page_count <= 0:
+        return [(0, 0)]
+    slices = max(1, min(workers, page_count // max(min_pages, 1)))
+    bounds = [page_count * index // slices for index in range(slices + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
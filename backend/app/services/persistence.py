@@ -0,0 +1,484 @@
+"""
+Write-behind persistence of analysis results.
+
+Finished analyses used to be upserted into ``analysis_results`` before the
+response went out, costing a SELECT, an INSERT or UPDATE and a COMMIT round
+trip per request, and ``analysis_history`` was never written. ``ResultWriter``
+takes that off the request path. ``submit`` appends to an in-memory buffer, and
+a background thread writes the buffer in one transaction per batch: one SELECT
+for the rows the batch already has, bulk INSERTs for the rest and the history
+rows, one COMMIT. A batch goes out once ``PERSIST_BATCH_SIZE`` writes are
+buffered or the oldest has waited ``PERSIST_FLUSH_INTERVAL_MS``. Writes that
+are not flushed yet stay visible through ``pending_result``, so the result
+cache reads its own writes. Failed batches are retried. The lifespan flushes
+what is left at shutdown.
+
+A batch that fails is retried. After ``PERSIST_MAX_ATTEMPTS`` failures that
+are not connection errors, its writes go out one at a time. Any that still
+fail (a constraint violation, a value the database cannot store) are
+appended to ``PERSIST_DEAD_LETTER_PATH`` with the error and logged, so one
+bad record cannot hold up the queue. Connection errors are retried for as
+long as the database is down; if that lasts past ``PERSIST_MAX_PENDING``
+buffered writes, the oldest are moved to the dead-letter file as well.
+
+With ``PERSIST_JOURNAL_DIR`` set, every write is also appended to a journal
+segment before ``submit`` returns. Segments are deleted once everything in
+them is committed, and those left behind by a crash are replayed on the next
+start. Replays are at-least-once: the results upsert idempotently, but a crash
+between COMMIT and segment deletion repeats that batch's history rows.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, TextIO, Union
+
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+
+from ..core.config import settings
+from ..models.database import AnalysisHistory, credibility_band
+from ..models.database import AnalysisResult as AnalysisResultRecord
+from ..models.schemas import AnalysisResult, PlagiarismMatch
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "pending-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+@dataclass
+class PendingWrite:
+    file_hash: str
+    file_size: int
+    version: str
+    filename: str  # as uploaded this time; a cache hit may serve another upload's result
+    result: AnalysisResult
+    store_result: bool  # False for cache hits: the row exists, only the history entry is new
+    recorded_at: float
+
+    def to_json(self) -> str:
+        payload = asdict(self)
+        payload["result"] = self.result.model_dump(mode="json")
+        return json.dumps(payload)
+
+    @classmethod
+    def from_json(cls, line: str) -> "PendingWrite":
+        payload = json.loads(line)
+        payload["result"] = AnalysisResult(**payload["result"])
+        return cls(**payload)
+
+
+def apply_schema(record: AnalysisResultRecord, result: AnalysisResult, file_size: int, version: str) -> None:
+    record.filename = result.filename[:255]
+    record.file_size = file_size
+    record.analysis_version = version
+    record.plagiarism_score = int(result.plagiarism_score)
+    record.plagiarism_summary = result.plagiarism_summary
+    record.plagiarism_matches = [match.model_dump() for match in result.plagiarism_matches]
+    record.ai_probability = result.ai_probability
+    record.ai_confidence = result.ai_confidence
+    record.citation_validity_score = int(result.citation_validity_score)
+    record.citation_summary = result.citation_summary
+    record.citation_details = {
+        "invalid_dois": result.citation_invalid_dois,
+        "missing_dois": result.citation_missing_dois,
+        "year_mismatches": result.citation_year_mismatches,
+    }
+    record.statistical_risk_score = int(result.statistical_risk_score)
+    record.statistical_summary = result.statistical_summary
+    record.overall_research_credibility = int(result.overall_research_credibility)
+    record.explanations = result.explanations
+    record.suspicious_paragraphs = result.suspicious_paragraphs
+    record.report_path = result.report_path
+    record.report_generated = bool(result.report_path)
+    if result.analyzed_at:
+        analyzed_at = datetime.fromisoformat(result.analyzed_at)
+        if analyzed_at.tzinfo is not None:
+            analyzed_at = analyzed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        record.analyzed_at = analyzed_at
+
+
+def record_to_schema(record: AnalysisResultRecord) -> AnalysisResult:
+    details = record.citation_details or {}
+    return AnalysisResult(
+        filename=record.filename,
+        analyzed_at=record.analyzed_at.replace(tzinfo=timezone.utc).isoformat() if record.analyzed_at else None,
+        overall_research_credibility=record.overall_research_credibility,
+        plagiarism_score=record.plagiarism_score,
+        plagiarism_summary=record.plagiarism_summary,
+        plagiarism_matches=[PlagiarismMatch(**match) for match in record.plagiarism_matches or []],
+        ai_probability=record.ai_probability,
+        ai_confidence=record.ai_confidence,
+        citation_validity_score=record.citation_validity_score,
+        citation_summary=record.citation_summary,
+        citation_invalid_dois=details.get("invalid_dois", []),
+        citation_missing_dois=details.get("missing_dois", []),
+        citation_year_mismatches=details.get("year_mismatches", []),
+        statistical_risk_score=record.statistical_risk_score,
+        statistical_summary=record.statistical_summary,
+        suspicious_paragraphs=record.suspicious_paragraphs or [],
+        explanations=record.explanations or [],
+        report_path=record.report_path or "",
+    )
+
+
+def write_batch(session_factory: Callable, writes: List[PendingWrite]) -> None:
+    """Upsert the batch's results and insert its history rows in one transaction."""
+    session = session_factory()
+    try:
+        hashes = list(dict.fromkeys(write.file_hash for write in writes))
+        records: Dict[str, AnalysisResultRecord] = {
+            record.file_hash: record
+            for record in session.query(AnalysisResultRecord).filter(AnalysisResultRecord.file_hash.in_(hashes))
+        }
+        for write in writes:  # in submission order, so the latest result for a hash wins
+            if not write.store_result:
+                continue
+            record = records.get(write.file_hash)
+            if record is None:
+                record = records[write.file_hash] = AnalysisResultRecord(file_hash=write.file_hash)
+                session.add(record)
+            apply_schema(record, write.result, write.file_size, write.version)
+        session.flush()  # one multi-row INSERT per table, assigns the new result ids
+        session.add_all(
+            AnalysisHistory(
+                result_id=records[write.file_hash].id,
+                filename=write.filename[:255],
+                credibility_score=int(write.result.overall_research_credibility),
+                credibility_band=credibility_band(write.result.overall_research_credibility),
+                analyzed_at=datetime.fromtimestamp(write.recorded_at, timezone.utc).replace(tzinfo=None),
+            )
+            for write in writes
+            if write.file_hash in records
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def _default_session_factory():
+    from ..core.database import get_session_factory
+
+    return get_session_factory()()
+
+
+class ResultWriter:
+    """Buffers result writes in memory and flushes them to the database in batches from a background thread."""
+
+    def __init__(
+        self,
+        session_factory: Callable = _default_session_factory,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        journal_dir: Optional[Union[str, Path]] = None,
+        retry_seconds: float = 1.0,
+        max_attempts: Optional[int] = None,
+        dead_letter_path: Optional[Union[str, Path]] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size or settings.PERSIST_BATCH_SIZE)
+        interval = settings.PERSIST_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms
+        self.flush_interval = interval / 1000
+        self.max_pending = max_pending or settings.PERSIST_MAX_PENDING
+        self.retry_seconds = retry_seconds
+        self.journal_dir = Path(journal_dir) if journal_dir else None
+        self.max_attempts = max(1, max_attempts or settings.PERSIST_MAX_ATTEMPTS)
+        self.dead_letter_path = Path(dead_letter_path or settings.PERSIST_DEAD_LETTER_PATH)
+
+        self._pending: Deque[PendingWrite] = deque()
+        self._by_hash: Dict[str, PendingWrite] = {}  # latest unflushed result per (version, hash)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._stop = False
+        self._flushing = 0  # callers blocked in flush(): partial batches go out at once
+        self._thread: Optional[threading.Thread] = None
+        self._journal: Optional[TextIO] = None
+        self._segment = 0
+
+        self.submitted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.replayed = 0
+        self.last_batch_ms = 0.0
+
+    # -- producer side -------------------------------------------------
+
+    def submit(
+        self, file_hash: str, file_size: int, version: str, result: AnalysisResult, store_result: bool = True
+    ) -> None:
+        """Queue a result (or, with ``store_result=False``, only its history entry). Never touches the database."""
+        write = PendingWrite(
+            file_hash=file_hash,
+            file_size=file_size,
+            version=version,
+            filename=result.filename,
+            result=result,
+            store_result=store_result,
+            recorded_at=time.time(),
+        )
+        self.start()
+        with self._condition:
+            if self._journal is not None:
+                self._journal.write(write.to_json() + "\n")
+                self._journal.flush()  # in the OS page cache: survives a process crash
+            self._append(write)
+            self.submitted += 1
+            self._condition.notify()
+
+    def _append(self, write: PendingWrite) -> None:
+        if len(self._pending) >= self.max_pending:
+            # The database has been unreachable for a while. The journal segment holding the oldest write is
+            # deleted once the buffer drains, so it is kept in the dead-letter file instead.
+            dropped = self._pending.popleft()
+            self._forget(dropped)
+            self._dead_letter(dropped, f"more than {self.max_pending} writes pending")
+            self.dropped += 1
+        self._pending.append(write)
+        if write.store_result:
+            self._by_hash[f"{write.version}:{write.file_hash}"] = write
+
+    def _forget(self, write: PendingWrite) -> None:
+        key = f"{write.version}:{write.file_hash}"
+        if self._by_hash.get(key) is write:
+            del self._by_hash[key]
+
+    def pending_result(self, file_hash: str, version: str) -> Optional[AnalysisResult]:
+        """The latest result submitted for ``file_hash`` that is not committed yet."""
+        with self._condition:
+            write = self._by_hash.get(f"{version}:{file_hash}")
+            return write.result if write is not None else None
+
+    # -- flusher side --------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stop = False
+            if self.journal_dir is not None:
+                self._open_journal()
+            self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+            self._thread.start()
+
+    def _segments(self) -> List[Path]:
+        return sorted(
+            self.journal_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"),
+            key=lambda path: int(path.name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]),
+        )
+
+    def _open_journal(self) -> None:
+        # Segments left by a previous process are replayed before anything new is accepted.
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        segments = self._segments()
+        for segment in segments:
+            for line in segment.read_text(encoding="utf-8").splitlines():
+                try:
+                    self._append(PendingWrite.from_json(line))
+                    self.replayed += 1
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Skipping unreadable journal entry in {segment.name}: {e}")
+        if segments:
+            self._segment = int(segments[-1].name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            logger.info(f"Replaying {self.replayed} unflushed result write(s) from {self.journal_dir}")
+        self._rotate()  # the replayed segments are closed already
+
+    def _rotate(self) -> tuple:
+        """Start a new journal segment; returns the number and handle of the closed one (still to be synced)."""
+        closed, handle = self._segment, self._journal
+        self._segment += 1
+        path = self.journal_dir / f"{SEGMENT_PREFIX}{self._segment}{SEGMENT_SUFFIX}"
+        self._journal = open(path, "a", encoding="utf-8")
+        return closed, handle
+
+    @staticmethod
+    def _seal(handle: Optional[TextIO]) -> None:
+        if handle is not None:
+            os.fsync(handle.fileno())
+            handle.close()
+
+    def _take(self) -> Optional[tuple]:
+        """Wait for a batch to be due; returns (writes, last closed journal segment) or None when stopped and drained."""
+        with self._condition:
+            while not self._pending and not self._stop:
+                self._condition.wait()
+            if not self._pending:
+                return None
+            deadline = self._pending[0].recorded_at + self.flush_interval
+            while len(self._pending) < self.batch_size and not self._stop and not self._flushing:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            writes = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._in_flight = len(writes)
+            closed = handle = None
+            if self._journal is not None and not self._pending:
+                # Segments up to this one hold nothing newer than this batch once the buffer is empty.
+                closed, handle = self._rotate()
+        self._seal(handle)  # fsync off the lock: submit() keeps appending to the new segment meanwhile
+        return writes, closed
+
+    def _run(self) -> None:
+        attempts = 0  # consecutive failures of the batch at the head of the buffer
+        while True:
+            taken = self._take()
+            if taken is None:
+                return
+            writes, closed = taken
+            started = time.perf_counter()
+            rejected: List[PendingWrite] = []
+            retry: List[PendingWrite] = []
+            failed = False
+            try:
+                write_batch(self.session_factory, writes)
+                committed = writes
+            except Exception as e:
+                failed = True
+                attempts += 1
+                if attempts < self.max_attempts or _is_connection_error(e):
+                    logger.error(f"Persisting {len(writes)} analysis result(s) failed, retrying: {e}")
+                    committed, retry = [], writes
+                else:
+                    logger.error(f"Persisting {len(writes)} analysis result(s) failed {attempts} times, writing them one by one: {e}")
+                    committed, rejected, retry = self._write_singly(writes)
+            if not retry:
+                attempts = 0
+
+            with self._condition:
+                for write in committed + rejected:
+                    self._forget(write)
+                self._pending.extendleft(reversed(retry))
+                self._in_flight = 0
+                self.failures += failed
+                self.dead_lettered += len(rejected)
+                if committed:
+                    self.flushed += len(committed)
+                    self.batches += 1
+                    self.last_batch_ms = round((time.perf_counter() - started) * 1000, 3)
+                self._condition.notify_all()
+                stopping = self._stop
+            if retry:
+                if stopping:
+                    return  # give up at shutdown; the journal (if any) still has them
+                time.sleep(self.retry_seconds)
+                continue
+            if closed is not None:
+                for segment in self._segments():
+                    if int(segment.name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)]) <= closed:
+                        segment.unlink(missing_ok=True)
+
+    def _write_singly(self, writes: List[PendingWrite]) -> tuple:
+        """Isolate the writes that fail a batch; returns (committed, dead-lettered, still to retry)."""
+        committed: List[PendingWrite] = []
+        rejected: List[PendingWrite] = []
+        for position, write in enumerate(writes):
+            try:
+                write_batch(self.session_factory, [write])
+            except Exception as e:
+                if _is_connection_error(e):
+                    return committed, rejected, writes[position:]
+                self._dead_letter(write, e)
+                rejected.append(write)
+            else:
+                committed.append(write)
+        return committed, rejected, []
+
+    def _dead_letter(self, write: PendingWrite, error: Union[Exception, str]) -> None:
+        logger.error(
+            f"Giving up on the analysis result for {write.file_hash} ({write.filename}); "
+            f"moved to {self.dead_letter_path}: {error}"
+        )
+        try:
+            payload = json.loads(write.to_json())
+        except (TypeError, ValueError):  # the value that broke the INSERT may not serialize either
+            payload = {"file_hash": write.file_hash, "version": write.version, "result": repr(write.result)}
+        self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"failed_at": time.time(), "error": str(error), "write": payload}) + "\n")
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything submitted so far is committed. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._pending or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._thread is None:
+                        return False
+                    self._condition.wait(min(remaining, 0.05))
+            finally:
+                self._flushing -= 1
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush what is buffered and stop the flusher (graceful shutdown)."""
+        with self._condition:
+            self._stop = True  # no more waiting for batches to fill
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._condition:
+            if self._pending:
+                logger.warning(f"{len(self._pending)} analysis result write(s) not persisted at shutdown")
+            handle, self._journal = self._journal, None
+        self._seal(handle)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "queue_depth": len(self._pending),
+                "in_flight": self._in_flight,
+                "submitted": self.submitted,
+                "flushed": self.flushed,
+                "batches": self.batches,
+                "mean_batch_size": round(self.flushed / self.batches, 2) if self.batches else 0.0,
+                "last_batch_ms": self.last_batch_ms,
+                "failures": self.failures,
+                "dropped": self.dropped,
+                "dead_lettered": self.dead_lettered,
+                "replayed": self.replayed,
+                "journal": str(self.journal_dir) if self.journal_dir else None,
+            }
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """The database is unreachable: nothing about the rows, so retrying them is right."""
+    return isinstance(error, (OperationalError, InterfaceError, DisconnectionError))
+
+
+_writer: Optional[ResultWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_result_writer() -> ResultWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ResultWriter(journal_dir=settings.PERSIST_JOURNAL_DIR or None)
+    return _writer
+
+
+def close_result_writer(timeout: float = 10.0) -> None:
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout)
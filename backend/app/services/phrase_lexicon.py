@@ -0,0 +1,144 @@
+"""
+Weighted phrase lexicon matched with an Aho-Corasick automaton.
+
+The automaton runs over the token stream ``TextProfile.words`` rather than raw
+characters: a Python loop per token is several times cheaper than one per
+character, and phrases are tokenized with the same ``WORD_PATTERN`` so
+"state-of-the-art" in the lexicon matches "state-of-the-art" and "state of the
+art" in a document alike. One pass finds every hit, including overlapping
+ones, however many phrases the lexicon holds.
+
+The lexicon is a tab-separated ``phrase<TAB>weight`` file (``#`` starts a
+comment) located by ``AI_LEXICON_PATH``; ``get_phrase_matcher`` builds the
+automaton once per process.
+"""
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from ..core.config import settings
+from .text_profile import WORD_PATTERN
+
+
+@dataclass(frozen=True)
+class PhraseHit:
+    phrase: str
+    weight: float
+    start: int  # index of the first matching token
+    end: int  # index one past the last matching token
+
+
+def tokenize_phrase(phrase: str) -> Tuple[str, ...]:
+    return tuple(WORD_PATTERN.findall(phrase.lower()))
+
+
+def load_lexicon(path: Union[str, Path]) -> List[Tuple[str, float]]:
+    """Read ``phrase<TAB>weight`` lines. A missing weight defaults to 1.0."""
+    entries: List[Tuple[str, float]] = []
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            phrase, _, weight = line.partition("\t")
+            try:
+                entries.append((phrase.strip(), float(weight) if weight.strip() else 1.0))
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: invalid weight '{weight.strip()}'") from None
+    return entries
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens."""
+
+    def __init__(self, entries: Iterable[Tuple[str, float]]):
+        self.phrases: List[str] = []
+        self.weights: List[float] = []
+        self._lengths: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+        seen: Dict[Tuple[str, ...], str] = {}
+
+        for phrase, weight in entries:
+            tokens = tokenize_phrase(phrase)
+            if not tokens:
+                raise ValueError(f"Lexicon phrase '{phrase}' contains no words")
+            if tokens in seen:
+                raise ValueError(f"Lexicon phrase '{phrase}' duplicates '{seen[tokens]}'")
+            seen[tokens] = phrase
+
+            state = 0
+            for token in tokens:
+                next_state = self._goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][token] = next_state
+                    self._goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(len(self.phrases))
+            self.phrases.append(phrase)
+            self.weights.append(float(weight))
+            self._lengths.append(len(tokens))
+
+        # Breadth-first failure links; each state's outputs absorb those of its failure state.
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for token, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                outputs[child].extend(outputs[self._fail[child]])
+
+        self._outputs: List[Tuple[int, ...]] = [tuple(indices) for indices in outputs]
+        self._state_weights = [sum(self.weights[index] for index in indices) for indices in outputs]
+        self._vocabulary = frozenset(token for transitions in self._goto for token in transitions)
+        self.digest = hashlib.sha256(
+            "\n".join(f"{' '.join(tokens)}\t{weight!r}" for tokens, weight in zip(seen, self.weights)).encode("utf-8")
+        ).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    def _states(self, tokens: Sequence[str]):
+        goto, fail, vocabulary = self._goto, self._fail, self._vocabulary
+        state = 0
+        for index, token in enumerate(tokens):
+            if token not in vocabulary:
+                state = 0
+                continue
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            yield index, state
+
+    def find_all(self, tokens: Sequence[str]) -> List[PhraseHit]:
+        """Every phrase occurrence, overlapping ones included, ordered by end position."""
+        hits: List[PhraseHit] = []
+        for index, state in self._states(tokens):
+            for phrase_index in self._outputs[state]:
+                hits.append(
+                    PhraseHit(
+                        phrase=self.phrases[phrase_index],
+                        weight=self.weights[phrase_index],
+                        start=index + 1 - self._lengths[phrase_index],
+                        end=index + 1,
+                    )
+                )
+        return hits
+
+    def score(self, tokens: Sequence[str]) -> float:
+        """Sum of the weights of all hits, without materialising them."""
+        state_weights = self._state_weights
+        return sum(state_weights[state] for _, state in self._states(tokens))
+
+
+@lru_cache(maxsize=1)
+def get_phrase_matcher() -> PhraseMatcher:
+    return PhraseMatcher(load_lexicon(settings.AI_LEXICON_PATH))
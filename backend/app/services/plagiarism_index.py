@@ -0,0 +1,350 @@
+"""
+Semantic plagiarism index: corpus abstracts embedded with SBERT and searched
+by cosine similarity.
+
+``PLAGIARISM_INDEX_DIR`` is a segmented root (see ``index_segments``) created by
+``scripts/build_plagiarism_index.py`` and grown by ``scripts/update_plagiarism_index.py``.
+Each segment is a directory:
+
+* ``manifest.json`` - kind, vector count, dimension and the encoder model name
+* ``vectors.f32``   - row-major float32 unit vectors (searched directly when ``kind == "flat"``,
+  the input of compaction otherwise)
+* ``index.faiss``   - ``kind == "ivf"``: a FAISS ``IndexIVFFlat`` (inner product)
+* ``metadata.jsonl`` + ``metadata.offsets.npy`` - title/URL per vector, addressed by offset
+
+Everything is opened memory-mapped, so the API workers on a host share one copy
+of the index in the page cache instead of each reading it into private memory.
+Exact ("flat") search multiplies the mapped matrix block by block with numpy,
+which gives the same results as a FAISS ``IndexFlatIP`` (those cannot be
+memory-mapped by faiss-cpu 1.8). Corpora of ``PLAGIARISM_IVF_MIN_VECTORS`` or
+more use an IVF index whose inverted lists FAISS maps with ``IO_FLAG_MMAP``.
+"""
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..core.config import settings
+from .artifacts import ProcessWide, publish_directory
+from .corpus_metadata import MetadataReader, MetadataWriter
+from .embeddings import Encoder, get_encoder
+from .index_segments import SEGMENTS_FILE, SegmentedIndex, best_hits
+from .text_profile import normalize_paragraph
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.f32"
+FAISS_FILE = "index.faiss"
+FLAT_BLOCK_ROWS = 65536
+
+
+@dataclass(frozen=True)
+class IndexHit:
+    doc_id: int
+    similarity: float  # cosine similarity of the closest query paragraph
+    title: str
+    url: str
+
+
+def iter_corpus(path: Union[str, Path]) -> Iterator[dict]:
+    """Yield ``{"title", "abstract", "url"}`` records from a JSON-lines corpus, skipping blank abstracts."""
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if str(record.get("abstract") or "").strip():
+                yield record
+
+
+def _batched(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_index(
+    directory: Union[str, Path],
+    batches: Iterable[Tuple[np.ndarray, Sequence[dict]]],
+    model_name: str,
+    kind: str = "auto",
+) -> dict:
+    """Write ``(unit vectors, metadata records)`` batches as an index directory.
+
+    ``directory`` (a new segment) must not exist yet. The index is assembled
+    next to it and renamed into place, so it never holds a half-written index.
+    """
+    with publish_directory(directory, versioned=False) as staging:
+        count = 0
+        dimension = 0
+        with open(staging / VECTORS_FILE, "wb") as vectors_file, MetadataWriter(staging) as metadata:
+            for vectors, records in batches:
+                vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+                if len(vectors) != len(records):
+                    raise ValueError("Each batch needs one metadata record per vector")
+                if dimension and vectors.shape[1] != dimension:
+                    raise ValueError(f"Vector dimension changed from {dimension} to {vectors.shape[1]}")
+                dimension = vectors.shape[1]
+                vectors_file.write(vectors.tobytes())
+                for record in records:
+                    metadata.append(record)
+                count += len(vectors)
+
+        if kind == "auto":
+            kind = "ivf" if count >= settings.PLAGIARISM_IVF_MIN_VECTORS else "flat"
+        manifest = {
+            "format": INDEX_FORMAT,
+            "kind": kind,
+            "count": count,
+            "dimension": dimension,
+            "model": model_name,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if kind == "ivf":
+            manifest["nlist"] = _write_ivf(staging, count, dimension)
+        elif kind != "flat":
+            raise ValueError(f"Unknown index kind '{kind}'")
+
+        (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _write_ivf(directory: Path, count: int, dimension: int) -> int:
+    import faiss
+
+    vectors = np.memmap(directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=(count, dimension))
+    nlist = max(1, min(int(4 * np.sqrt(count)), count // 39))
+    quantizer = faiss.IndexFlatIP(dimension)
+    index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+    sample = np.random.default_rng(0).choice(count, size=min(count, nlist * 256), replace=False)
+    index.train(np.ascontiguousarray(vectors[np.sort(sample)]))
+    for start in range(0, count, FLAT_BLOCK_ROWS):
+        index.add(np.ascontiguousarray(vectors[start : start + FLAT_BLOCK_ROWS]))
+    faiss.write_index(index, str(directory / FAISS_FILE))
+    return nlist
+
+
+def build_index(
+    records: Iterable[dict],
+    encoder: Encoder,
+    directory: Union[str, Path],
+    kind: str = "auto",
+    batch_size: int = 256,
+) -> dict:
+    """Embed corpus abstracts with ``encoder`` and write them as an index directory."""
+
+    def batches() -> Iterator[Tuple[np.ndarray, List[dict]]]:
+        for batch in _batched(records, batch_size):
+            yield encoder.encode([normalize_paragraph(record["abstract"]) for record in batch]), batch
+
+    return write_index(directory, batches(), encoder.model_name, kind)
+
+
+def _flat_search(
+    matrix: np.ndarray, queries: np.ndarray, k: int, deleted: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    for start in range(0, len(matrix), FLAT_BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + FLAT_BLOCK_ROWS])
+        scores = queries @ block.T
+        if deleted is not None and len(deleted):
+            hidden = deleted[(deleted >= start) & (deleted < start + len(block))] - start
+            scores[:, hidden] = -np.inf
+        keep = min(k, block.shape[0])
+        candidates = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        merged_scores = np.concatenate([best_scores, np.take_along_axis(scores, candidates, axis=1)], axis=1)
+        merged_ids = np.concatenate([best_ids, candidates + start], axis=1)
+        order = np.argsort(-merged_scores, axis=1, kind="stable")[:, :k]
+        best_scores = np.take_along_axis(merged_scores, order, axis=1)
+        best_ids = np.take_along_axis(merged_ids, order, axis=1)
+    return best_scores, best_ids
+
+
+class PlagiarismIndex:
+    """A loaded, read-only index directory."""
+
+    def __init__(self, directory: Union[str, Path], nprobe: Optional[int] = None):
+        self.directory = Path(directory)
+        self.manifest = json.loads((self.directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if self.manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported plagiarism index format {self.manifest.get('format')}")
+        self.kind: str = self.manifest["kind"]
+        self.model_name: str = self.manifest["model"]
+        self.dimension: int = self.manifest["dimension"]
+        self._count: int = self.manifest["count"]
+
+        self._vectors = None
+        self._faiss_index = None
+        if self.kind == "flat" and not self._count:
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        elif self.kind == "flat":
+            self._vectors = np.memmap(
+                self.directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=(self._count, self.dimension)
+            )
+        else:
+            import faiss
+
+            self._faiss_index = faiss.read_index(str(self.directory / FAISS_FILE), faiss.IO_FLAG_MMAP)
+            self._faiss_index.nprobe = nprobe or settings.PLAGIARISM_IVF_NPROBE
+
+        self._metadata = MetadataReader(self.directory)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def documents(self) -> int:
+        return self._count
+
+    def search(
+        self, queries: np.ndarray, k: int, deleted: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-``k`` ``(similarities, ids)`` per query row, skipping ``deleted`` ids; missing neighbours have id -1."""
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        k = max(1, min(k, self._count))
+        if not self._count or not len(queries):
+            return np.zeros((len(queries), 0), dtype=np.float32), np.zeros((len(queries), 0), dtype=np.int64)
+        if self._faiss_index is not None:
+            if deleted is None or not len(deleted):
+                return self._faiss_index.search(queries, k)
+            import faiss
+
+            hidden = np.ascontiguousarray(deleted, dtype=np.int64)
+            selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(len(hidden), faiss.swig_ptr(hidden)))
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self._faiss_index.nprobe)
+            return self._faiss_index.search(queries, k, params=params)
+        return _flat_search(self._vectors, queries, k, deleted)
+
+    def metadata(self, doc_id: int) -> dict:
+        return self._metadata[doc_id]
+
+    def top_documents(
+        self, queries: np.ndarray, k: int, min_similarity: float, deleted: Optional[np.ndarray] = None
+    ) -> List[IndexHit]:
+        """Corpus documents closest to any query vector, best first."""
+        similarities, ids = self.search(queries, k, deleted)
+        best = {}
+        for similarity, doc_id in zip(similarities.ravel().tolist(), ids.ravel().tolist()):
+            if doc_id >= 0 and similarity >= min_similarity and similarity > best.get(doc_id, -1.0):
+                best[doc_id] = similarity
+        hits = []
+        for doc_id, similarity in sorted(best.items(), key=lambda item: item[1], reverse=True)[:k]:
+            metadata = self.metadata(doc_id)
+            hits.append(IndexHit(doc_id=doc_id, similarity=similarity, title=metadata["title"], url=metadata["url"]))
+        return hits
+
+    def close(self) -> None:
+        self._metadata.close()
+        self._vectors = None
+        self._faiss_index = None
+
+
+def merge_segments(sources: List[Tuple[Path, np.ndarray]], target: Path) -> int:
+    """Compaction: copy the live vectors and metadata of ``sources`` into one new segment."""
+    manifests = [json.loads((path / MANIFEST_FILE).read_text(encoding="utf-8")) for path, _ in sources]
+    models = {manifest["model"] for manifest in manifests}
+    if len(models) > 1:
+        raise ValueError(f"Cannot merge segments embedded with different models: {sorted(models)}")
+
+    def batches() -> Iterator[Tuple[np.ndarray, List[dict]]]:
+        for (path, deleted), manifest in zip(sources, manifests):
+            count, dimension = manifest["count"], manifest["dimension"]
+            if not count:
+                continue
+            vectors = np.memmap(path / VECTORS_FILE, dtype=np.float32, mode="r", shape=(count, dimension))
+            metadata = MetadataReader(path)
+            try:
+                for start in range(0, count, FLAT_BLOCK_ROWS):
+                    ids = np.arange(start, min(start + FLAT_BLOCK_ROWS, count))
+                    ids = ids[~np.isin(ids, deleted)]
+                    if len(ids):
+                        yield np.asarray(vectors[ids]), [metadata[int(doc_id)] for doc_id in ids]
+            finally:
+                metadata.close()
+
+    return write_index(target, batches(), models.pop() if models else settings.SBERT_MODEL)["count"]
+
+
+def open_segment(directory: Path) -> PlagiarismIndex:
+    index = PlagiarismIndex(directory)
+    if index.model_name != settings.SBERT_MODEL:
+        index.close()
+        raise ValueError(
+            f"Plagiarism index segment {directory} was built with {index.model_name}, "
+            f"but SBERT_MODEL is {settings.SBERT_MODEL}"
+        )
+    return index
+
+
+def _open_index(directory: Optional[Union[str, Path]]) -> Optional[SegmentedIndex[PlagiarismIndex]]:
+    directory = Path(directory or settings.PLAGIARISM_INDEX_DIR)
+    if not ((directory / SEGMENTS_FILE).is_file() or (directory / MANIFEST_FILE).is_file()):
+        return None
+    start = time.perf_counter()
+    try:
+        index = SegmentedIndex(directory, open_segment)
+    except ValueError as e:
+        logger.error(f"{e}; semantic search disabled")
+        return None
+    snapshot = index.snapshot()
+    logger.info(
+        f"Plagiarism index loaded: {snapshot.documents} documents in {len(snapshot.segments)} segment(s) "
+        f"in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return index
+
+
+_index: ProcessWide[SegmentedIndex[PlagiarismIndex]] = ProcessWide(_open_index, "plagiarism index")
+
+
+def load_plagiarism_index(
+    directory: Optional[Union[str, Path]] = None,
+) -> Optional[SegmentedIndex[PlagiarismIndex]]:
+    """Open the configured index and make it the process-wide one. None if there is no usable index."""
+    return _index.load(directory)
+
+
+def get_plagiarism_index() -> Optional[SegmentedIndex[PlagiarismIndex]]:
+    """The process-wide index; the first call loads it (job workers and tests skip the lifespan)."""
+    return _index.get()
+
+
+def configure_plagiarism_index(index: Optional[SegmentedIndex[PlagiarismIndex]]) -> None:
+    """Replace the process-wide index (used by tests and benchmarks)."""
+    _index.configure(index)
+
+
+def find_similar_sources(
+    paragraphs: Sequence[str], top_k: Optional[int] = None, min_similarity: Optional[float] = None
+) -> List[IndexHit]:
+    """Corpus documents semantically close to any of ``paragraphs``; empty without an index. Blocking."""
+    index = get_plagiarism_index()
+    if index is None or not paragraphs:
+        return []
+    try:
+        encoder = get_encoder()
+    except ImportError as e:
+        logger.error(f"Sentence encoder unavailable ({e}); semantic plagiarism search disabled")
+        configure_plagiarism_index(None)
+        return []
+    snapshot = index.snapshot()
+    queries = encoder.encode(paragraphs)
+    top_k = top_k or settings.PLAGIARISM_TOP_K
+    min_similarity = settings.PLAGIARISM_MIN_SIMILARITY if min_similarity is None else min_similarity
+    return best_hits(
+        (segment.index.top_documents(queries, top_k, min_similarity, segment.deleted) for segment in snapshot.segments),
+        top_k,
+    )
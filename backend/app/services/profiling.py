@@ -0,0 +1,136 @@
+"""
+Admin-only tracing and profiling of single analysis requests.
+
+A request carrying ``X-Admin-Token`` equal to PROFILING_ADMIN_TOKEN gets a
+``Server-Timing`` header with its stage durations. With ``X-Profile:
+cprofile`` or ``X-Profile: sample`` as well, the request bypasses the result
+cache and runs the whole pipeline in one thread of the API process (as job
+workers do) under the chosen profiler:
+
+* ``cprofile``: a deterministic profile, saved as ``.pstats`` (``python -m
+  pstats``, snakeviz);
+* ``sample``: a stack sample every PROFILING_SAMPLE_INTERVAL_MS, saved as
+  folded stacks (``flamegraph.pl``, speedscope). It distorts timings far less
+  than cProfile.
+
+Dumps are kept in PROFILES_DIR (the newest PROFILES_MAX_FILES) and served by
+``GET /api/profiles/{name}``. Without a configured token nothing here runs.
+"""
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..core.config import settings
+from .timing import StageTimer
+
+CPROFILE = "cprofile"
+SAMPLE = "sample"
+PROFILERS = {CPROFILE: ".pstats", SAMPLE: ".folded"}
+
+_ARTIFACT_NAME = re.compile(r"^\d{20}-[0-9a-f]{12}\.(pstats|folded)$")
+
+
+@dataclass
+class RequestTrace:
+    """Stage timings of one admin request, and the profile it asked for."""
+
+    timer: StageTimer = field(default_factory=StageTimer)
+    profiler: Optional[str] = None
+    artifact: Optional[str] = None  # name of the saved profile
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{stage};dur={milliseconds:.1f}" for stage, milliseconds in self.timer.timings.items())
+
+
+def enabled() -> bool:
+    return bool(settings.PROFILING_ADMIN_TOKEN)
+
+
+def authorized(token: Optional[str]) -> bool:
+    return enabled() and token is not None and hmac.compare_digest(token.encode(), settings.PROFILING_ADMIN_TOKEN.encode())
+
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id: int, interval_seconds: float):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def run_profiled(profiler: str, fn: Callable[..., Any], *args: Any) -> Tuple[Any, str]:
+    """Call ``fn(*args)`` under ``profiler``; returns its result and the saved profile's name."""
+    directory = Path(settings.PROFILES_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d%H%M%S', time.gmtime(now))}{int(now % 1 * 1e6):06d}"
+    name = f"{stamp}-{uuid.uuid4().hex[:12]}{PROFILERS[profiler]}"
+
+    if profiler == CPROFILE:
+        profile = cProfile.Profile()
+        try:
+            result = profile.runcall(fn, *args)
+        finally:
+            profile.dump_stats(str(directory / name))
+    else:
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        sampler.start()
+        try:
+            result = fn(*args)
+        finally:
+            sampler.stop()
+            (directory / name).write_text(sampler.folded(), encoding="utf-8")
+    _prune(directory)
+    return result, name
+
+
+def _prune(directory: Path) -> None:
+    profiles = sorted(
+        (path for path in directory.iterdir() if _ARTIFACT_NAME.match(path.name)),
+        key=lambda path: path.name,  # names start with their UTC timestamp (microseconds)
+    )
+    for path in profiles[: max(0, len(profiles) - settings.PROFILES_MAX_FILES)]:
+        path.unlink(missing_ok=True)
+
+
+def artifact_path(name: str) -> Optional[Path]:
+    """The saved profile ``name``, if it exists (names are validated; no path traversal)."""
+    if not _ARTIFACT_NAME.match(name):
+        return None
+    path = Path(settings.PROFILES_DIR) / name
+    return path if path.is_file() else None
@@ -0,0 +1,358 @@
+"""
+Prometheus exposition of request, pipeline-stage, size and memory metrics.
+
+Every process that records (each uvicorn worker, each job worker) keeps its
+values in memory-mapped files of its own under METRICS_MULTIPROC_DIR:
+``values_<pid>.db`` for counters and histograms, ``live_<pid>.db`` for gauges.
+Recording is a dict lookup and an in-place add of a float in the mapping, a
+fraction of a microsecond, with no locks shared between processes and no
+syscalls. ``GET /metrics``, whichever worker serves it, reads every file in
+the directory and sums them, so counts are correct however many workers run.
+Counters and histograms of exited processes keep counting. Gauges only count
+for processes that are still alive. RSS is read from ``/proc`` for each live
+process at scrape time.
+
+The layout follows prometheus_client's multiprocess mode: a used-bytes header,
+then entries of (key length, JSON key, float64 value), 8-byte aligned, so
+readers never see a torn value. Clear the directory when deploying, as with
+prometheus_client. Stale counts only add a constant, which ``rate()`` ignores.
+"""
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..core.config import settings
+
+INITIAL_FILE_BYTES = 64 * 1024
+HEADER = struct.Struct("<I4x")  # bytes used, padding
+LENGTH = struct.Struct("<I")
+VALUE = struct.Struct("=d")  # native order: written through a memoryview
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class ValueFile:
+    """Append-only mmap'd map of JSON keys to float64 values, written by one process, read by any."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < INITIAL_FILE_BYTES:
+            self._file.truncate(INITIAL_FILE_BYTES)
+            size = INITIAL_FILE_BYTES
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._values = memoryview(self._map).cast("d")  # entries are 8-byte aligned
+        self._used = HEADER.unpack_from(self._map, 0)[0] or HEADER.size
+        self._index = {key: offset // VALUE.size for key, _, offset in _entries(self._map, self._used)}
+
+    def index(self, key: str) -> int:
+        """Position of ``key``'s value among the file's float64 slots, appending the key if it is new."""
+        index = self._index.get(key)
+        if index is None:
+            encoded = key.encode()
+            padded = LENGTH.size + len(encoded) + (-(LENGTH.size + len(encoded)) % 8)
+            needed = self._used + padded + VALUE.size
+            if needed > len(self._map):
+                size = len(self._map)
+                while size < needed:
+                    size *= 2
+                self._values.release()
+                self._file.truncate(size)
+                self._map.resize(size)
+                self._values = memoryview(self._map).cast("d")
+            LENGTH.pack_into(self._map, self._used, len(encoded))
+            self._map[self._used + LENGTH.size : self._used + LENGTH.size + len(encoded)] = encoded
+            index = (self._used + padded) // VALUE.size
+            self._values[index] = 0.0
+            self._used = needed
+            HEADER.pack_into(self._map, 0, self._used)  # published last: readers never see a half-written entry
+            self._index[key] = index
+        return index
+
+    def add(self, key: str, amount: float) -> None:
+        index = self._index.get(key)
+        if index is None:
+            index = self.index(key)  # may remap the file
+        self._values[index] += amount
+
+    def close(self) -> None:
+        self._values.release()
+        self._map.close()
+        self._file.close()
+
+
+def _entries(buffer, used: int) -> Iterator[Tuple[str, float, int]]:
+    position = HEADER.size
+    while position < used:
+        length = LENGTH.unpack_from(buffer, position)[0]
+        key = bytes(buffer[position + LENGTH.size : position + LENGTH.size + length]).decode()
+        position += LENGTH.size + length + (-(LENGTH.size + length) % 8)
+        yield key, VALUE.unpack_from(buffer, position)[0], position
+        position += VALUE.size
+
+
+def read_values(path: Path) -> Dict[str, float]:
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        return {}
+    return {key: value for key, value, _ in _entries(data, min(HEADER.unpack_from(data, 0)[0], len(data)))}
+
+
+class _ProcessFiles:
+    """This process's value files, opened on first use and again in each forked child."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # threadpool threads record concurrently
+        self._values: Optional[ValueFile] = None
+        self._live: Optional[ValueFile] = None
+        os.register_at_fork(after_in_child=self._forget)
+
+    def _forget(self) -> None:
+        self._lock = threading.Lock()
+        self._values = self._live = None  # the parent's files
+
+    def _open(self) -> None:
+        directory = Path(settings.METRICS_MULTIPROC_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        self._values = ValueFile(directory / f"values_{pid}.db")
+        self._live = ValueFile(directory / f"live_{pid}.db")
+
+    def add(self, key: str, amount: float, live: bool = False) -> None:
+        with self._lock:
+            if self._values is None:
+                self._open()
+            (self._live if live else self._values).add(key, amount)
+
+    def observe(self, bucket: str, total: str, count: str, value: float) -> None:
+        with self._lock:
+            if self._values is None:
+                self._open()
+            values = self._values
+            values.add(bucket, 1.0)
+            values.add(total, value)
+            values.add(count, 1.0)
+
+    def mark_dead(self) -> None:
+        """Drop this process's gauges (its counters stay)."""
+        with self._lock:
+            if self._live is not None:
+                self._live.close()
+                self._live.path.unlink(missing_ok=True)
+                self._values.close()
+                self._values = self._live = None
+
+
+_files = _ProcessFiles()
+
+
+def _key(name: str, labels: Sequence[Tuple[str, str]]) -> str:
+    return json.dumps([name, list(labels)], separators=(",", ":"))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys: Dict[tuple, object] = {}
+        REGISTRY.append(self)
+
+    def _labels(self, labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple((name, str(labels[name])) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        values = tuple(labels.values())
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys[values] = _key(self.name + "_total", self._labels(labels))
+        _files.add(key, amount)
+
+
+class Gauge(_Metric):
+    """Summed over live processes."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        values = tuple(labels.values())
+        key = self._keys.get(values)
+        if key is None:
+            key = self._keys[values] = _key(self.name, self._labels(labels))
+        _files.add(key, amount, live=True)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        values = tuple(labels.values())
+        keys = self._keys.get(values)
+        if keys is None:
+            base = self._labels(labels)
+            bounds = [*(_format(bound) for bound in self.buckets), "+Inf"]
+            keys = self._keys[values] = (
+                [_key(self.name + "_bucket", (*base, ("le", bound))) for bound in bounds],
+                _key(self.name + "_sum", base),
+                _key(self.name + "_count", base),
+            )
+        buckets, total, count = keys
+        # Files hold per-bucket counts; they are made cumulative when rendered.
+        _files.observe(buckets[bisect.bisect_left(self.buckets, value)], total, count, value)
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != int(value) else f"{int(value)}.0"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(name: str, labels: Sequence[Tuple[str, str]], value: float) -> str:
+    rendered = ",".join(f'{label}="{_escape(text)}"' for label, text in labels)
+    return f"{name}{{{rendered}}} {value!r}" if rendered else f"{name} {value!r}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    try:
+        return int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def collect(directory: Optional[Path] = None) -> Tuple[Dict[str, float], List[int]]:
+    """Values summed over every process's files, and the pids of live recording processes."""
+    directory = Path(directory or settings.METRICS_MULTIPROC_DIR)
+    totals: Dict[str, float] = {}
+    live: List[int] = []
+    for path in sorted(directory.glob("*.db")) if directory.is_dir() else []:
+        kind, _, pid = path.stem.partition("_")
+        if kind == "live":
+            if not pid.isdigit() or not _pid_alive(int(pid)):
+                continue
+            live.append(int(pid))
+        try:
+            values = read_values(path)
+        except OSError:
+            continue  # removed while listing
+        for key, value in values.items():
+            totals[key] = totals.get(key, 0.0) + value
+    return totals, live
+
+
+def render(directory: Optional[Path] = None) -> str:
+    """The text exposition format of every registered metric, plus process RSS."""
+    totals, live = collect(directory)
+    samples: Dict[str, List[Tuple[List[Tuple[str, str]], float]]] = {}
+    for key, value in totals.items():
+        name, labels = json.loads(key)
+        samples.setdefault(name, []).append(([tuple(label) for label in labels], value))
+
+    lines: List[str] = []
+    for metric in REGISTRY:
+        family = metric.name + "_total" if isinstance(metric, Counter) else metric.name
+        lines.append(f"# HELP {family} {metric.documentation}")
+        lines.append(f"# TYPE {family} {metric.kind}")
+        if isinstance(metric, Histogram):
+            series: Dict[tuple, Dict[str, float]] = {}
+            for labels, value in samples.get(metric.name + "_bucket", []):
+                series.setdefault(tuple(labels[:-1]), {})[labels[-1][1]] = value
+            order = [*(_format(bound) for bound in metric.buckets), "+Inf"]
+            sums = dict((tuple(labels), value) for labels, value in samples.get(metric.name + "_sum", []))
+            counts = dict((tuple(labels), value) for labels, value in samples.get(metric.name + "_count", []))
+            for base in sorted(series):
+                cumulative = 0.0
+                for bound in order:
+                    cumulative += series[base].get(bound, 0.0)
+                    lines.append(_sample(metric.name + "_bucket", [*base, ("le", bound)], cumulative))
+                lines.append(_sample(metric.name + "_sum", base, sums.get(base, 0.0)))
+                lines.append(_sample(metric.name + "_count", base, counts.get(base, 0.0)))
+        else:
+            for labels, value in sorted(samples.get(family, [])):
+                lines.append(_sample(family, labels, value))
+
+    lines.append("# HELP process_resident_memory_bytes Resident set size of each live API and job worker process.")
+    lines.append("# TYPE process_resident_memory_bytes gauge")
+    for pid in live:
+        rss = _rss_bytes(pid)
+        if rss is not None:
+            lines.append(_sample("process_resident_memory_bytes", [("pid", str(pid))], float(rss)))
+    return "\n".join(lines) + "\n"
+
+
+def mark_process_dead() -> None:
+    _files.mark_dead()
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+REGISTRY: List[_Metric] = []
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8)
+
+HTTP_REQUESTS = Counter("veripaper_http_requests", "HTTP requests by route template and status.", ("method", "route", "status"))
+HTTP_IN_PROGRESS = Gauge("veripaper_http_requests_in_progress", "HTTP requests being served.")
+HTTP_DURATION = Histogram(
+    "veripaper_http_request_duration_seconds", "HTTP request latency by route template.", LATENCY_BUCKETS, ("method", "route")
+)
+ANALYSES_IN_PROGRESS = Gauge("veripaper_analyses_in_progress", "Documents being analyzed, by entry point.", ("source",))
+STAGE_DURATION = Histogram(
+    "veripaper_stage_duration_seconds", "Analysis pipeline stage latency.", LATENCY_BUCKETS, ("stage",)
+)
+UPLOAD_BYTES = Histogram("veripaper_upload_size_bytes", "Size of analyzed uploads.", SIZE_BUCKETS)
+TEXT_CHARS = Histogram("veripaper_extracted_text_chars", "Characters of text extracted from analyzed documents.", SIZE_BUCKETS)
+
+
+def observe_stages(timings: Dict[str, float]) -> None:
+    """Record a pipeline run's ``{stage: milliseconds}``."""
+    for stage, milliseconds in timings.items():
+        STAGE_DURATION.observe(milliseconds / 1000, stage=stage)
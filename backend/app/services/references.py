@@ -0,0 +1,167 @@
+"""
+Reference-section detection and bibliography parsing.
+
+Citation checks used to treat every line mentioning "doi" or "http" as a
+reference and took years from the whole text, so dates, footnote URLs and
+DOIs in the body leaked into them. ``SECTION_HEADING`` finds the reference
+section (``TextProfile`` scans for it while profiling; the last one wins, so a
+table of contents does not count) and ``parse_references``
+turns the section into structured entries in one pass over its lines:
+
+* numbered bibliographies (``[12]``, ``12.``, ``12)``) start an entry at each
+  marker and fold wrapped lines into it;
+* bibliographies with a blank line between short entries are split on those;
+* otherwise (author-year lists from PDFs) an entry starts where the previous
+  line ended one and the next line starts like an author list or a DOI/URL.
+
+Fields come out of each entry with a handful of anchored searches. Entries
+are parsed through an LRU cache keyed by their text, so works that many papers
+cite and resubmitted papers are parsed once per process.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+DOI_PATTERN = re.compile(r"10\.\d{4,9}/[-._;()/:A-Za-z0-9]+")
+YEAR_PATTERN = re.compile(r"(?<!\w)((?:19|20)\d\d)\b")
+URL_PATTERN = re.compile(r"https?://[^\s<>\"]+")
+
+# Matches from the newline before a heading line; scan "\n" + text. A literal first character lets the
+# regex engine skip between newlines (about 2.5x faster than "^" with re.M on a 10MB text).
+SECTION_HEADING = re.compile(
+    r"\n[ \t]*(?:(?:\d{1,2}|[ivx]{1,4})[.)]?[ \t]+)?"
+    r"(?:(?P<bibliography>references(?: and notes)?|bibliography|works cited|literature cited|cited literature|reference list)"
+    r"[ \t]*:?"
+    r"|(?:appendix|appendices|supplementary (?:materials?|information)|acknowledge?ments?)\b[^\n]{0,80})"
+    r"[ \t\r]*$",
+    re.I | re.M,
+)
+ENTRY_MARKER = re.compile(r"^[ \t]*(?:\[\d{1,4}\]|\(\d{1,3}\)|\d{1,3}[.)])[ \t]+", re.M)  # not "2019. "
+AUTHOR_START = re.compile(
+    r"(?:(?:van|von|de|der|den|da|di|du|del|le|la)\s+)*[A-Z][\w'’\-]+"
+    r"(?:,\s*(?:[A-Z]\.|[A-Z][a-z]+)|\s+(?:[A-Z]\.\s*){1,3}[,.(]|\s+[A-Z]{1,3}[,.]|\s+et al\.|\s+(?:and|&)\s+[A-Z]|\s*\((?:19|20)\d\d)"
+)
+LOCATOR_START = re.compile(r"(?:https?://|doi|10\.\d{4,9}/)", re.I)
+LOCATOR_END = re.compile(r"(?:https?://\S+|10\.\d{4,9}/\S+)$")
+PAREN_YEAR = re.compile(r"\(((?:19|20)\d\d)[a-z]?[),]")
+QUOTED_TITLE = re.compile(r"[\"“]([^\"”]{3,}?)[,.]?[\"”]")
+SENTENCE_END = re.compile(r"[.?!](?:\s|$)")
+INITIAL_PERIOD = re.compile(r"(?<![A-Za-z])(?<![a-z] )[A-Z]\.\s")  # "J. Smith", not the "A." of "Doe A. Title"
+
+MAX_ENTRY_LINES_FOR_BLANK_SPLIT = 4
+ENTRY_CACHE_SIZE = 8192
+
+
+@dataclass(frozen=True)
+class Reference:
+    """One bibliography entry. Fields the entry does not state are empty / None."""
+
+    raw: str
+    authors: str = ""
+    year: Optional[int] = None
+    title: str = ""
+    doi: Optional[str] = None
+    url: Optional[str] = None
+
+
+def _blank(match: "re.Match[str]") -> str:
+    return " " * len(match.group(0))
+
+
+@lru_cache(maxsize=ENTRY_CACHE_SIZE)
+def parse_entry(raw: str) -> Reference:
+    """Split one entry's text (wrapped lines already joined) into its fields."""
+    text = ENTRY_MARKER.sub("", raw, count=1).strip()
+    doi_match = DOI_PATTERN.search(text)
+    url_match = URL_PATTERN.search(text)
+    # Years inside URLs and DOIs (10.1000/2019.123) are not publication years; blank them out in place.
+    masked = DOI_PATTERN.sub(_blank, URL_PATTERN.sub(_blank, text))
+
+    paren_year = PAREN_YEAR.search(masked)
+    year_match = paren_year or YEAR_PATTERN.search(masked)
+    quoted = QUOTED_TITLE.search(text)
+    if paren_year:
+        # Author-year styles: Smith, J. (2019). Title. Venue.
+        authors_end, title_start = paren_year.start(), paren_year.end()
+    elif masked[:1].isspace():
+        # The entry opens with its DOI or URL (blanked out above); no author list.
+        authors_end = title_start = 0
+    elif quoted:
+        # IEEE: A. Smith and B. Doe, "Title," in Venue, 2019.
+        authors_end = title_start = quoted.start()
+    else:
+        # Vancouver and friends: Smith J, Doe A. Title. Venue. 2019;12:1-10.
+        ends = (m.end() for m in SENTENCE_END.finditer(masked) if not INITIAL_PERIOD.match(masked, m.start() - 1))
+        authors_end = title_start = next(ends, 0)
+
+    if quoted:
+        title = quoted.group(1)
+    else:
+        rest = masked[title_start:]
+        stripped = rest.lstrip(" ).,:;")
+        start = title_start + len(rest) - len(stripped)
+        end = SENTENCE_END.search(stripped)
+        title = text[start : start + (end.start() if end else len(stripped))]
+
+    return Reference(
+        raw=raw,
+        authors=text[:authors_end].strip(" ,.(\t"),
+        year=int(year_match.group(1)) if year_match else None,
+        title=title.strip(),
+        doi=doi_match.group(0).rstrip(".,;") if doi_match else None,
+        url=url_match.group(0).rstrip(".,;") if url_match else None,
+    )
+
+
+def _join(pieces: List[str]) -> str:
+    # A line broken after "-" or "/" is usually a hyphenated word, DOI or URL that continues on the next line.
+    joined = pieces[0]
+    for piece in pieces[1:]:
+        joined += piece if joined.endswith(("-", "/")) else " " + piece
+    return joined
+
+
+def _ends_entry(line: str) -> bool:
+    return line.endswith((".", ")")) or LOCATOR_END.search(line) is not None
+
+
+def _starts_entry(line: str) -> bool:
+    return AUTHOR_START.match(line) is not None or LOCATOR_START.match(line) is not None
+
+
+def parse_references(section: str) -> List[Reference]:
+    """Entries of a reference section (the text after its heading)."""
+    lines = [line.strip() for line in section.splitlines()]
+    if len(ENTRY_MARKER.findall(section)) >= 2:
+        mode = "numbered"
+    else:
+        blocks = [block for block in "\n".join(lines).split("\n\n") if block.strip()]
+        multiline = any("\n" in block.strip() for block in blocks)
+        # PDF page breaks also leave blank lines, so only blocks of entry size count as entries.
+        short = len(lines) <= MAX_ENTRY_LINES_FOR_BLANK_SPLIT * len(blocks)
+        mode = "blank" if len(blocks) >= 2 and multiline and short else "lines"
+
+    entries: List[List[str]] = []
+    current: Optional[List[str]] = None
+    previous = ""
+    for line in lines:
+        if not line:
+            if mode == "blank":
+                current = None
+            continue
+        if line.isdigit():
+            continue  # page numbers
+        if mode == "numbered":
+            starts = ENTRY_MARKER.match(line) is not None
+        elif mode == "blank":
+            starts = current is None
+        else:
+            starts = current is None or (_ends_entry(previous) and _starts_entry(line))
+        if starts:
+            current = [line]
+            entries.append(current)
+        elif current is not None:
+            current.append(line)
+        previous = line
+    return [parse_entry(_join(pieces)) for pieces in entries]
@@ -0,0 +1,274 @@
+"""
+Content-addressed PDF report store, rendered off the request path.
+
+``/api/analyze`` used to render its reportlab PDF before answering, although
+most API clients never download it. The result now carries the report's
+``/files/...`` path right away and an analysis worker renders the PDF after
+the response. Until the PDF exists, a marker in ``REPORTS_DIR/.pending`` says
+it is on its way. Every API process sees the marker, and ``ReportFiles`` answers
+``GET /files/<name>`` with 202 and ``Retry-After`` meanwhile. The renderer
+writes to a temporary file and renames it into place, so a download never sees
+a partial PDF. It then removes the marker, also when rendering fails. A marker
+older than ``REPORT_RENDER_TIMEOUT_SECONDS`` belongs to a render that died and
+is ignored.
+
+Reports are named by a hash of the result they show, so identical results
+share one file and are rendered once. A report's mtime is its last use:
+``reuse`` and downloads reset it. ``ReportSweeper`` deletes reports unused for
+``REPORTS_MAX_AGE_SECONDS``, then the least recently used ones until the
+store fits in ``REPORTS_MAX_MB``. Every API process may run one, since
+concurrent sweeps only race to unlink the same files.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Optional, Set
+
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING_DIR = ".pending"
+REPORT_SUFFIX = ".pdf"
+
+_renders: Set["asyncio.Future[None]"] = set()
+
+
+def report_name(filename: str, content_hash: str) -> str:
+    """File name of the report showing a result with this hash; the upload's stem keeps downloads recognizable."""
+    safe_stem = re.sub(r"[^A-Za-z0-9_.-]", "_", Path(filename).stem)[:80] or "paper"
+    return f"{safe_stem}_{content_hash[:24]}{REPORT_SUFFIX}"
+
+
+def reuse(name: str) -> bool:
+    """Whether report ``name`` is stored (its last use is reset) or already being rendered."""
+    try:
+        os.utime(settings.REPORTS_DIR / name)
+        return True
+    except FileNotFoundError:
+        return is_pending(name)
+
+
+def _marker(name: str) -> Path:
+    return settings.REPORTS_DIR / PENDING_DIR / name
+
+
+def mark_pending(name: str) -> None:
+    marker = _marker(name)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.touch()
+
+
+def clear_pending(name: str) -> None:
+    _marker(name).unlink(missing_ok=True)
+
+
+def is_pending(name: str) -> bool:
+    if not name or "/" in name or name.startswith("."):
+        return False
+    try:
+        age = time.time() - _marker(name).stat().st_mtime
+    except OSError:
+        return False
+    return age < settings.REPORT_RENDER_TIMEOUT_SECONDS
+
+
+def staging_path(name: str) -> Path:
+    """Where to write ``name`` before ``publish`` renames it into REPORTS_DIR."""
+    path = settings.REPORTS_DIR / PENDING_DIR / f"{name}.{os.getpid()}.part"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def publish(name: str, staged: Path) -> None:
+    os.replace(staged, settings.REPORTS_DIR / name)
+
+
+def render_in_background(name: str, render: Awaitable[object]) -> None:
+    """Await ``render`` (which writes report ``name``) after the caller returns. Call from the event loop."""
+    mark_pending(name)
+    task = asyncio.ensure_future(_await_render(name, render))
+    _renders.add(task)
+    task.add_done_callback(_renders.discard)
+
+
+async def _await_render(name: str, render: Awaitable[object]) -> None:
+    try:
+        await render
+    except Exception:
+        logger.exception(f"Rendering report {name} failed")
+        clear_pending(name)
+
+
+async def wait_for_renders(timeout: float) -> None:
+    """Let scheduled renders finish (at shutdown, before the analysis workers go away)."""
+    if _renders:
+        await asyncio.wait(set(_renders), timeout=timeout)
+
+
+class ReportFiles(StaticFiles):
+    """Serves REPORTS_DIR; reports still being rendered answer 202 with ``Retry-After``."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.startswith(PENDING_DIR):
+            raise HTTPException(status_code=404)
+        try:
+            response = await super().get_response(path, scope)
+        except HTTPException as e:
+            if e.status_code == 404 and is_pending(path):
+                return JSONResponse(
+                    {"detail": "Report is being generated"},
+                    status_code=202,
+                    headers={"Retry-After": str(settings.REPORT_RETRY_AFTER_SECONDS)},
+                )
+            raise
+        if response.status_code == 200:
+            try:
+                os.utime(settings.REPORTS_DIR / path)  # a download is a use
+            except OSError:
+                pass
+        return response
+
+
+class ReportSweeper:
+    """Background thread enforcing the store's age and size limits, least recently used reports first."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+        interval: Optional[float] = None,
+    ):
+        self.directory = Path(directory or settings.REPORTS_DIR)
+        self.max_bytes = settings.REPORTS_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.max_age = settings.REPORTS_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+        self.interval = settings.REPORTS_SWEEP_INTERVAL_SECONDS if interval is None else interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.sweeps = 0
+        self.evicted_for_age = 0
+        self.evicted_for_size = 0
+        self.evicted_bytes = 0
+        self.last_sweep_ms = 0.0
+
+    def _reports(self):
+        """(mtime, size, path) of every stored report, least recently used first."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(REPORT_SUFFIX) and entry.is_file():
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+        return entries
+
+    def sweep(self) -> int:
+        """Delete expired reports, then the least recently used until the store fits. Returns the count deleted."""
+        started = time.perf_counter()
+        now = time.time()
+        entries = self._reports()
+        total = sum(size for _, size, _ in entries)
+        evicted = {"age": 0, "size": 0}
+        freed = 0
+        for mtime, size, path in entries:
+            if self.max_age > 0 and now - mtime > self.max_age:
+                reason = "age"
+            elif self.max_bytes > 0 and total > self.max_bytes:
+                reason = "size"
+            else:
+                break  # everything after this one is newer
+            try:
+                os.unlink(path)
+                evicted[reason] += 1
+                freed += size
+            except FileNotFoundError:
+                pass  # another API process got there first
+            total -= size
+        self._sweep_staging(now)
+
+        with self._lock:
+            self.sweeps += 1
+            self.evicted_for_age += evicted["age"]
+            self.evicted_for_size += evicted["size"]
+            self.evicted_bytes += freed
+            self.last_sweep_ms = round((time.perf_counter() - started) * 1000, 3)
+        return evicted["age"] + evicted["size"]
+
+    def _sweep_staging(self, now: float) -> None:
+        # Markers and partial files left behind by renders that died.
+        try:
+            scan = os.scandir(self.directory / PENDING_DIR)
+        except FileNotFoundError:
+            return
+        with scan:
+            for entry in scan:
+                try:
+                    if now - entry.stat().st_mtime > settings.REPORT_RENDER_TIMEOUT_SECONDS:
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        """Current disk usage of the store and this process's eviction counters. Blocking (scans the directory)."""
+        entries = self._reports()
+        with self._lock:
+            return {
+                "reports": len(entries),
+                "disk_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age,
+                "sweeps": self.sweeps,
+                "evicted_for_age": self.evicted_for_age,
+                "evicted_for_size": self.evicted_for_size,
+                "evicted_bytes": self.evicted_bytes,
+                "last_sweep_ms": self.last_sweep_ms,
+            }
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        def loop() -> None:
+            while not self._stop.wait(self.interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"Report sweep of {self.directory} failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name="report-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_sweeper: Optional[ReportSweeper] = None
+_sweeper_lock = threading.Lock()
+
+
+def get_report_sweeper() -> ReportSweeper:
+    """This process's sweeper (started by the app lifespan)."""
+    global _sweeper
+    if _sweeper is None:
+        with _sweeper_lock:
+            if _sweeper is None:
+                _sweeper = ReportSweeper()
+    return _sweeper
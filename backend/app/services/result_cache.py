@@ -0,0 +1,109 @@
+"""
+Content-addressed cache of analysis results.
+
+Results are keyed on the SHA-256 of the uploaded bytes plus the analysis
+version, so re-uploads of the same manuscript skip the analyzers and reuse the
+already rendered report. Lookups hit an in-process LRU first and fall back to
+the ``analysis_results`` table, whose ``file_hash`` column is unique. Stores
+go through the write-behind ``ResultWriter`` and never block the caller;
+writes it has not flushed yet are served from its buffer.
+"""
+import logging
+from typing import Optional
+
+from ..core.cache import LRUCache
+from ..core.config import settings
+from ..models.database import AnalysisResult as AnalysisResultRecord
+from ..models.schemas import AnalysisResult
+from .persistence import get_result_writer, record_to_schema
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisResultCache:
+    """Two-tier (memory, database) cache of ``AnalysisResult`` by file hash."""
+
+    def __init__(self, version: str, max_entries: int, ttl_seconds: float, persistent: bool = True):
+        self.version = version
+        self.persistent = persistent
+        self._memory: LRUCache[AnalysisResult] = LRUCache(max_entries, ttl_seconds)
+
+    def _key(self, file_hash: str) -> str:
+        return f"{self.version}:{file_hash}"
+
+    def get(self, file_hash: str) -> Optional[AnalysisResult]:
+        """Return a cached result from memory only (never touches the database)."""
+        return self._memory.get(self._key(file_hash))
+
+    def get_persistent(self, file_hash: str) -> Optional[AnalysisResult]:
+        """Look up the database tier and promote hits into memory.
+
+        Blocking; call it from a worker thread inside request handlers.
+        """
+        if not self.persistent:
+            return None
+        result = get_result_writer().pending_result(file_hash, self.version)
+        if result is not None:
+            self._memory.set(self._key(file_hash), result)
+            return result
+        try:
+            session = _session()
+            try:
+                record = (
+                    session.query(AnalysisResultRecord)
+                    .filter(AnalysisResultRecord.file_hash == file_hash)
+                    .one_or_none()
+                )
+                if record is None or record.analysis_version != self.version:
+                    return None
+                result = record_to_schema(record)
+            finally:
+                session.close()
+        except Exception as e:
+            logger.warning(f"Result cache lookup failed, continuing without it: {e}")
+            return None
+
+        self._memory.set(self._key(file_hash), result)
+        return result
+
+    def put(self, file_hash: str, file_size: int, result: AnalysisResult) -> None:
+        """Store a result in memory and queue its upsert into the database tier."""
+        self._memory.set(self._key(file_hash), result)
+        if self.persistent:
+            get_result_writer().submit(file_hash, file_size, self.version, result)
+
+    def record_hit(self, file_hash: str, file_size: int, result: AnalysisResult) -> None:
+        """Queue an ``analysis_history`` entry for a result served from the cache."""
+        if self.persistent:
+            get_result_writer().submit(file_hash, file_size, self.version, result, store_result=False)
+
+    def invalidate(self, file_hash: str) -> None:
+        self._memory.pop(self._key(file_hash))
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        return {"version": self.version, "persistent": self.persistent, "memory": self._memory.stats()}
+
+
+def _session():
+    from ..core.database import get_session_factory
+
+    return get_session_factory()()
+
+
+_cache: Optional[AnalysisResultCache] = None
+
+
+def get_result_cache(version: str) -> AnalysisResultCache:
+    """Return the process-wide cache, rebuilding it if the analysis version changed."""
+    global _cache
+    if _cache is None or _cache.version != version:
+        _cache = AnalysisResultCache(
+            version=version,
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+            persistent=settings.RESULT_CACHE_PERSISTENT,
+        )
+    return _cache
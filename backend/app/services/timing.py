@@ -0,0 +1,29 @@
+"""
+Per-stage wall-clock timing for the analysis pipeline.
+"""
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator
+
+
+@dataclass
+class StageTimer:
+    """Collects ``{stage: milliseconds}``; repeated stages accumulate."""
+
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.timings[name] = round(self.timings.get(name, 0.0) + seconds * 1000, 3)
+
+    def merge(self, timings: Dict[str, float]) -> None:
+        for name, milliseconds in timings.items():
+            self.timings[name] = round(self.timings.get(name, 0.0) + milliseconds, 3)
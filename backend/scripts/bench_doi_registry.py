@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+DOI registry build time, size and lookup latency at increasing registry sizes.
+
+Synthetic DOIs ("10.<prefix>/j.<hex suffix>", 39000 prefixes, suffixes of
+12-24 characters) with publication years stand in for a CrossRef dump; the
+build time includes normalizing them as a dump would be. Per size:
+build seconds, bytes on disk, open time, and mean per-lookup microseconds for
+registered DOIs, unregistered DOIs (almost all stopped by the Bloom filter)
+and the observed Bloom false-positive rate. The last two columns are the
+growth in resident memory from opening the registry and running the first
+--rss-lookups lookups (about ten papers' references). "anon MB" is private
+memory, mostly the fence keys. "file MB" is mapped page-cache pages that are
+shared and reclaimable. The kernel maps up to 64 KiB of already cached pages
+around each fault, so a freshly built (fully cached) registry shows more
+than a cold one would.
+
+Usage: python backend/scripts/bench_doi_registry.py --sizes 1000000,10000000,50000000
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.services.artifacts import remove_published  # noqa: E402
+from backend.app.services.doi_registry import DoiRegistry, build_registry  # noqa: E402
+
+def synthetic_doi(i: int, salt: bytes = b"") -> str:
+    suffix = hashlib.blake2b(i.to_bytes(8, "little") + salt, digest_size=6 + i % 7).hexdigest()
+    return f"10.{1000 + i * 7919 % 39000}/j.{suffix}"
+
+
+def entries(count: int):
+    for i in range(count):
+        yield synthetic_doi(i), 1950 + i % 76
+
+
+def rss_mb() -> tuple:
+    """(private, file-backed) resident MiB."""
+    fields = dict(line.split(":", 1) for line in Path("/proc/self/status").read_text().splitlines() if ":" in line)
+    return tuple(int(fields.get(name, "0 kB").split()[0]) / 1024 for name in ("RssAnon", "RssFile"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000000,10000000")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--rss-lookups", type=int, default=1000)
+    parser.add_argument("--workdir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    print(
+        f"{'DOIs':>10} {'build s':>8} {'disk MB':>8} {'open ms':>8} {'hit us':>7} {'miss us':>8} "
+        f"{'bloom FP':>9} {'anon MB':>8} {'file MB':>8}"
+    )
+    for size in [int(value) for value in args.sizes.split(",")]:
+        directory = Path(args.workdir) / f"bench-doi-registry-{size}"
+        try:
+            start = time.perf_counter()
+            build_registry(entries(size), directory)
+            build = time.perf_counter() - start
+            disk = sum(path.stat().st_size for path in directory.iterdir()) / 2**20
+
+            hits = [synthetic_doi(i) for i in random.Random(1).sample(range(size), min(args.lookups, size))]
+            misses = [synthetic_doi(i, salt=b"unregistered") for i in range(args.lookups)]
+
+            before = rss_mb()
+            start = time.perf_counter()
+            registry = DoiRegistry(directory)
+            opened = (time.perf_counter() - start) * 1000
+            assert all(doi in registry for doi in hits[: args.rss_lookups])
+            anon, file = (after - start for after, start in zip(rss_mb(), before))
+
+            start = time.perf_counter()
+            found = sum(doi in registry for doi in hits)
+            hit_us = (time.perf_counter() - start) / len(hits) * 1e6
+            start = time.perf_counter()
+            false_hits = sum(doi in registry for doi in misses)
+            miss_us = (time.perf_counter() - start) / len(misses) * 1e6
+            passed_bloom = sum(registry.might_contain(doi.encode()) for doi in misses) / len(misses)
+            assert found == len(hits) and false_hits == 0
+            registry.close()
+            print(
+                f"{size:>10} {build:>8.1f} {disk:>8.1f} {opened:>8.2f} {hit_us:>7.1f} {miss_us:>8.1f} "
+                f"{passed_bloom:>9.4f} {anon:>8.1f} {file:>8.1f}"
+            )
+        finally:
+            remove_published(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+Embedding micro-batcher throughput/latency curve.
+
+N client threads (--clients) each encode a document's worth of paragraphs
+(--paragraphs) back to back for --seconds, the way concurrent analyze calls do,
+once straight against the encoder and once per --waits value through
+MicroBatchEncoder. Reported: paragraphs/s, per-request p50/p95 latency and the
+mean number of requests merged into one forward pass.
+
+The default encoder is a CPU stand-in for a small transformer (per-layer
+matmuls plus per-call work independent of batch size); --model runs a real
+sentence-transformers model instead.
+
+Usage: python backend/scripts/bench_embedding_batcher.py --clients 1,4,16 --waits 2,5,10
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.services.embedding_batcher import MicroBatchEncoder  # noqa: E402
+
+
+class SyntheticEncoder:
+    """Tokens -> ``layers`` feed-forward blocks -> mean pooling, all in numpy."""
+
+    model_name = "synthetic"
+
+    def __init__(self, dimension: int = 384, hidden: int = 1536, layers: int = 6, tokens: int = 48):
+        rng = np.random.default_rng(0)
+        self.dimension, self.tokens = dimension, tokens
+        self.embedding = rng.standard_normal((4096, dimension)).astype(np.float32)
+        self.layers = [
+            (
+                rng.standard_normal((dimension, hidden)).astype(np.float32) / np.sqrt(dimension),
+                rng.standard_normal((hidden, dimension)).astype(np.float32) / np.sqrt(hidden),
+            )
+            for _ in range(layers)
+        ]
+
+    def encode(self, texts):
+        ids = np.array([[hash((text, t)) % 4096 for t in range(self.tokens)] for text in texts])
+        x = self.embedding[ids].reshape(-1, self.dimension)
+        for up, down in self.layers:
+            h = np.maximum(x @ up, 0)
+            x = x + h @ down
+            x = (x - x.mean(axis=1, keepdims=True)) / (x.std(axis=1, keepdims=True) + 1e-6)
+        pooled = x.reshape(len(texts), self.tokens, self.dimension).mean(axis=1)
+        return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
+
+def run(encoder, clients: int, paragraphs: int, seconds: float):
+    latencies, counts = [], [0] * clients
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def client(index: int) -> None:
+        request = 0
+        while time.perf_counter() < stop:
+            texts = [f"client {index} request {request} paragraph {p}" for p in range(paragraphs)]
+            start = time.perf_counter()
+            encoder.encode(texts)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed * 1000)
+            counts[index] += paragraphs
+            request += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return sum(counts) / wall, statistics.median(latencies), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,2,4,8,16")
+    parser.add_argument("--waits", default="2,5,10", help="max wait values (ms) to try")
+    parser.add_argument("--max-items", type=int, default=128)
+    parser.add_argument("--paragraphs", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--model", help="sentence-transformers model name instead of the synthetic encoder")
+    args = parser.parse_args()
+
+    if args.model:
+        from backend.app.services.embeddings import SentenceEncoder
+
+        base = SentenceEncoder(args.model)
+    else:
+        base = SyntheticEncoder()
+    base.encode(["warm up"])
+
+    print(f"{'clients':>7} {'mode':>12} {'para/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'req/batch':>9}")
+    for clients in [int(value) for value in args.clients.split(",")]:
+        throughput, p50, p95 = run(base, clients, args.paragraphs, args.seconds)
+        print(f"{clients:>7} {'unbatched':>12} {throughput:>8.0f} {p50:>8.1f} {p95:>8.1f} {1.0:>9.2f}")
+        for wait in [float(value) for value in args.waits.split(",")]:
+            batcher = MicroBatchEncoder(base, max_items=args.max_items, max_wait_ms=wait)
+            throughput, p50, p95 = run(batcher, clients, args.paragraphs, args.seconds)
+            merged = batcher.stats()["mean_requests_per_batch"]
+            batcher.close()
+            print(f"{clients:>7} {f'wait {wait:g}ms':>12} {throughput:>8.0f} {p50:>8.1f} {p95:>8.1f} {merged:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Event-loop responsiveness benchmark for /api/analyze.
+
+Fires N concurrent large uploads at the ASGI app in-process while a prober
+hits /health every few milliseconds, once per executor mode. "inline" is the
+pre-executor behaviour (analysis on the event loop); "process" is the pool.
+
+Usage: python backend/scripts/bench_event_loop.py --uploads 16 --size-kb 1024
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx  # noqa: E402
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.main import app  # noqa: E402
+from backend.app.services.executor import configure_executor  # noqa: E402
+
+
+def _make_paper(index: int, size_kb: int) -> bytes:
+    paragraph = (
+        "In this paper we propose a novel framework; results show significant improvement "
+        "over the state-of-the-art (p = 0.049), see doi 10.1000/bench.{i}. "
+    )
+    body = []
+    total = 0
+    n = 0
+    while total < size_kb * 1024:
+        chunk = paragraph.format(i=n) * 3 + f"Paragraph {n} of upload {index}.\n\n"
+        body.append(chunk)
+        total += len(chunk)
+        n += 1
+    return f"Upload nonce {index} {time.time_ns()}\n\n".encode() + "".join(body).encode()
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+
+async def _run(mode: str, workers: int, uploads: int, size_kb: int) -> dict:
+    executor = configure_executor(mode, workers)
+    executor.start()
+    papers = [_make_paper(i, size_kb) for i in range(uploads)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        health_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                health_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        async def upload(i: int):
+            response = await client.post(
+                "/api/analyze", files={"file": (f"bench_{i}.txt", papers[i], "text/plain")}
+            )
+            response.raise_for_status()
+
+        prober = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(i) for i in range(uploads)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await prober
+
+    executor.shutdown()
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "throughput_per_s": uploads / elapsed,
+        "health_samples": len(health_latencies),
+        "health_p50_ms": statistics.median(health_latencies) if health_latencies else 0.0,
+        "health_p99_ms": _percentile(health_latencies, 99),
+        "health_max_ms": max(health_latencies, default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=settings.ANALYSIS_WORKERS)
+    parser.add_argument("--modes", default="inline,process")
+    args = parser.parse_args()
+
+    # Every upload is unique, but keep the database tier out of the measurement.
+    settings.RESULT_CACHE_PERSISTENT = False
+    settings.MAX_UPLOAD_SIZE_MB = max(settings.MAX_UPLOAD_SIZE_MB, args.size_kb // 1024 + 2)
+
+    print(f"{args.uploads} concurrent uploads of ~{args.size_kb} KB, {args.workers} workers\n")
+    print(f"{'mode':<8} {'elapsed s':>10} {'papers/s':>9} {'/health p50':>12} {'p99':>9} {'max':>9} {'samples':>8}")
+    for mode in args.modes.split(","):
+        row = asyncio.run(_run(mode.strip(), args.workers, args.uploads, args.size_kb))
+        print(
+            f"{row['mode']:<8} {row['elapsed_s']:>10.2f} {row['throughput_per_s']:>9.2f} "
+            f"{row['health_p50_ms']:>10.1f}ms {row['health_p99_ms']:>7.1f}ms {row['health_max_ms']:>7.1f}ms "
+            f"{row['health_samples']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
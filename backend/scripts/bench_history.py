@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+OFFSET vs keyset pagination of /api/history over a generated history table.
+
+Fills analysis_history with --rows rows (one result per --uploads-per-result
+uploads; the results carry realistic JSON columns) unless the table already
+holds that many. Pages are then read newest first at growing depths, unfiltered
+and with each supported filter:
+
+* offset:  ORDER BY analyzed_at DESC, id DESC LIMIT n OFFSET depth, then the
+           page's result columns, as list_history fetches them
+* keyset:  list_history() with the cursor of the row just before the page
+
+A third table compares page projections at depth 0: the ORM join loading full
+result rows (every JSON column), list_history's summary columns, and
+list_history with all detail columns included. Query plans are printed once
+per filter so the index in use is visible.
+
+SQLite by default (a file under --workdir, reused across runs); pass
+--database-url postgresql+psycopg2://... to run against PostgreSQL.
+
+Usage: python backend/scripts/bench_history.py --rows 5000000 --depths 0 10000 1000000
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.database import upgrade_schema  # noqa: E402
+from backend.app.models.database import AnalysisHistory, Base, credibility_band  # noqa: E402
+from backend.app.models.database import AnalysisResult as AnalysisResultRecord  # noqa: E402
+from backend.app.services.history import DETAIL_COLUMNS, SUMMARY_COLUMNS, encode_cursor, list_history  # noqa: E402
+
+CHUNK = 20000
+START = datetime(2024, 1, 1)
+
+
+def populate(engine, rows: int, uploads_per_result: int, filenames: int) -> None:
+    rng = random.Random(7)
+    results = max(1, rows // uploads_per_result)
+    matches = [{"title": f"Source paper {i}", "similarity": 71.5, "source": f"https://arxiv.org/abs/{i}"} for i in range(8)]
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, results, CHUNK):
+            conn.execute(
+                insert(AnalysisResultRecord.__table__),
+                [
+                    {
+                        "id": i + 1,
+                        "filename": f"paper_{i % filenames}.pdf",
+                        "file_size": 250000,
+                        "file_hash": f"{i:064x}",
+                        "plagiarism_score": i % 100,
+                        "plagiarism_summary": "Overlap with indexed sources.",
+                        "plagiarism_matches": matches,
+                        "ai_probability": 12.5,
+                        "ai_confidence": "low",
+                        "citation_validity_score": 90,
+                        "citation_summary": "41 of 42 DOIs resolve.",
+                        "citation_details": {"invalid_dois": ["10.1000/x"] * 4, "missing_dois": [], "year_mismatches": []},
+                        "statistical_risk_score": 20,
+                        "statistical_summary": "p-values look plausible.",
+                        "overall_research_credibility": 70,
+                        "explanations": ["An explanation sentence of typical length for the report."] * 4,
+                        "suspicious_paragraphs": ["A suspicious paragraph excerpt. " * 8] * 3,
+                        "report_path": f"/files/paper_{i}.pdf",
+                        "analyzed_at": START,
+                    }
+                    for i in range(offset, min(results, offset + CHUNK))
+                ],
+            )
+        for offset in range(0, rows, CHUNK):
+            batch = []
+            for i in range(offset, min(rows, offset + CHUNK)):
+                score = rng.randint(0, 100)
+                result = rng.randrange(results)
+                batch.append(
+                    {
+                        "result_id": result + 1,
+                        "filename": f"paper_{result % filenames}.pdf",
+                        "credibility_score": score,
+                        "credibility_band": credibility_band(score),
+                        "analyzed_at": START + timedelta(seconds=i * 6 + rng.randrange(6)),
+                    }
+                )
+            conn.execute(insert(AnalysisHistory.__table__), batch)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"generated {rows} history rows over {results} results in {time.perf_counter() - started:.0f}s")
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def history_query(session, filters):
+    query = session.query(
+        AnalysisHistory.id,
+        AnalysisHistory.result_id,
+        AnalysisHistory.filename,
+        AnalysisHistory.credibility_score,
+        AnalysisHistory.credibility_band,
+        AnalysisHistory.analyzed_at,
+    )
+    if "since" in filters:
+        query = query.filter(AnalysisHistory.analyzed_at >= filters["since"], AnalysisHistory.analyzed_at < filters["until"])
+    if "filename" in filters:
+        query = query.filter(AnalysisHistory.filename == filters["filename"])
+    if "band" in filters:
+        query = query.filter(AnalysisHistory.credibility_band == filters["band"])
+    return query.order_by(AnalysisHistory.analyzed_at.desc(), AnalysisHistory.id.desc())
+
+
+def offset_page(factory, filters, depth: int, limit: int) -> list:
+    # The same two queries as list_history, with OFFSET in place of the cursor.
+    session = factory()
+    try:
+        rows = history_query(session, filters).offset(depth).limit(limit).all()
+        columns = (getattr(AnalysisResultRecord, name) for name in SUMMARY_COLUMNS)
+        ids = list({row.result_id for row in rows})
+        return rows, session.query(AnalysisResultRecord.id, *columns).filter(AnalysisResultRecord.id.in_(ids)).all()
+    finally:
+        session.close()
+
+
+def explain(engine, statement) -> str:
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            return "; ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+        return " | ".join(row[0].strip() for row in conn.execute(text("EXPLAIN " + sql)))[:200]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--uploads-per-result", type=int, default=5)
+    parser.add_argument("--filenames", type=int, default=20000, help="distinct filenames")
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workdir", default=str(Path(__file__).resolve().parents[2] / "cache"))
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{Path(args.workdir) / f'bench_history_{args.rows}.sqlite3'}"
+    Path(args.workdir).mkdir(parents=True, exist_ok=True)
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    existing = session.query(func.count(AnalysisHistory.id)).scalar()
+    session.close()
+    if existing < args.rows:
+        if existing:
+            sys.exit(f"{url} holds {existing} history rows; point --workdir or --database-url at an empty database")
+        populate(engine, args.rows, args.uploads_per_result, args.filenames)
+    else:
+        print(f"reusing {existing} history rows in {url}")
+
+    middle = START + timedelta(seconds=args.rows * 3)
+    scenarios = {
+        "all": {},
+        "date range": {"since": middle - timedelta(days=30), "until": middle},
+        "filename": {"filename": "paper_42.pdf"},
+        "band": {"band": "moderate"},
+    }
+
+    print(f"\npage of {args.limit}, median of {args.repeat} (ms)")
+    print(f"{'filter':>11} {'depth':>9} {'offset':>9} {'keyset':>9}")
+    plans = []
+    for name, filters in scenarios.items():
+        session = factory()
+        try:
+            plans.append((name, explain(engine, history_query(session, filters).limit(args.limit).statement)))
+            for depth in args.depths:
+                before = history_query(session, filters).offset(depth - 1).limit(1).first() if depth else None
+                if depth and before is None:
+                    break  # the filter matches fewer rows than this depth
+                cursor = encode_cursor(before.analyzed_at, before.id) if before else None
+                offset_ms = timed(lambda: offset_page(factory, filters, depth, args.limit), args.repeat)
+                keyset_ms = timed(
+                    lambda: list_history(cursor=cursor, limit=args.limit, session_factory=factory, **filters), args.repeat
+                )
+                print(f"{name:>11} {depth:>9} {offset_ms:>9.2f} {keyset_ms:>9.2f}")
+        finally:
+            session.close()
+
+    session = factory()
+    try:
+        full_ms = timed(
+            lambda: session.query(AnalysisHistory, AnalysisResultRecord)
+            .join(AnalysisResultRecord, AnalysisResultRecord.id == AnalysisHistory.result_id)
+            .order_by(AnalysisHistory.analyzed_at.desc(), AnalysisHistory.id.desc())
+            .limit(args.limit)
+            .all(),
+            args.repeat,
+        )
+    finally:
+        session.close()
+    summary_ms = timed(lambda: list_history(limit=args.limit, session_factory=factory), args.repeat)
+    detail_ms = timed(lambda: list_history(limit=args.limit, include=DETAIL_COLUMNS, session_factory=factory), args.repeat)
+    print(f"\nprojection of one page (ms): full rows {full_ms:.2f}, summary {summary_ms:.2f}, with details {detail_ms:.2f}")
+
+    print("\nquery plans")
+    for name, plan in plans:
+        print(f"{name:>11}: {plan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+One SystemMetrics row per event vs per-interval aggregated rows.
+
+Replays --events synthetic request latencies (log-normal, spread over
+--endpoints endpoints and --intervals metric intervals) twice:
+
+* per-event: one INSERT + COMMIT per event, the write load the table's
+  original one-row-per-API-call design implies;
+* aggregated: MetricsAggregator.observe per event, and one bulk INSERT of one
+  row per endpoint per interval.
+
+Reports time spent per event on the request path, total database time, rows
+written, and the error of the aggregated p50/p95/p99 against exact ones.
+
+Usage: python backend/scripts/bench_metrics.py --events 20000 --endpoints 12
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.models.database import Base, SystemMetrics  # noqa: E402
+from backend.app.services.metrics import API_CALL, MetricsAggregator, summarize  # noqa: E402
+
+INTERVAL = 60.0
+EPOCH = 1_800_000_000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--endpoints", type=int, default=12)
+    parser.add_argument("--intervals", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    events = [
+        (
+            EPOCH + INTERVAL * args.intervals * i / args.events,
+            f"GET /api/endpoint{rng.randrange(args.endpoints)}",
+            rng.lognormvariate(2.5, 0.8),
+        )
+        for i in range(args.events)
+    ]
+
+    with tempfile.TemporaryDirectory() as scratch:
+        engine = create_engine(f"sqlite:///{Path(scratch) / 'per_event.sqlite3'}")
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        started = time.perf_counter()
+        for at, name, milliseconds in events:
+            session = factory()
+            session.add(
+                SystemMetrics(
+                    metric_type=API_CALL,
+                    name=name,
+                    value=milliseconds,
+                    recorded_at=datetime.utcfromtimestamp(at),
+                )
+            )
+            session.commit()
+            session.close()
+        per_event_s = time.perf_counter() - started
+        engine.dispose()
+
+        engine = create_engine(f"sqlite:///{Path(scratch) / 'aggregated.sqlite3'}")
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        now = [EPOCH]
+        metrics = MetricsAggregator(interval_seconds=INTERVAL, session_factory=factory, clock=lambda: now[0])
+        observe_s = 0.0
+        for at, name, milliseconds in events:
+            now[0] = at
+            started = time.perf_counter()
+            metrics.observe(API_CALL, name, milliseconds)
+            observe_s += time.perf_counter() - started
+        now[0] += INTERVAL
+        started = time.perf_counter()
+        metrics.flush()
+        flush_s = time.perf_counter() - started
+        session = factory()
+        rows = session.query(SystemMetrics).count()
+        session.close()
+
+        start = datetime.utcfromtimestamp(EPOCH)
+        summary = summarize(start, start + timedelta(seconds=INTERVAL * (args.intervals + 1)), session_factory=factory)
+        engine.dispose()
+
+    print(f"{args.events} events, {args.endpoints} endpoints, {args.intervals} intervals of {INTERVAL:g}s")
+    print(f"{'mode':>11} {'us/event':>9} {'db s':>7} {'rows':>7}")
+    print(f"{'per-event':>11} {per_event_s / args.events * 1e6:>9.1f} {per_event_s:>7.2f} {args.events:>7}")
+    print(f"{'aggregated':>11} {observe_s / args.events * 1e6:>9.1f} {flush_s:>7.2f} {rows:>7}")
+
+    worst = {50: 0.0, 95: 0.0, 99: 0.0}
+    for item in summary:
+        exact = sorted(ms for _, name, ms in events if name == item["name"])
+        for q in worst:
+            truth = exact[max(0, int(q / 100 * len(exact)) - 1)]
+            worst[q] = max(worst[q], abs(item[f"p{q}_ms"] - truth) / truth)
+    print("worst relative percentile error across endpoints: " + ", ".join(f"p{q} {err:.2%}" for q, err in worst.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Near-duplicate index: LSH recall and query latency against brute force.
+
+The corpus is random paragraphs (--words words each from a 20k-word
+vocabulary). Half of each query document's paragraphs are edited copies of
+corpus paragraphs (1-20% of words replaced), half are unrelated. Ground truth
+is every edited copy whose exact shingle Jaccard similarity to its source is at
+least --min-jaccard (unrelated random paragraphs share next to no shingles).
+Brute force scores the query signatures against every stored signature; LSH
+only scores paragraphs sharing a band bucket. Both keep pairs whose estimated
+similarity reaches --min-jaccard.
+
+Usage: python backend/scripts/bench_minhash_index.py --sizes 10000,100000 --bands 32 --rows 4
+"""
+
+import argparse
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.services.minhash_index import MinHashIndex, MinHashParams, build_index  # noqa: E402
+
+
+def make_corpus(rng: random.Random, vocabulary, size: int, words: int):
+    for doc_id in range(size):
+        yield {"title": f"doc {doc_id}", "abstract": " ".join(rng.choices(vocabulary, k=words))}
+
+
+def make_queries(rng: random.Random, vocabulary, corpus_texts, paragraphs: int):
+    """Query paragraphs and the corpus row each edited copy came from."""
+    queries, sources = [], []
+    for _ in range(paragraphs // 2):
+        sources.append(rng.randrange(len(corpus_texts)))
+        words = corpus_texts[sources[-1]].split()
+        for position in rng.sample(range(len(words)), k=max(1, int(len(words) * rng.uniform(0.01, 0.2)))):
+            words[position] = rng.choice(vocabulary)
+        queries.append(" ".join(words))
+    while len(queries) < paragraphs:
+        queries.append(" ".join(rng.choices(vocabulary, k=len(corpus_texts[0].split()))))
+    return queries, sources
+
+
+def jaccard(index: MinHashIndex, left: str, right: str) -> float:
+    a, b = set(index.hasher.shingles(left).tolist()), set(index.hasher.shingles(right).tolist())
+    return len(a & b) / max(len(a | b), 1)
+
+
+def brute_force(index: MinHashIndex, signatures: np.ndarray, min_similarity: float) -> set:
+    stored = np.asarray(index._signatures)
+    found = set()
+    for query, signature in enumerate(signatures):
+        similarity = (stored == signature).mean(axis=1)
+        found.update((query, int(row)) for row in np.flatnonzero(similarity >= min_similarity))
+    return found
+
+
+def lsh(index: MinHashIndex, signatures: np.ndarray, min_similarity: float) -> set:
+    pairs = index.candidates(signatures)
+    if not len(pairs):
+        return set()
+    similarity = (signatures[pairs[:, 0]] == index._signatures[pairs[:, 1]]).mean(axis=1)
+    return {tuple(pair) for pair in pairs[similarity >= min_similarity].tolist()}
+
+
+def timed(fn, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--bands", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=4)
+    parser.add_argument("--shingle-words", type=int, default=3)
+    parser.add_argument("--words", type=int, default=100)
+    parser.add_argument("--paragraphs", type=int, default=64)
+    parser.add_argument("--min-jaccard", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workdir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    params = MinHashParams(args.bands, args.rows, args.shingle_words)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    print(f"bands={params.bands} rows={params.rows} shingle={params.shingle_words} threshold~{params.threshold:.2f}")
+    print(
+        f"{'paragraphs':>10} {'build s':>8} {'truth':>6} {'cands':>7} {'lsh recall':>11} {'brute recall':>13}"
+        f" {'lsh ms':>8} {'brute ms':>9}"
+    )
+    for size in [int(value) for value in args.sizes.split(",")]:
+        rng = random.Random(size)
+        vocabulary = ["".join(rng.choices(letters, k=rng.randint(3, 10))) for _ in range(20000)]
+        corpus_texts = [record["abstract"] for record in make_corpus(rng, vocabulary, size, args.words)]
+        directory = Path(args.workdir) / f"bench-minhash-{size}"
+
+        start = time.perf_counter()
+        build_index(({"title": str(i), "abstract": text} for i, text in enumerate(corpus_texts)), directory, params)
+        build = time.perf_counter() - start
+        index = MinHashIndex(directory)
+
+        queries, sources = make_queries(rng, vocabulary, corpus_texts, args.paragraphs)
+        truth = {
+            (query, row)
+            for query, row in enumerate(sources)
+            if jaccard(index, queries[query], corpus_texts[row]) >= args.min_jaccard
+        }
+
+        signatures = index.hasher.signatures(queries)
+        lsh_found, lsh_ms = timed(lambda: lsh(index, signatures, args.min_jaccard), args.repeat)
+        brute_found, brute_ms = timed(lambda: brute_force(index, signatures, args.min_jaccard), args.repeat)
+        candidates = len(index.candidates(signatures))
+        recall = len(truth & lsh_found) / max(len(truth), 1)
+        brute_recall = len(truth & brute_found) / max(len(truth), 1)
+        print(
+            f"{size:>10} {build:>8.1f} {len(truth):>6} {candidates:>7} {recall:>11.3f} {brute_recall:>13.3f}"
+            f" {lsh_ms:>8.1f} {brute_ms:>9.1f}"
+        )
+        index.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
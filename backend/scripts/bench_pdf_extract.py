@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""
+Page-count scaling benchmark for PDF extraction.
+
+For each page count a synthetic PDF (about 3KB of text per page) is profiled
+sequentially in this process and page-parallel on an analysis process pool
+with --workers workers. Peak traced Python memory of the streamed sequential
+run is compared with profiling the fully joined text, and the child processes'
+peak RSS is reported for the parallel run.
+
+Usage: python backend/scripts/bench_pdf_extract.py --pages 50,150,300,600 --workers 4
+"""
+
+import argparse
+import asyncio
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import fitz  # noqa: E402
+
+from backend.app.services.executor import AnalysisExecutor, TextRef  # noqa: E402
+from backend.app.services.pdf_extract import (  # noqa: E402
+    PDF_FORMAT,
+    iter_page_texts,
+    page_ranges,
+    profile_pages,
+)
+from backend.app.services.text_profile import TextProfile  # noqa: E402
+
+SAMPLE_PATH = Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt"
+
+
+def make_pdf(path: Path, pages: int) -> None:
+    lines = [line for line in SAMPLE_PATH.read_text(encoding="utf-8").splitlines() if line.strip()]
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        for row in range(45):
+            page.insert_text((40, 40 + row * 16), lines[(number + row) % len(lines)][:90], fontsize=9)
+    document.save(path)
+    document.close()
+
+
+def traced_peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+async def parallel_profile(executor: AnalysisExecutor, text_ref: TextRef, pages: int) -> TextProfile:
+    ranges = page_ranges(pages, executor.workers, max(1, pages // executor.workers))
+    parts = await asyncio.gather(*(executor.run(profile_pages, text_ref, start, stop) for start, stop in ranges))
+    return TextProfile.combine(list(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", default="50,150,300,600")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--workdir", default="/tmp")
+    args = parser.parse_args()
+
+    executor = AnalysisExecutor(mode="process", workers=args.workers)
+    executor.start()
+    print(f"{'pages':>6} {'seq s':>8} {'par s':>8} {'speedup':>8} {'joined peak':>12} {'streamed peak':>14}")
+    try:
+        for pages in [int(value) for value in args.pages.split(",")]:
+            path = Path(args.workdir) / f"bench-{pages}.pdf"
+            make_pdf(path, pages)
+            text_ref = TextRef(path=str(path), format=PDF_FORMAT)
+
+            start = time.perf_counter()
+            profile_pages(text_ref)
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            asyncio.run(parallel_profile(executor, text_ref, pages))
+            parallel = time.perf_counter() - start
+
+            joined = traced_peak(lambda: TextProfile.build("\n\n".join(iter_page_texts(text_ref))))
+            streamed = traced_peak(lambda: profile_pages(text_ref))
+            print(
+                f"{pages:>6} {sequential:>8.2f} {parallel:>8.2f} {sequential / parallel:>7.2f}x"
+                f" {joined / 2**20:>10.1f}MB {streamed / 2**20:>12.1f}MB"
+            )
+            path.unlink()
+    finally:
+        executor.shutdown()
+    child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"peak worker RSS: {child_rss:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Per-request upserts vs write-behind batches for persisting analysis results.
+
+"sync" is the old request path: one SELECT + INSERT/UPDATE + COMMIT per
+result before the response goes out. "write-behind" is ``ResultWriter``: the
+request only appends to the buffer (the latency column) and the flusher
+commits in batches of --batch-size. "journaled" adds the on-disk journal
+(PERSIST_JOURNAL_DIR), whose append the request pays for. Throughput is
+results committed per second, measured until the last write is flushed. Every
+--repeat-th upload is a re-upload of an earlier hash (the update path).
+
+Runs against a fresh SQLite file by default; pass --database-url to measure a
+real server (tables are created if missing, rows are left behind).
+
+Usage: python backend/scripts/bench_persistence.py --results 2000 --batch-size 64
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.models.database import Base  # noqa: E402
+from backend.app.models.schemas import AnalysisResult  # noqa: E402
+from backend.app.services.persistence import PendingWrite, ResultWriter, write_batch  # noqa: E402
+
+
+def make_result(i: int) -> AnalysisResult:
+    return AnalysisResult(
+        filename=f"paper_{i}.pdf",
+        plagiarism_score=i % 100,
+        plagiarism_summary="No significant overlap with indexed sources.",
+        plagiarism_matches=[],
+        ai_probability=12.5,
+        ai_confidence="low",
+        citation_validity_score=90,
+        citation_summary="41 of 42 DOIs resolve.",
+        citation_invalid_dois=["10.1000/missing"],
+        citation_missing_dois=[],
+        citation_year_mismatches=[],
+        statistical_risk_score=20,
+        statistical_summary="p-values look plausible.",
+        overall_research_credibility=81,
+        suspicious_paragraphs=[],
+        explanations=["Citation checks passed."] * 4,
+        report_path=f"/files/paper_{i}.pdf",
+    )
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(mode: str, factory, results, hashes, batch_size: int, interval_ms: float, journal_dir: Path) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    if mode == "sync":
+        for file_hash, result in zip(hashes, results):
+            t = time.perf_counter()
+            write_batch(factory, [PendingWrite(file_hash, 1000, "bench", result.filename, result, True, time.time())])
+            latencies.append((time.perf_counter() - t) * 1000)
+        batches = len(results)
+    else:
+        writer = ResultWriter(
+            factory,
+            batch_size=batch_size,
+            flush_interval_ms=interval_ms,
+            journal_dir=journal_dir if mode == "journaled" else None,
+        )
+        writer.start()
+        for file_hash, result in zip(hashes, results):
+            t = time.perf_counter()
+            writer.submit(file_hash, 1000, "bench", result)
+            latencies.append((time.perf_counter() - t) * 1000)
+        writer.flush(timeout=600)
+        writer.close()
+        batches = writer.stats()["batches"]
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 0.99),
+        "per_s": len(results) / elapsed,
+        "batches": batches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--interval-ms", type=float, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="every N-th upload re-uses an earlier hash")
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    results = [make_result(i) for i in range(args.results)]
+    print(f"{args.results} results, batch size {args.batch_size}, flush interval {args.interval_ms:g} ms")
+    print(f"{'mode':>13} {'p50 ms':>8} {'p99 ms':>8} {'results/s':>10} {'commits':>8}")
+    with tempfile.TemporaryDirectory() as scratch:
+        for mode in ("sync", "write-behind", "journaled"):
+            url = args.database_url or f"sqlite:///{Path(scratch) / (mode + '.sqlite3')}"
+            engine = create_engine(url)
+            Base.metadata.create_all(bind=engine)
+            factory = sessionmaker(bind=engine)
+            tag = f"{mode}-{time.time_ns()}"
+            hashes = [
+                f"{tag}-{i // args.repeat if args.repeat and i % args.repeat == 0 else i}" for i in range(args.results)
+            ]
+            row = run(mode, factory, results, hashes, args.batch_size, args.interval_ms, Path(scratch) / "journal")
+            print(f"{mode:>13} {row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['per_s']:>10.0f} {row['batches']:>8}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
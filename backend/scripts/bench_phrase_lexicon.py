@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Benchmark the Aho-Corasick phrase matcher against one str.count per phrase.
+
+Lexicons of synthetic 2-4 word phrases (drawn from the sample paper's
+vocabulary, so many of them hit) are matched against a generated document.
+The matcher scans TextProfile.words, which the pipeline has already built, so
+tokenization is not part of its timing.
+
+Usage: python backend/scripts/bench_phrase_lexicon.py --phrases 10,1000,10000 --size-mb 1
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.services.phrase_lexicon import PhraseMatcher  # noqa: E402
+from backend.app.services.text_profile import TextProfile  # noqa: E402
+
+SAMPLE_PATH = Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt"
+
+
+def make_text(size_mb: float) -> str:
+    base = SAMPLE_PATH.read_text(encoding="utf-8")
+    return base * (int(size_mb * 1024 * 1024) // len(base) + 1)
+
+
+def make_lexicon(vocabulary, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    phrases = set()
+    while len(phrases) < count:
+        phrases.add(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(2, 4))))
+    return [(phrase, 1.0) for phrase in sorted(phrases)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", default="10,1000,10000")
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    args = parser.parse_args()
+
+    text = make_text(args.size_mb)
+    profile = TextProfile.build(text)
+    lowered = text.lower()
+    vocabulary = sorted(set(profile.words))
+
+    print(f"document: {args.size_mb:g}MB, {profile.word_count} words")
+    print(f"{'phrases':>8} {'build s':>9} {'str.count s':>12} {'automaton s':>12} {'speedup':>8}")
+    for count in [int(value) for value in args.phrases.split(",")]:
+        lexicon = make_lexicon(vocabulary, count)
+
+        start = time.perf_counter()
+        matcher = PhraseMatcher(lexicon)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sum(lowered.count(phrase) for phrase, _ in lexicon)
+        naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matcher.score(profile.words)
+        automaton = time.perf_counter() - start
+
+        print(f"{count:>8} {build:>9.3f} {naive:>12.3f} {automaton:>12.3f} {naive / automaton:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
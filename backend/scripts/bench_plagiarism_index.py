@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Plagiarism index load time and query latency at increasing corpus sizes.
+
+Random unit vectors (default 384 dimensions, as all-MiniLM-L6-v2) stand in for
+embedded abstracts, so no encoder is needed. Each query is one document's
+worth of paragraph vectors (--paragraphs) searched for the top-k neighbours.
+"first" is the first query after loading (it faults the mapped pages in);
+p50/p95 are warm latencies. IVF rows need faiss-cpu.
+
+Usage: python backend/scripts/bench_plagiarism_index.py --sizes 10000,100000,1000000 --kinds flat,ivf
+"""
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.services.plagiarism_index import PlagiarismIndex, write_index  # noqa: E402
+
+
+def unit_vectors(rng: np.random.Generator, count: int, dimension: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dimension), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def batches(count: int, dimension: int, seed: int = 0, size: int = 65536):
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, size):
+        rows = min(size, count - start)
+        yield unit_vectors(rng, rows, dimension), [{"title": f"doc {start + i}", "url": ""} for i in range(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--kinds", default="flat,ivf")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--paragraphs", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workdir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    queries = unit_vectors(np.random.default_rng(1), args.paragraphs, args.dimension)
+    print(f"{'vectors':>9} {'kind':>5} {'build s':>8} {'load ms':>8} {'first ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in [int(value) for value in args.sizes.split(",")]:
+        for kind in args.kinds.split(","):
+            directory = Path(args.workdir) / f"bench-plagiarism-{kind}-{size}"
+            try:
+                start = time.perf_counter()
+                write_index(directory, batches(size, args.dimension), "bench", kind=kind)
+                build = time.perf_counter() - start
+            except ImportError:
+                print(f"{size:>9} {kind:>5}  skipped (faiss is not installed)")
+                continue
+
+            start = time.perf_counter()
+            index = PlagiarismIndex(directory)
+            load = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            index.search(queries, args.k)
+            first = (time.perf_counter() - start) * 1000
+
+            latencies = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                index.search(queries, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(
+                f"{size:>9} {kind:>5} {build:>8.1f} {load:>8.2f} {first:>9.1f}"
+                f" {statistics.median(latencies):>8.1f} {p95:>8.1f}"
+            )
+            index.close()
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Overhead of the admin profiling modes of /api/analyze.
+
+Runs the in-process pipeline (the one profiled requests and job workers use)
+on the sample paper repeated to --size-kb, --repeat times each: plain, under
+cProfile, and under the stack sampler. A first table gives the median wall
+time and the overhead of each. A second gives the per-request cost of the
+disabled path (no admin header), which every ordinary request pays.
+
+Usage: python backend/scripts/bench_profiling.py --size-kb 200 --repeat 5
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.api import routes  # noqa: E402
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services import profiling  # noqa: E402
+from backend.app.services.executor import TextRef  # noqa: E402
+
+SAMPLE_PATH = Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sample = SAMPLE_PATH.read_text(encoding="utf-8")
+    text = (sample + "\n\n") * max(1, args.size_kb * 1024 // len(sample))
+    settings.CROSSREF_DISABLE = True
+
+    with tempfile.TemporaryDirectory() as scratch:
+        settings.REPORTS_DIR = Path(scratch) / "reports"
+        settings.REPORTS_DIR.mkdir()
+        settings.PROFILES_DIR = Path(scratch) / "profiles"
+
+        def run(mode: str) -> float:
+            started = time.perf_counter()
+            if mode == "plain":
+                routes._run_pipeline("bench.txt", TextRef(text=text))
+            else:
+                profiling.run_profiled(mode, routes._run_pipeline, "bench.txt", TextRef(text=text))
+            return time.perf_counter() - started
+
+        run("plain")  # warm the models and caches
+        medians = {mode: statistics.median(run(mode) for _ in range(args.repeat)) for mode in ("plain", "cprofile", "sample")}
+        sizes = {path.suffix: path.stat().st_size for path in settings.PROFILES_DIR.iterdir()}
+
+    print(f"pipeline on {len(text) / 1024:.0f} KiB of text, median of {args.repeat}")
+    print(f"{'mode':>9} {'ms':>9} {'overhead':>9}")
+    for mode, seconds in medians.items():
+        print(f"{mode:>9} {seconds * 1000:>9.1f} {seconds / medians['plain'] - 1:>9.1%}")
+    print(f"dump sizes: .pstats {sizes.get('.pstats', 0) / 1024:.0f} KiB, .folded {sizes.get('.folded', 0) / 1024:.0f} KiB")
+
+    calls = 200000
+    started = time.perf_counter()
+    for _ in range(calls):
+        routes._admin_trace(None, None)
+    print(f"disabled path: {(time.perf_counter() - started) / calls * 1e9:.0f} ns per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Cost of recording Prometheus metrics and of scraping GET /metrics.
+
+Times, per call, the recording primitives the request path uses (counter
+increment, histogram observation, in-progress gauge) and the full set one
+/api/analyze request records (HTTP counter, duration and gauge, seven stage
+histograms, upload and text sizes). Then runs --processes processes recording
+concurrently into the same directory (as uvicorn workers do), checks the
+scraped totals add up, and times a scrape.
+
+Usage: python backend/scripts/bench_prometheus.py --calls 200000 --processes 4
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services import prometheus  # noqa: E402
+
+STAGES = (
+    "upload_read",
+    "extract_text",
+    "ai_probability",
+    "plagiarism_score",
+    "citation_validity",
+    "statistical_risk",
+    "write_pdf_report",
+)
+
+
+def _request() -> None:
+    prometheus.HTTP_IN_PROGRESS.inc()
+    prometheus.UPLOAD_BYTES.observe(250_000)
+    for stage in STAGES:
+        prometheus.STAGE_DURATION.observe(0.012, stage=stage)
+    prometheus.TEXT_CHARS.observe(48_000)
+    prometheus.HTTP_IN_PROGRESS.dec()
+    prometheus.HTTP_REQUESTS.inc(method="POST", route="/api/analyze", status="200")
+    prometheus.HTTP_DURATION.observe(0.35, method="POST", route="/api/analyze")
+
+
+def _per_call_us(fn, calls: int) -> float:
+    fn()  # registers the series
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def _worker(directory: str, requests: int) -> None:
+    settings.METRICS_MULTIPROC_DIR = directory
+    for _ in range(requests):
+        _request()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        settings.METRICS_MULTIPROC_DIR = Path(scratch) / "single"
+        rows = [
+            ("counter inc", _per_call_us(lambda: prometheus.HTTP_REQUESTS.inc(method="GET", route="/x", status="200"), args.calls)),
+            ("histogram observe", _per_call_us(lambda: prometheus.STAGE_DURATION.observe(0.01, stage="x"), args.calls)),
+            ("gauge inc+dec", _per_call_us(lambda: (prometheus.HTTP_IN_PROGRESS.inc(), prometheus.HTTP_IN_PROGRESS.dec()), args.calls)),
+            ("one analyze request", _per_call_us(_request, args.calls // 10)),
+        ]
+        print(f"{'recording':>20} {'us/call':>8}")
+        for name, us in rows:
+            print(f"{name:>20} {us:>8.2f}")
+
+        directory = str(Path(scratch) / "shared")
+        requests = args.calls // 10
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=_worker, args=(directory, requests)) for _ in range(args.processes)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - started
+
+        started = time.perf_counter()
+        text = prometheus.render(Path(directory))
+        scrape_ms = (time.perf_counter() - started) * 1000
+        total = next(
+            float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines()
+            if line.startswith('veripaper_http_requests_total{method="POST",route="/api/analyze"')
+        )
+        print(
+            f"{args.processes} processes x {requests} requests in {wall:.2f}s: "
+            f"scraped total {total:.0f} (expected {args.processes * requests}), "
+            f"scrape {scrape_ms:.2f} ms for {len(text.splitlines())} lines"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+/api/analyze latency with the PDF report rendered before vs after the response.
+
+Uploads --uploads distinct copies of the sample paper one after another through
+the ASGI app in-process, with the analysis executor in --mode. "eager" answers
+only once the report is written, as /api/analyze did before rendering moved
+off the request path. "lazy" is the current behaviour: the result comes back
+first and a worker renders the PDF afterwards. Reported: /api/analyze
+p50/p95 latency and how long after the upload started the report was
+downloadable (GET /files/... polled every 10 ms until it stops answering 202).
+
+Usage: python backend/scripts/bench_report_latency.py --uploads 50 --mode process
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx  # noqa: E402
+
+from backend.app.api import routes  # noqa: E402
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.main import app  # noqa: E402
+from backend.app.services.executor import configure_executor  # noqa: E402
+from backend.app.services.reports import wait_for_renders  # noqa: E402
+
+SAMPLE_PATH = Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt"
+lazy_run_analysis = routes._run_analysis
+
+
+async def eager_run_analysis(executor, filename, text_ref):
+    output = await lazy_run_analysis(executor, filename, text_ref)
+    await wait_for_renders(60)  # uploads are sequential, so this is this upload's report
+    return output
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _run(style: str, mode: str, workers: int, uploads: int) -> dict:
+    routes._run_analysis = eager_run_analysis if style == "eager" else lazy_run_analysis
+    executor = configure_executor(mode, workers)
+    executor.start()
+    sample = SAMPLE_PATH.read_bytes()
+
+    latencies, ready = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for i in range(uploads + 1):
+            paper = f"Upload nonce {style} {i} {time.time_ns()}\n\n".encode() + sample
+            start = time.perf_counter()
+            response = await client.post("/api/analyze", files={"file": (f"bench_{i}.txt", paper, "text/plain")})
+            response.raise_for_status()
+            answered = time.perf_counter()
+            while (await client.get(response.json()["report_path"])).status_code == 202:
+                await asyncio.sleep(0.01)
+            if i:  # the first upload warms up the workers
+                latencies.append((answered - start) * 1000)
+                ready.append((time.perf_counter() - start) * 1000)
+
+    await wait_for_renders(60)
+    executor.shutdown()
+    routes._run_analysis = lazy_run_analysis
+    return {
+        "p50": statistics.median(latencies),
+        "p95": _percentile(latencies, 95),
+        "ready": statistics.median(ready),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--mode", default="process", help="analysis executor: process, thread or inline")
+    parser.add_argument("--workers", type=int, default=settings.ANALYSIS_WORKERS)
+    args = parser.parse_args()
+
+    # Every upload is unique, but keep the database tier out of the measurement.
+    settings.RESULT_CACHE_PERSISTENT = False
+    settings.CROSSREF_DISABLE = True
+
+    print(f"{args.uploads} sequential uploads, {args.mode} executor, {args.workers} workers\n")
+    print(f"{'report':<7} {'analyze p50':>12} {'p95':>9} {'PDF ready p50':>14}")
+    for style in ("eager", "lazy"):
+        row = asyncio.run(_run(style, args.mode, args.workers, args.uploads))
+        print(f"{style:<7} {row['p50']:>10.1f}ms {row['p95']:>7.1f}ms {row['ready']:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Full-precision vs dynamically quantized (int8) sentence encoder on the CPU.
+
+Each mode is loaded in its own spawned process so its resident memory is not
+mixed with the other's. Per mode: load time, RSS after loading and after
+encoding, p50/p95 latency of encoding one document's paragraphs at a time
+(--paragraphs per call, as the API does) and corpus throughput. Agreement with
+the fp32 model: mean cosine between the fp32 and int8 vector of each text, and
+top-k overlap when the int8 query vectors search the fp32-encoded corpus (the
+deployed setup, since index builds stay full precision) and the int8 corpus.
+
+Corpus: abstracts of --corpus (default ARXIV_DATASET_PATH); queries: paragraphs
+of --queries (default backend/data/sample_paper.txt) plus the corpus texts.
+
+Usage: python backend/scripts/bench_sentence_encoder.py --corpus abstracts.jsonl --k 10
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services.plagiarism_index import iter_corpus  # noqa: E402
+from backend.app.services.text_profile import normalize_paragraph  # noqa: E402
+
+
+def rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(model: str, quantize: str, corpus, queries, paragraphs: int, threads: int) -> dict:
+    import torch
+
+    torch.set_num_threads(threads)
+    from backend.app.services.embeddings import SentenceEncoder
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    encoder = SentenceEncoder(model, quantize=quantize)
+    encoder.encode(["warm up"])
+    load = time.perf_counter() - start
+    loaded = rss_mb()
+
+    latencies = []
+    for offset in range(0, len(queries), paragraphs):
+        start = time.perf_counter()
+        encoder.encode(queries[offset : offset + paragraphs])
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    corpus_vectors = encoder.encode(corpus)
+    throughput = len(corpus) / (time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "load_s": load,
+        "rss_loaded_mb": loaded - baseline,
+        "rss_peak_mb": rss_mb() - baseline,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "texts_per_s": throughput,
+        "corpus": corpus_vectors,
+        "queries": encoder.encode(queries),
+    }
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def overlap(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean([len(set(x) & set(y)) / len(x) for x, y in zip(a, b)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.SBERT_MODEL)
+    parser.add_argument("--corpus", default=str(settings.ARXIV_DATASET_PATH))
+    parser.add_argument("--queries", default=str(Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt"))
+    parser.add_argument("--limit", type=int, default=20000, help="max corpus abstracts")
+    parser.add_argument("--paragraphs", type=int, default=32, help="paragraphs per encode call")
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    corpus = [record["abstract"] for _, record in zip(range(args.limit), iter_corpus(args.corpus))]
+    paragraphs = [normalize_paragraph(p) for p in Path(args.queries).read_text(encoding="utf-8").split("\n")]
+    queries = [p for p in paragraphs if len(p) >= settings.PLAGIARISM_MIN_PARAGRAPH_CHARS]
+    queries += [normalize_paragraph(text) for text in corpus]
+    k = min(args.k, len(corpus))
+    print(f"{args.model}: {len(corpus)} corpus abstracts, {len(queries)} query paragraphs, top-{k}")
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for mode in ("none", "int8"):
+        with context.Pool(1) as pool:
+            results[mode] = pool.apply(
+                measure, (args.model, mode, corpus, queries, args.paragraphs, args.threads)
+            )
+
+    print(f"{'mode':>5} {'load s':>7} {'RSS MB':>7} {'peak MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>8}")
+    for mode, result in results.items():
+        print(
+            f"{'fp32' if mode == 'none' else mode:>5} {result['load_s']:>7.1f} {result['rss_loaded_mb']:>7.0f} "
+            f"{result['rss_peak_mb']:>8.0f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['texts_per_s']:>8.0f}"
+        )
+
+    full, quantized = results["none"], results["int8"]
+    cosine = np.sum(full["queries"] * quantized["queries"], axis=1)
+    reference = top_k(full["queries"], full["corpus"], k)
+    print(f"cosine(fp32, int8) per text: mean {cosine.mean():.4f}, min {cosine.min():.4f}")
+    print(f"top-{k} overlap, int8 queries vs fp32 corpus: {overlap(reference, top_k(quantized['queries'], full['corpus'], k)):.3f}")
+    print(f"top-{k} overlap, int8 queries vs int8 corpus: {overlap(reference, top_k(quantized['queries'], quantized['corpus'], k)):.3f}")
+    margin = settings.PLAGIARISM_MIN_SIMILARITY
+    flips = np.mean((full["queries"] @ full["corpus"].T >= margin) != (quantized["queries"] @ full["corpus"].T >= margin))
+    print(f"query/corpus pairs crossing PLAGIARISM_MIN_SIMILARITY={margin}: {flips:.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Benchmark the shared TextProfile against the per-analyzer rescans it replaced.
+
+"legacy" re-implements the pre-TextProfile analyzers, each scanning the raw
+text independently; "profile" builds one TextProfile and runs the current
+analyzers on it. A second table isolates the citation check on a long paper
+(the sample's body repeated, then a --references entry bibliography): the old
+scan over every line and every year of the text against locating the
+reference section and parsing its entries (cold, then with the entry cache
+warm as for a resubmission).
+
+Usage: python backend/scripts/bench_text_profile.py --sizes-mb 1,10 --repeat 3
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.api import routes  # noqa: E402
+from backend.app.services.references import SECTION_HEADING, parse_entry, parse_references  # noqa: E402
+from backend.app.services.text_profile import TextProfile  # noqa: E402
+
+SAMPLE_PATH = Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt"
+KEYWORDS = ["we propose", "in this paper", "state-of-the-art", "novel framework", "significant improvement"]
+
+
+def legacy_analysis(text: str) -> None:
+    lowered = text.lower()
+    words = re.findall(r"\b[a-zA-Z]{2,}\b", lowered)
+    len(set(words))
+    len(re.findall(r"[.!?]", text))
+    len(re.findall(r"[;:,]", text))
+    sum(lowered.count(token) for token in KEYWORDS)
+
+    paragraphs = [part.strip() for part in re.split(r"\n\s*\n", text) if part.strip()]
+    normalized = [re.sub(r"\s+", " ", p.lower()) for p in paragraphs]
+    len(set(normalized))
+    len(re.findall(r'"[^"]{40,}"', text))
+
+    dois = re.findall(r"10\.\d{4,9}/[-._;()/:A-Za-z0-9]+", text)
+    sorted(set(doi.rstrip(".,;") for doi in dois))
+    [line for line in text.splitlines() if "doi" in line.lower() or "http" in line.lower()]
+    [int(year) for year in re.findall(r"\b(19\d{2}|20\d{2})\b", text)]
+
+    [float(val) for val in re.findall(r"p\s*[<=>]\s*(0?\.\d+)", text.lower())]
+    [p[:220] for p in text.split("\n\n") if len(p) > 220][:3]
+
+
+def profile_analysis(text: str) -> None:
+    profile = TextProfile.build(text)
+    routes._ai_probability(profile)
+    routes._plagiarism_score(profile, [])
+    routes._citation_validity(profile)
+    routes._statistical_risk(profile)
+    [p[:220] for p in profile.paragraphs if len(p) > 220][:3]
+
+
+def make_text(size_mb: float) -> str:
+    base = SAMPLE_PATH.read_text(encoding="utf-8")
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    total = 0
+    index = 0
+    while total < target:
+        chunk = base.replace("10.1234/example", f"10.1234/example{index}") + f'\n\n"Quoted passage number {index} that runs past forty characters." p = 0.0{index % 9 + 1}\n\n'
+        parts.append(chunk)
+        total += len(chunk)
+        index += 1
+    return "".join(parts)
+
+
+def make_paper(size_mb: float, references: int) -> str:
+    body = SAMPLE_PATH.read_text(encoding="utf-8").split("\nReferences\n")[0]
+    body = (body + "\n\n") * max(1, int(size_mb * 1024 * 1024 / (len(body) + 2)))
+    entries = [
+        f"[{i}] A. Author{i} and B. Writer, \"On result number {i} in the\nliterature,\" J. Stud., vol. {i % 40}, "
+        f"pp. 1-10, {1990 + i % 35}. doi: 10.1234/ref.{i}"
+        for i in range(1, references + 1)
+    ]
+    return body + "References\n" + "\n".join(entries) + "\n"
+
+
+def legacy_citations(text: str) -> None:
+    lines = [line for line in text.splitlines() if "doi" in line.lower() or "http" in line.lower()]
+    [line[:80] for line in lines if "doi" not in line.lower()][:5]
+    [int(year) for year in re.findall(r"(?<!\w)((?:19|20)\d\d)\b", text)]
+
+
+def section_citations(text: str) -> None:
+    bibliography = ""
+    for heading in SECTION_HEADING.finditer("\n" + text):
+        if heading.group("bibliography"):
+            bibliography = text[heading.end() - 1 :]
+    entries = parse_references(bibliography)
+    [entry.raw[:80] for entry in entries if not entry.doi][:5]
+    [entry.year for entry in entries if entry.year]
+
+
+def cold_section_citations(text: str) -> None:
+    parse_entry.cache_clear()
+    section_citations(text)
+
+
+def best_of(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="1,10")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--references", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'legacy s':>10} {'profile s':>10} {'speedup':>8}")
+    for size in [float(value) for value in args.sizes_mb.split(",")]:
+        text = make_text(size)
+        legacy = best_of(legacy_analysis, text, args.repeat)
+        profile = best_of(profile_analysis, text, args.repeat)
+        print(f"{size:>4.0f}MB {legacy:>10.3f} {profile:>10.3f} {legacy / profile:>7.2f}x")
+
+    print(f"\ncitation check, {args.references} references")
+    print(f"{'size':>6} {'legacy ms':>10} {'cold ms':>10} {'warm ms':>10} {'speedup':>8}")
+    for size in [float(value) for value in args.sizes_mb.split(",")]:
+        text = make_paper(size, args.references)
+        legacy = best_of(legacy_citations, text, args.repeat)
+        cold = best_of(cold_section_citations, text, args.repeat)
+        warm = best_of(section_citations, text, args.repeat)
+        print(f"{size:>4.0f}MB {legacy * 1000:>10.1f} {cold * 1000:>10.1f} {warm * 1000:>10.1f} {legacy / cold:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Build the offline DOI registry from a DOI dump.
+
+The dump has one DOI per line, optionally followed by a tab or comma and the
+publication year, or JSON lines with "DOI" and "year" (or CrossRef's "issued").
+It may be gzipped. DOIs are normalized, sorted externally in runs of 2M,
+deduplicated and written with a Bloom filter sized for
+DOI_REGISTRY_FALSE_POSITIVE_RATE to DOI_REGISTRY_DIR (or --output). The result
+is swapped in atomically. API and analysis workers map the new registry when
+they restart.
+
+Usage: python backend/scripts/build_doi_registry.py --dump crossref-dois.tsv.gz
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services.doi_registry import build_registry, iter_doi_dump  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dump", required=True)
+    parser.add_argument("--output", default=str(settings.DOI_REGISTRY_DIR))
+    parser.add_argument("--false-positive-rate", type=float, default=settings.DOI_REGISTRY_FALSE_POSITIVE_RATE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build_registry(
+        iter_doi_dump(args.dump), args.output, args.false_positive_rate, source=Path(args.dump).name
+    )
+    print(
+        f"Registered {manifest['count']} DOIs ({manifest['bloom_bits'] // 8 / 2**20:.1f} MiB Bloom filter, "
+        f"{manifest['bloom_hashes']} hashes) into {args.output} in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
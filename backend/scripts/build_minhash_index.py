@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Build the near-duplicate (MinHash/LSH) plagiarism index from a JSON-lines corpus.
+
+Each line needs "abstract" and should carry "title" and "url". Band, row and
+shingle parameters default to MINHASH_BANDS / MINHASH_ROWS / MINHASH_SHINGLE_WORDS.
+The index is written to MINHASH_INDEX_DIR (or --output) as a root with a single
+segment and swapped in atomically. Add or remove abstracts later with
+update_plagiarism_index.py instead of rebuilding.
+
+Usage: python backend/scripts/build_minhash_index.py --corpus backend/data/arxiv_abstracts.jsonl
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services.index_segments import create_index  # noqa: E402
+from backend.app.services.minhash_index import MinHashParams, build_index  # noqa: E402
+from backend.app.services.plagiarism_index import iter_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(settings.ARXIV_DATASET_PATH))
+    parser.add_argument("--output", default=str(settings.MINHASH_INDEX_DIR))
+    parser.add_argument("--bands", type=int, default=settings.MINHASH_BANDS)
+    parser.add_argument("--rows", type=int, default=settings.MINHASH_ROWS)
+    parser.add_argument("--shingle-words", type=int, default=settings.MINHASH_SHINGLE_WORDS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    params = MinHashParams(args.bands, args.rows, args.shingle_words)
+    manifest = {}
+
+    def build(directory: Path) -> int:
+        manifest.update(build_index(iter_corpus(args.corpus), directory, params))
+        return manifest["documents"]
+
+    create_index(args.output, build)
+    print(
+        f"Indexed {manifest['paragraphs']} paragraphs of {manifest['documents']} abstracts "
+        f"({params.bands} bands x {params.rows} rows, threshold ~{params.threshold:.2f}) "
+        f"into {args.output} in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Build the semantic plagiarism index from a JSON-lines corpus of abstracts.
+
+Each line needs "abstract" and should carry "title" and "url". The index is
+written to PLAGIARISM_INDEX_DIR (or --output) as a root with a single segment
+and swapped in atomically; API workers load it at startup. Add or remove
+abstracts later with update_plagiarism_index.py instead of rebuilding.
+
+Usage: python backend/scripts/build_plagiarism_index.py --corpus backend/data/arxiv_abstracts.jsonl
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services.embeddings import SentenceEncoder  # noqa: E402
+from backend.app.services.index_segments import create_index  # noqa: E402
+from backend.app.services.plagiarism_index import build_index, iter_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(settings.ARXIV_DATASET_PATH))
+    parser.add_argument("--output", default=str(settings.PLAGIARISM_INDEX_DIR))
+    parser.add_argument("--model", default=settings.SBERT_MODEL)
+    parser.add_argument("--kind", choices=["auto", "flat", "ivf"], default="auto")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    encoder = SentenceEncoder(args.model)
+    segment = {}
+
+    def build(directory: Path) -> int:
+        segment.update(build_index(iter_corpus(args.corpus), encoder, directory, args.kind, args.batch_size))
+        return segment["count"]
+
+    create_index(args.output, build)
+    print(
+        f"Indexed {segment['count']} abstracts ({segment['kind']}, dim {segment['dimension']}) "
+        f"into {args.output} in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
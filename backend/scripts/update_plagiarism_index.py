@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Update the plagiarism corpus indexes in place, without a rebuild or an API restart.
+
+  append   add the abstracts of a JSON-lines file as a new delta segment
+  remove   tombstone documents by URL (or by title for records without one)
+  compact  merge segments and drop tombstoned documents now, instead of waiting
+           for the API's background compactor
+  status   list the segments of each index
+
+--indexes picks the semantic (PLAGIARISM_INDEX_DIR) and/or near-duplicate
+(MINHASH_INDEX_DIR) index; both must already exist (see the build scripts).
+Running API workers pick the change up within INDEX_REFRESH_SECONDS.
+
+Usage: python backend/scripts/update_plagiarism_index.py append --corpus new_abstracts.jsonl
+       python backend/scripts/update_plagiarism_index.py remove --key https://arxiv.org/abs/0000.00002
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services import minhash_index, plagiarism_index  # noqa: E402
+from backend.app.services.index_segments import (  # noqa: E402
+    append_segment,
+    compact,
+    read_segments,
+    remove_documents,
+)
+
+INDEXES = {
+    "semantic": (settings.PLAGIARISM_INDEX_DIR, plagiarism_index.merge_segments),
+    "minhash": (settings.MINHASH_INDEX_DIR, minhash_index.merge_segments),
+}
+
+
+def segment_builder(name: str, corpus: str, batch_size: int):
+    if name == "semantic":
+        from backend.app.services.embeddings import SentenceEncoder
+
+        encoder = SentenceEncoder(settings.SBERT_MODEL)
+        return lambda directory: plagiarism_index.build_index(
+            plagiarism_index.iter_corpus(corpus), encoder, directory, batch_size=batch_size
+        )["count"]
+    return lambda directory: minhash_index.build_index(plagiarism_index.iter_corpus(corpus), directory)["documents"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["append", "remove", "compact", "status"])
+    parser.add_argument("--indexes", default="semantic,minhash")
+    parser.add_argument("--corpus", help="JSON-lines abstracts to append")
+    parser.add_argument("--key", action="append", default=[], help="URL (or title) of a document to remove")
+    parser.add_argument("--keys-file", help="file with one URL (or title) per line to remove")
+    parser.add_argument("--force", action="store_true", help="compact even below the configured thresholds")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    keys = list(args.key)
+    if args.keys_file:
+        keys += [line.strip() for line in Path(args.keys_file).read_text(encoding="utf-8").splitlines() if line.strip()]
+    if args.command == "append" and not args.corpus:
+        parser.error("append needs --corpus")
+    if args.command == "remove" and not keys:
+        parser.error("remove needs --key or --keys-file")
+
+    for name in args.indexes.split(","):
+        root, merge = INDEXES[name]
+        if read_segments(root) is None:
+            print(f"{name}: no segmented index at {root}; build it first")
+            continue
+        start = time.perf_counter()
+        if args.command == "append":
+            segment = append_segment(root, segment_builder(name, args.corpus, args.batch_size))
+            print(f"{name}: appended {segment or 'nothing (no abstracts)'}", end="")
+        elif args.command == "remove":
+            print(f"{name}: tombstoned {remove_documents(root, keys)} document(s)", end="")
+        elif args.command == "compact":
+            print(f"{name}: compacted into {compact(root, merge, force=args.force) or 'nothing (up to date)'}", end="")
+        else:
+            manifest = read_segments(root)
+            print(f"{name}: generation {manifest['generation']}, {len(manifest['segments'])} segment(s)")
+            for segment in manifest["segments"]:
+                tombstoned = len(manifest["tombstones"].get(segment["name"], []))
+                print(f"  {segment['name']}  {segment['documents']:>9} documents  {tombstoned:>7} tombstoned")
+            continue
+        print(f" in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
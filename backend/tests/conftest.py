@@ -0,0 +1,9 @@
+import pytest
+
+from backend.app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def _no_crossref_lookups(monkeypatch):
+    """Keep the suite off the network; CrossRef tests point the resolver at a local stub."""
+    monkeypatch.setattr(settings, "CROSSREF_DISABLE", True)
@@ -49,3 +49,14 @@ def test_analyze_rejects_empty_file() -> None:
         files={"file": ("sample.txt", b"", "text/plain")},
     )
     assert response.status_code == 400
+
+
+def test_analyze_rejects_oversized_upload() -> None:
+    from backend.app.core.config import settings
+
+    oversized = b"a" * ((settings.MAX_UPLOAD_SIZE_MB + 1) * 1024 * 1024)
+    response = client.post(
+        "/api/analyze",
+        files={"file": ("sample.txt", oversized, "text/plain")},
+    )
+    assert response.status_code == 413
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+
+import pytest
+
+from backend.app.services import artifacts
+from backend.app.services.artifacts import ProcessWide, publish_directory, remove_published
+
+
+def _published(tmp_path) -> list:
+    return sorted(path.name for path in tmp_path.iterdir())
+
+
+def test_failed_build_leaves_the_published_directory_alone(tmp_path) -> None:
+    target = tmp_path / "index"
+    with publish_directory(target) as staging:
+        (staging / "manifest.json").write_text("first")
+
+    with pytest.raises(RuntimeError):
+        with publish_directory(target) as staging:
+            (staging / "manifest.json").write_text("second")
+            raise RuntimeError("build interrupted")
+    assert (target / "manifest.json").read_text() == "first"
+
+    with publish_directory(target) as staging:
+        assert not (staging / "manifest.json").exists()
+        (staging / "manifest.json").write_text("third")
+    assert (target / "manifest.json").read_text() == "third"
+    assert _published(tmp_path) == sorted(["index", os.readlink(target)])  # the replaced version is gone
+
+    remove_published(target)
+    assert _published(tmp_path) == []
+
+
+def test_crash_before_the_swap_keeps_the_previous_version(tmp_path, monkeypatch) -> None:
+    target = tmp_path / "index"
+    with publish_directory(target) as staging:
+        (staging / "manifest.json").write_text("first")
+
+    def crash(source, destination):
+        raise KeyboardInterrupt  # the process dies between building and publishing
+
+    monkeypatch.setattr(artifacts.os, "replace", crash)
+    with pytest.raises(KeyboardInterrupt):
+        with publish_directory(target) as staging:
+            (staging / "manifest.json").write_text("second")
+    assert (target / "manifest.json").read_text() == "first"
+
+
+def test_readers_always_find_a_whole_artifact(tmp_path) -> None:
+    target = tmp_path / "index"
+    with publish_directory(target) as staging:
+        (staging / "manifest.json").write_text("0")
+    missing = []
+    done = threading.Event()
+
+    def read() -> None:
+        while not done.is_set():
+            try:
+                (target / "manifest.json").read_text()
+            except FileNotFoundError:
+                missing.append(True)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for number in range(1, 50):
+            with publish_directory(target) as staging:
+                (staging / "manifest.json").write_text(str(number))
+    finally:
+        done.set()
+        reader.join()
+    assert not missing and (target / "manifest.json").read_text() == "49"
+
+
+def test_plain_directories_are_moved_to_versions_and_segments_are_renamed(tmp_path) -> None:
+    legacy = tmp_path / "registry"
+    legacy.mkdir()
+    (legacy / "manifest.json").write_text("legacy")
+    with publish_directory(legacy) as staging:
+        (staging / "manifest.json").write_text("versioned")
+    assert legacy.is_symlink() and (legacy / "manifest.json").read_text() == "versioned"
+    assert _published(tmp_path) == sorted(["registry", os.readlink(legacy)])
+
+    segment = tmp_path / "segment"
+    with publish_directory(segment, versioned=False) as staging:
+        (staging / "manifest.json").write_text("segment")
+    assert not segment.is_symlink() and (segment / "manifest.json").read_text() == "segment"
+    with pytest.raises(OSError):
+        with publish_directory(segment, versioned=False) as staging:
+            (staging / "manifest.json").write_text("again")
+
+
+def test_concurrent_first_use_loads_once() -> None:
+    calls = []
+
+    def load(directory):
+        calls.append(directory)
+        time.sleep(0.05)
+        return "artifact"
+
+    handle = ProcessWide(load, "test artifact")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(handle.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["artifact"] * 8 and calls == [None]
+
+    handle.configure(None)
+    assert handle.get() is None
+    assert handle.load("elsewhere") == "artifact" and handle.get() == "artifact"
+
+
+def test_a_failing_load_disables_the_artifact() -> None:
+    def load(directory):
+        raise OSError("unreadable")
+
+    handle = ProcessWide(load, "test artifact")
+    assert handle.get() is None
+    assert handle.get() is None
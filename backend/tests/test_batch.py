@@ -0,0 +1,57 @@
+import io
+import json
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+
+
+client = TestClient(app)
+
+
+def _lines(response) -> list:
+    return [json.loads(line) for line in response.text.splitlines() if line.strip()]
+
+
+def test_batch_streams_one_line_per_file_with_inline_errors() -> None:
+    files = [
+        ("files", ("a.txt", b"In this paper we propose a method.\n\nSee doi 10.1000/batch-a", "text/plain")),
+        ("files", ("b.exe", b"binary", "application/octet-stream")),
+        ("files", ("c.txt", b"", "text/plain")),
+        ("files", ("d.txt", b"A second paper about statistics, p = 0.049.", "text/plain")),
+    ]
+    response = client.post("/api/analyze/batch", files=files)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = sorted(_lines(response), key=lambda line: line["index"])
+    assert [line["status"] for line in lines] == ["ok", "error", "error", "ok"]
+    assert lines[0]["result"]["filename"] == "a.txt"
+    assert lines[1]["status_code"] == 400
+    assert lines[3]["result"]["report_path"].startswith("/files/")
+
+
+def test_batch_accepts_zip_archive() -> None:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("track/p1.txt", "We propose a novel framework.\n\nReferences: doi 10.1000/zip1")
+        archive.writestr("track/p2.txt", "State-of-the-art results with significant improvement.")
+        archive.writestr("track/notes.md", "not a paper")
+    response = client.post(
+        "/api/analyze/batch",
+        files=[("files", ("track.zip", buffer.getvalue(), "application/zip"))],
+    )
+    assert response.status_code == 200
+    by_name = {line["filename"]: line for line in _lines(response)}
+    assert by_name["track/p1.txt"]["status"] == "ok"
+    assert by_name["track/p2.txt"]["status"] == "ok"
+    assert by_name["track/notes.md"]["status"] == "error"
+
+
+def test_batch_rejects_corrupt_zip() -> None:
+    response = client.post(
+        "/api/analyze/batch",
+        files=[("files", ("track.zip", b"PK-not-really", "application/zip"))],
+    )
+    assert response.status_code == 400
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services.crossref import ERROR, NOT_FOUND, RESOLVED, DoiCache, DoiResolver
+
+
+KNOWN = {"10.1000/known.1": ("A Known Paper", 2019), "10.1000/known.2": ("Another Paper", 2021)}
+
+
+class StubCrossRef(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, failing=()):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.delay = delay
+        self.failing = set(failing)
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/works/"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        doi = unquote(self.path[len("/works/"):])
+        with server.lock:
+            server.requests.append(doi)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        if doi in server.failing:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if doi not in KNOWN:
+            self.send_response(404)
+            self.end_headers()
+            return
+        title, year = KNOWN[doi]
+        body = json.dumps({"status": "ok", "message": {"title": [title], "issued": {"date-parts": [[year, 3]]}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**kwargs):
+        server = StubCrossRef(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_concurrent_lookups_are_bounded_deduplicated_and_never_block_the_loop(stub, tmp_path) -> None:
+    server = stub(delay=0.05)
+    dois = [f"10.1000/unknown.{i}" for i in range(12)] + list(KNOWN)
+
+    async def scenario():
+        resolver = DoiResolver(server.url, cache=DoiCache(tmp_path / "dois.sqlite3"), max_concurrency=4)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        first, second = await asyncio.gather(
+            resolver.resolve_many(dois), resolver.resolve_many([doi.upper() + "." for doi in reversed(dois)])
+        )
+        ticking.cancel()
+        await resolver.aclose()
+        return resolver, first, second, ticks
+
+    resolver, first, second, ticks = asyncio.run(scenario())
+
+    assert sorted(server.requests) == sorted(dois)  # each DOI fetched once, however it was spelled
+    assert server.max_active <= 4
+    assert resolver.stats()["shared_inflight"] == len(dois)
+    assert first == second
+    assert first["10.1000/known.1"].status == RESOLVED
+    assert (first["10.1000/known.1"].title, first["10.1000/known.1"].year) == ("A Known Paper", 2019)
+    assert first["10.1000/unknown.3"].status == NOT_FOUND
+    assert ticks >= 10  # four rounds of 50 ms lookups; the loop kept running throughout
+
+
+def test_outcomes_persist_across_resolvers_but_errors_do_not(stub, tmp_path, monkeypatch) -> None:
+    server = stub(failing={"10.1000/flaky"})
+    dois = ["10.1000/known.1", "10.1000/unknown.1", "10.1000/flaky"]
+
+    async def resolve(name="dois.sqlite3"):
+        resolver = DoiResolver(server.url, cache=DoiCache(tmp_path / name))
+        try:
+            return await resolver.resolve_many(dois)
+        finally:
+            await resolver.aclose()
+
+    first = asyncio.run(resolve())
+    second = asyncio.run(resolve())
+    assert [first[doi].status for doi in dois] == [RESOLVED, NOT_FOUND, ERROR]
+    assert second == first
+    assert sorted(server.requests) == sorted(dois + ["10.1000/flaky"])
+
+    server.requests.clear()
+    monkeypatch.setattr(settings, "CROSSREF_NEGATIVE_TTL_SECONDS", 0)
+    asyncio.run(resolve("expiring.sqlite3"))
+    asyncio.run(resolve("expiring.sqlite3"))  # the 404 expired at once; the resolved DOI did not
+    assert sorted(server.requests) == sorted(dois + ["10.1000/unknown.1", "10.1000/flaky"])
+
+
+def test_deadline_returns_errors_and_lets_lookups_finish_into_the_cache(stub, tmp_path) -> None:
+    server = stub(delay=0.3)
+    cache = DoiCache(tmp_path / "dois.sqlite3")
+
+    async def scenario():
+        resolver = DoiResolver(server.url, cache=cache, deadline_seconds=0.05)
+        early = await resolver.resolve_many(["10.1000/known.2"])
+        await asyncio.sleep(0.5)
+        await resolver.aclose()
+        return early
+
+    assert asyncio.run(scenario())["10.1000/known.2"].status == ERROR
+    assert cache.get_many(["10.1000/known.2"])["10.1000/known.2"].status == RESOLVED
+
+
+def test_analysis_counts_dois_crossref_does_not_know_as_invalid(stub, tmp_path, monkeypatch) -> None:
+    server = stub()
+    monkeypatch.setattr(settings, "CROSSREF_DISABLE", False)
+    monkeypatch.setattr(settings, "CROSSREF_API_URL", server.url)
+    monkeypatch.setattr(settings, "CROSSREF_CACHE_PATH", "")
+    paper = (
+        b"We revisit a benchmark result and report a crossref integration check.\n\n"
+        b"References\ndoi: 10.1000/known.1\ndoi: 10.1000/retracted.9\n"
+    )
+
+    response = TestClient(app).post("/api/analyze", files={"file": ("crossref.txt", paper, "text/plain")})
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["citation_invalid_dois"] == ["10.1000/retracted.9"]
+    assert payload["citation_validity_score"] == 50
+    assert sorted(server.requests) == ["10.1000/known.1", "10.1000/retracted.9"]
@@ -0,0 +1,73 @@
+import io
+import tracemalloc
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.services.docx_extract import DOCX_FORMAT, iter_paragraphs, profile_docx
+from backend.app.services.executor import TextRef
+
+
+client = TestClient(app)
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _make_docx(paragraphs_xml: str) -> bytes:
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{W_NS}"><w:body>{paragraphs_xml}<w:sectPr/></w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def _paragraph(text: str) -> str:
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def test_paragraphs_join_runs_tabs_breaks_and_table_cells() -> None:
+    data = _make_docx(
+        "<w:p><w:r><w:t>In this </w:t></w:r><w:r><w:t>paper</w:t><w:tab/><w:t>we propose</w:t></w:r></w:p>"
+        "<w:p/>"
+        "<w:p><w:r><w:t>Line one</w:t><w:br/><w:t>line two</w:t></w:r></w:p>"
+        f"<w:tbl><w:tr><w:tc>{_paragraph('Cell text')}</w:tc></w:tr></w:tbl>"
+    )
+    assert list(iter_paragraphs(TextRef(data=data, format=DOCX_FORMAT))) == [
+        "In this paper\twe propose",
+        "Line one\nline two",
+        "Cell text",
+    ]
+
+
+def test_docx_paragraphs_feed_plagiarism_paragraphs() -> None:
+    repeated = "This paragraph is copied verbatim into the manuscript twice."
+    data = _make_docx(_paragraph(repeated) + _paragraph("A unique paragraph.") + _paragraph(repeated))
+    profile = profile_docx(TextRef(data=data, format=DOCX_FORMAT))
+    assert profile.paragraphs == [repeated, "A unique paragraph.", repeated]
+
+    response = client.post("/api/analyze", files={"file": ("paper.docx", data, "application/octet-stream")})
+    assert response.status_code == 200
+    assert response.json()["plagiarism_score"] > 0
+
+
+def test_corrupt_docx_is_rejected() -> None:
+    response = client.post("/api/analyze", files={"file": ("broken.docx", b"PK not a zip", "application/octet-stream")})
+    assert response.status_code == 400
+
+
+def test_parsing_memory_stays_flat_for_long_documents() -> None:
+    body = "".join(_paragraph(f"Paragraph {index} of a very long manuscript about methods.") for index in range(40000))
+    data = _make_docx(body)
+    text_ref = TextRef(data=data, format=DOCX_FORMAT)
+
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in iter_paragraphs(text_ref))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 40000
+    assert len(body) > 3 * 2**20
+    assert peak < 2**20  # the parsed tree is discarded paragraph by paragraph
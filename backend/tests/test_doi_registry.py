@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+
+import numpy as np
+import pytest
+
+from backend.app.api import routes
+from backend.app.core.config import settings
+from backend.app.services import doi_registry
+from backend.app.services.doi_registry import (
+    DoiRegistry,
+    build_registry,
+    configure_doi_registry,
+    iter_doi_dump,
+)
+from backend.app.services.executor import TextRef
+from backend.app.services.text_profile import TextProfile
+
+
+@pytest.fixture(autouse=True)
+def _no_process_wide_registry():
+    yield
+    configure_doi_registry(None)
+
+
+def _registry(tmp_path, entries):
+    build_registry(entries, tmp_path / "registry")
+    return DoiRegistry(tmp_path / "registry")
+
+
+def test_dump_formats_and_duplicates_build_one_sorted_table(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(doi_registry, "RUN_ENTRIES", 3)  # force several runs through the external merge
+    dump = tmp_path / "dois.gz"
+    with gzip.open(dump, "wt", encoding="utf-8") as handle:
+        handle.write("10.1000/Alpha.1\t2018\n10.1000/beta.2,2020\n10.1000/gamma.3\n\n")
+        handle.write(json.dumps({"DOI": "10.1000/ALPHA.1"}) + "\n")
+        handle.write(json.dumps({"DOI": "10.1000/delta.4", "issued": {"date-parts": [[2015, 6]]}}) + "\n")
+        handle.write("10.1000/gamma.3\t2011\n10.1000/epsilon.5\tn/a\n")
+
+    registry = _registry(tmp_path, iter_doi_dump(dump))
+
+    assert len(registry) == 5
+    assert registry.lookup("10.1000/alpha.1") == (True, 2018)
+    assert registry.lookup("10.1000/GAMMA.3.") == (True, 2011)  # year from a later duplicate, trailing dot dropped
+    assert registry.lookup("10.1000/delta.4") == (True, 2015)
+    assert registry.lookup("10.1000/epsilon.5") == (True, None)
+    assert registry.lookup("10.1000/zeta.6") == (False, None)
+    assert "10.1000/beta.2" in registry and "10.1000/beta" not in registry
+    table = (tmp_path / "registry" / "dois.bin").read_bytes()
+    offsets = np.load(tmp_path / "registry" / "dois.offsets.npy")
+    keys = [table[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+    assert keys == sorted(keys) and len(set(keys)) == 5
+    assert not list((tmp_path / "registry").glob("*.raw"))
+    assert [path.name for path in tmp_path.glob("registry.*")] == [os.readlink(tmp_path / "registry")]
+    registry.close()
+
+
+def test_bloom_filter_rejects_unknown_dois_at_about_the_configured_rate(tmp_path) -> None:
+    registry = _registry(tmp_path, ((f"10.5555/known.{i}", 2000 + i % 20) for i in range(20000)))
+
+    assert all(f"10.5555/known.{i}" in registry for i in range(0, 20000, 97))
+    unknown = [f"10.5555/unknown.{i}".encode() for i in range(20000)]
+    false_positives = sum(registry.might_contain(key) for key in unknown) / len(unknown)
+    assert false_positives < settings.DOI_REGISTRY_FALSE_POSITIVE_RATE * 2
+    assert not any(f"10.5555/unknown.{i}" in registry for i in range(2000))
+    registry.close()
+
+
+def test_empty_registry_answers_nothing(tmp_path) -> None:
+    registry = _registry(tmp_path, [])
+    assert len(registry) == 0 and "10.1000/anything" not in registry
+    registry.close()
+
+
+PAPER = (
+    "We revisit a benchmark.\n\n"
+    "References\n"
+    "Smith (2019). A result. doi: 10.1000/registered.1\n"
+    "Jones (2012). Another result. doi: 10.1000/registered.2\n"
+    "Doe (2020). Made up. doi: 10.1000/fabricated.3\n"
+)
+
+
+def test_offline_citation_check_uses_registry_existence_and_years(tmp_path) -> None:
+    configure_doi_registry(_registry(tmp_path, [("10.1000/registered.1", 2018), ("10.1000/registered.2", 2016)]))
+
+    validity, invalid, _, mismatches = routes._citation_validity(
+        TextProfile.build(PAPER), routes._check_doi_registry(TextProfile.build(PAPER))
+    )
+
+    assert invalid == ["10.1000/fabricated.3"]
+    assert validity == 67
+    assert mismatches == ["10.1000/registered.2: cited 2012, registered 2016"]
+
+
+def test_registered_dois_skip_crossref_and_the_rest_wait_for_it(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "CROSSREF_DISABLE", False)
+    configure_doi_registry(_registry(tmp_path, [("10.1000/registered.1", 2019), ("10.1000/registered.2", 2012)]))
+
+    scores = routes._score_document(TextRef(text=PAPER))
+
+    assert scores.dois == ["10.1000/fabricated.3"]
+    assert scores.invalid_dois == [] and scores.citation_validity == 100
@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend.app.services.embedding_batcher import MicroBatchEncoder
+from backend.tests.test_plagiarism_index import HashingEncoder
+
+
+class RecordingEncoder(HashingEncoder):
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.calls = []
+        self.fail = fail
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return super().encode(texts)
+
+
+def _concurrently(batcher, requests):
+    results, errors = [None] * len(requests), [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def call(index):
+        barrier.wait()
+        try:
+            results[index] = batcher.encode(requests[index])
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_forward_passes_and_get_their_own_rows() -> None:
+    encoder = RecordingEncoder()
+    batcher = MicroBatchEncoder(encoder, max_items=1000, max_wait_ms=200)
+    requests = [[f"paragraph {word} of analysis {i}" for word in ("alpha", "beta", "gamma")] for i in range(8)]
+    try:
+        results, errors = _concurrently(batcher, requests)
+    finally:
+        batcher.close()
+
+    assert errors == [None] * 8
+    for texts, vectors in zip(requests, results):
+        np.testing.assert_allclose(vectors, HashingEncoder().encode(texts))
+    assert len(encoder.calls) < len(requests)
+    stats = batcher.stats()
+    assert stats["requests"] == 8 and stats["batches"] == len(encoder.calls)
+    assert stats["mean_batch_items"] == pytest.approx(24 / len(encoder.calls), abs=0.01)
+
+
+def test_batches_stop_at_max_items() -> None:
+    encoder = RecordingEncoder()
+    batcher = MicroBatchEncoder(encoder, max_items=4, max_wait_ms=200)
+    try:
+        _concurrently(batcher, [[f"text {i} {j}" for j in range(2)] for i in range(6)])
+    finally:
+        batcher.close()
+
+    assert sum(len(call) for call in encoder.calls) == 12
+    assert all(len(call) <= 4 for call in encoder.calls)
+
+
+def test_encoder_errors_reach_every_caller_in_the_batch() -> None:
+    batcher = MicroBatchEncoder(RecordingEncoder(fail=True), max_items=100, max_wait_ms=50)
+    try:
+        results, errors = _concurrently(batcher, [["one"], ["two"], ["three"]])
+        assert batcher.encode([]).shape == (0, batcher.dimension)
+    finally:
+        batcher.close()
+
+    assert results == [None, None, None]
+    assert all(isinstance(error, RuntimeError) for error in errors)
@@ -0,0 +1,106 @@
+import sqlite3
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app.main import app
+from backend.app.services.embedding_cache import CachedEncoder
+from backend.app.services.embeddings import configure_encoder
+from backend.tests.test_plagiarism_index import HashingEncoder
+
+
+client = TestClient(app)
+
+
+class CountingEncoder(HashingEncoder):
+    def __init__(self, delay: float = 0.0):
+        self.calls = []
+        self.delay = delay
+
+    def encode(self, texts):
+        self.calls.append(list(texts))
+        time.sleep(self.delay)
+        return super().encode(texts)
+
+
+def test_repeated_paragraphs_are_served_from_memory(tmp_path) -> None:
+    inner = CountingEncoder()
+    encoder = CachedEncoder(inner, memory_entries=100, disk_path=tmp_path / "embeddings.sqlite3")
+
+    first = encoder.encode(["Methods  were approved by the\nethics board.", "Funding was provided by X."])
+    second = encoder.encode(["methods were approved by the ethics board.", "A new paragraph.", "a  NEW paragraph."])
+
+    assert inner.calls == [
+        ["Methods  were approved by the\nethics board.", "Funding was provided by X."],
+        ["A new paragraph."],
+    ]
+    assert np.array_equal(second[0], first[0])
+    assert np.array_equal(second[1], second[2])
+    stats = encoder.stats()
+    assert stats["memory"]["hits"] == 1 and stats["encoded"] == 3
+    encoder.close()
+
+
+def test_disk_tier_survives_restart_as_float16(tmp_path) -> None:
+    paragraphs = [f"Standard acknowledgement paragraph number {word}." for word in ("one", "two", "three")]
+    warm = CachedEncoder(CountingEncoder(), memory_entries=100, disk_path=tmp_path / "embeddings.sqlite3")
+    expected = warm.encode(paragraphs)
+    warm.close()
+
+    inner = CountingEncoder()
+    cold = CachedEncoder(inner, memory_entries=100, disk_path=tmp_path / "embeddings.sqlite3")
+    vectors = cold.encode(paragraphs)
+
+    assert inner.calls == []
+    assert np.allclose(vectors, expected, atol=2e-3)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    with sqlite3.connect(tmp_path / "embeddings.sqlite3") as connection:
+        assert connection.execute("SELECT DISTINCT length(vector) FROM embeddings").fetchall() == [(256 * 2,)]
+    assert cold.stats()["disk"]["hits"] == 3 and cold.stats()["hit_rate"] == 1.0
+    cold.close()
+
+
+def test_quantized_encoder_does_not_reuse_full_precision_vectors(tmp_path) -> None:
+    full = CachedEncoder(CountingEncoder(), memory_entries=100, disk_path=tmp_path / "embeddings.sqlite3")
+    full.encode(["A shared boilerplate paragraph."])
+    full.close()
+
+    inner = CountingEncoder()
+    inner.quantization = "int8"
+    quantized = CachedEncoder(inner, memory_entries=100, disk_path=tmp_path / "embeddings.sqlite3")
+    quantized.encode(["A shared boilerplate paragraph."])
+
+    assert inner.calls == [["A shared boilerplate paragraph."]]
+    assert quantized.stats()["quantization"] == "int8"
+    quantized.close()
+
+
+def test_memory_tier_is_bounded_and_disk_tier_is_optional() -> None:
+    inner = CountingEncoder()
+    encoder = CachedEncoder(inner, memory_entries=2, disk_path="")
+
+    encoder.encode(["first paragraph", "second paragraph", "third paragraph"])
+    encoder.encode(["first paragraph"])
+
+    stats = encoder.stats()
+    assert stats["memory"]["entries"] == 2 and stats["memory"]["evictions"] >= 1
+    assert stats["disk"]["enabled"] is False
+    assert inner.calls[-1] == ["first paragraph"]
+
+
+def test_endpoint_reports_hit_rate_and_encoder_time_saved(tmp_path) -> None:
+    encoder = CachedEncoder(CountingEncoder(delay=0.02), memory_entries=100, disk_path=tmp_path / "e.sqlite3")
+    configure_encoder(encoder)
+    try:
+        encoder.encode(["boilerplate methods paragraph", "data availability statement"])
+        encoder.encode(["boilerplate methods paragraph", "data availability statement"])
+        payload = client.get("/api/plagiarism/embedding-cache").json()
+    finally:
+        configure_encoder(None)
+        encoder.close()
+
+    assert payload["loaded"] is True
+    assert payload["hit_rate"] == 0.5
+    assert payload["encoder_seconds_saved"] >= 0.015
+    assert client.get("/api/plagiarism/embedding-cache").json()["loaded"] is False
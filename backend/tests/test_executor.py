@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services.executor import AnalysisExecutor, TextRef, share_text
+
+
+client = TestClient(app)
+
+
+def test_share_text_uses_shared_memory_above_threshold() -> None:
+    text = "résumé " * (settings.ANALYSIS_SHARED_MEMORY_MIN_BYTES // 4)
+    with share_text(text) as text_ref:
+        assert text_ref.shm_name is not None
+        assert text_ref.text is None
+        assert text_ref.load() == text
+
+    with share_text("short text") as text_ref:
+        assert text_ref == TextRef(text="short text")
+
+
+def test_process_executor_reads_shared_text() -> None:
+    executor = AnalysisExecutor(mode="process", workers=1)
+    text = "shared memory payload\n\n" * (settings.ANALYSIS_SHARED_MEMORY_MIN_BYTES // 10)
+    try:
+        with share_text(text) as text_ref:
+            loaded = asyncio.run(executor.run(TextRef.load, text_ref))
+    finally:
+        executor.shutdown()
+    assert loaded == text
+
+
+def test_analyze_large_upload_runs_in_worker() -> None:
+    paragraph = "We propose a novel framework with significant improvement over the state-of-the-art. " * 4
+    paper = ("\n\n".join(f"{paragraph} Section {i}." for i in range(1200))).encode()
+    assert len(paper) > settings.ANALYSIS_SHARED_MEMORY_MIN_BYTES
+    response = client.post("/api/analyze", files={"file": ("large.txt", paper, "text/plain")})
+    assert response.status_code == 200
+    assert response.json()["ai_probability"] > 0
@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.database import upgrade_schema
+from backend.app.main import app
+from backend.app.models.database import AnalysisHistory, Base, credibility_band
+from backend.app.models.database import AnalysisResult as AnalysisResultRecord
+from backend.app.services.history import list_history
+
+client = TestClient(app)
+START = datetime(2026, 1, 1)
+
+
+def _populate(tmp_path, rows: int = 50):
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.sqlite3'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    for i in range(5):
+        session.add(
+            AnalysisResultRecord(
+                id=i + 1,
+                filename=f"paper{i}.pdf",
+                file_size=10,
+                file_hash=f"hash{i}",
+                plagiarism_score=i,
+                plagiarism_summary="",
+                plagiarism_matches=[{"title": "t", "similarity": 90, "source": "s"}],
+                ai_probability=1.0,
+                ai_confidence="low",
+                citation_validity_score=100,
+                citation_summary="",
+                statistical_risk_score=0,
+                statistical_summary="",
+                overall_research_credibility=50,
+                explanations=["e"],
+            )
+        )
+    for i in range(rows):
+        score = (i * 7) % 101
+        session.add(
+            AnalysisHistory(
+                result_id=i % 5 + 1,
+                filename=f"paper{i % 5}.pdf",
+                credibility_score=score,
+                credibility_band=credibility_band(score),
+                analyzed_at=START + timedelta(minutes=i // 2),  # pairs share a timestamp
+            )
+        )
+    session.commit()
+    session.close()
+    return factory
+
+
+def _all_pages(factory, **filters):
+    ids, cursor = [], None
+    while True:
+        page = list_history(cursor=cursor, limit=7, session_factory=factory, **filters)
+        ids += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, page
+
+
+def test_keyset_pages_cover_every_row_once_in_order(tmp_path) -> None:
+    factory = _populate(tmp_path)
+    ids, _ = _all_pages(factory)
+    assert ids == list(range(50, 0, -1))  # newest first, ties broken by id
+
+    since, until = START + timedelta(minutes=5), START + timedelta(minutes=10)
+    ids, _ = _all_pages(factory, since=since, until=until, filename="paper3.pdf")
+    expected = [i + 1 for i in range(50) if i % 5 == 3 and since <= START + timedelta(minutes=i // 2) < until]
+    assert ids == sorted(expected, reverse=True)
+
+    ids, _ = _all_pages(factory, band="high")
+    assert ids and all((((i - 1) * 7) % 101) >= 80 for i in ids)
+
+
+def test_large_columns_are_only_loaded_on_request(tmp_path) -> None:
+    factory = _populate(tmp_path, rows=3)
+    item = list_history(session_factory=factory)["items"][0]
+    assert "plagiarism_matches" not in item and item["plagiarism_score"] == 2
+    item = list_history(include=["plagiarism_matches"], session_factory=factory)["items"][0]
+    assert item["plagiarism_matches"][0]["similarity"] == 90
+
+
+def test_upgrade_adds_the_band_column_and_indexes(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite3'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, result_id INTEGER NOT NULL, "
+                "filename VARCHAR(255) NOT NULL, credibility_score INTEGER NOT NULL, analyzed_at DATETIME)"
+            )
+        )
+        conn.execute(text("CREATE INDEX ix_analysis_history_analyzed_at ON analysis_history (analyzed_at)"))
+        conn.execute(text("INSERT INTO analysis_history VALUES (1, 1, 'a.pdf', 85, '2026-01-01 00:00:00')"))
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # idempotent
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("analysis_history")}
+    assert {"ix_analysis_history_recent", "ix_analysis_history_band_recent"} <= indexes
+    assert "ix_analysis_history_analyzed_at" not in indexes
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT credibility_band FROM analysis_history")).scalar() == "high"
+
+
+def test_history_endpoint_validates_its_parameters() -> None:
+    assert client.get("/api/history", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/history", params={"band": "excellent"}).status_code == 400
+    assert client.get("/api/history", params={"include": "file_hash"}).status_code == 400
+    response = client.get("/api/history", params={"limit": 2, "include": "explanations"})
+    assert response.status_code == 200
+    assert response.json()["limit"] == 2
@@ -0,0 +1,200 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from backend.app.core.config import settings
+from backend.app.services import index_segments, minhash_index, plagiarism_index
+from backend.app.services.embeddings import configure_encoder
+from backend.app.services.index_segments import (
+    SegmentedIndex,
+    append_segment,
+    compact,
+    create_index,
+    read_segments,
+    remove_documents,
+)
+from backend.app.services.plagiarism_index import iter_corpus
+from backend.tests.test_plagiarism_index import HashingEncoder
+
+
+NEW_ABSTRACT = {
+    "title": "Reproducibility of Benchmark Results in Machine Learning",
+    "abstract": "We audit reproducibility of published benchmark results across machine learning venues.",
+    "url": "https://arxiv.org/abs/0000.00004",
+}
+
+
+def _minhash_segment(records):
+    return lambda directory: minhash_index.build_index(records, directory)["documents"]
+
+
+def _semantic_segment(records):
+    return lambda directory: plagiarism_index.build_index(records, HashingEncoder(), directory)["count"]
+
+
+@pytest.fixture(autouse=True)
+def _no_process_wide_indexes():
+    yield
+    minhash_index.configure_minhash_index(None)
+    plagiarism_index.configure_plagiarism_index(None)
+
+
+def test_readers_pick_up_appended_segments_and_keep_old_snapshots(tmp_path) -> None:
+    root = tmp_path / "minhash"
+    create_index(root, _minhash_segment(iter_corpus(settings.ARXIV_DATASET_PATH)))
+    reader = SegmentedIndex(root, minhash_index.open_segment, refresh_seconds=0)
+    minhash_index.configure_minhash_index(reader)
+    before = reader.snapshot()
+
+    assert minhash_index.find_near_duplicates([NEW_ABSTRACT["abstract"].lower()]) == []
+    append_segment(root, _minhash_segment([NEW_ABSTRACT]))
+    after = reader.snapshot()
+    hits = minhash_index.find_near_duplicates([NEW_ABSTRACT["abstract"].lower()])
+
+    assert [hit.url for hit in hits] == [NEW_ABSTRACT["url"]]
+    assert after.generation == before.generation + 1
+    assert (len(before.segments), len(after.segments)) == (1, 2)
+    assert after.segments[0].index is before.segments[0].index  # unchanged segments are not reopened
+    assert after.documents == 4
+
+
+def test_tombstones_hide_documents_until_compaction_drops_them(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "INDEX_SEGMENT_RETENTION_SECONDS", 0)
+    root = tmp_path / "semantic"
+    create_index(root, _semantic_segment(iter_corpus(settings.ARXIV_DATASET_PATH)))
+    append_segment(root, _semantic_segment([NEW_ABSTRACT]))
+    reader = SegmentedIndex(root, plagiarism_index.open_segment, refresh_seconds=0)
+    plagiarism_index.configure_plagiarism_index(reader)
+    configure_encoder(HashingEncoder())
+    removed = "This paper studies citation networks and knowledge graph embeddings in academia."
+    kept = NEW_ABSTRACT["abstract"]
+    try:
+        assert remove_documents(root, ["https://arxiv.org/abs/0000.00002"]) == 1
+        assert remove_documents(root, ["https://arxiv.org/abs/0000.00002"]) == 0
+        hidden = plagiarism_index.find_similar_sources([removed], min_similarity=0.99)
+        old_segments = [segment["name"] for segment in read_segments(root)["segments"]]
+
+        merged = compact(root, plagiarism_index.merge_segments)
+        compacted = reader.snapshot()
+        after_removed = plagiarism_index.find_similar_sources([removed], min_similarity=0.99)
+        after_kept = plagiarism_index.find_similar_sources([kept], min_similarity=0.99)
+    finally:
+        configure_encoder(None)
+
+    manifest = read_segments(root)
+    assert hidden == [] and after_removed == []
+    assert [hit.url for hit in after_kept] == [NEW_ABSTRACT["url"]]
+    assert [segment["name"] for segment in manifest["segments"]] == [merged]
+    assert manifest["segments"][0]["documents"] == 3 and manifest["tombstones"] == {}
+    assert compacted.documents == 3 and len(compacted.segments) == 1
+    assert not any((root / name).exists() for name in old_segments)  # swept after the (zero) retention period
+
+
+def test_compaction_that_races_with_a_tombstone_is_discarded(tmp_path) -> None:
+    root = tmp_path / "minhash"
+    create_index(root, _minhash_segment(iter_corpus(settings.ARXIV_DATASET_PATH)))
+    append_segment(root, _minhash_segment([NEW_ABSTRACT]))
+    before = read_segments(root)
+
+    def racing_merge(sources, target):
+        remove_documents(root, [NEW_ABSTRACT["url"]])
+        return minhash_index.merge_segments(sources, target)
+
+    assert compact(root, racing_merge, force=True) is None
+
+    manifest = read_segments(root)
+    assert manifest["segments"] == before["segments"]
+    assert sum(len(ids) for ids in manifest["tombstones"].values()) == 1
+    assert sorted(path.name for path in root.iterdir()) == sorted(
+        [index_segments.SEGMENTS_FILE, index_segments.LOCK_FILE, index_segments.COMPACTION_LEASE_FILE]
+        + [segment["name"] for segment in manifest["segments"]]
+    )
+
+
+def test_only_one_process_merges_a_root_at_a_time(tmp_path) -> None:
+    root = tmp_path / "minhash"
+    create_index(root, _minhash_segment(iter_corpus(settings.ARXIV_DATASET_PATH)))
+    append_segment(root, _minhash_segment([NEW_ABSTRACT]))
+    merges = []
+
+    def counted_merge(sources, target):
+        merges.append(target.name)
+        return minhash_index.merge_segments(sources, target)
+
+    def merge_while_another_worker_tries(sources, target):
+        assert compact(root, counted_merge, force=True) is None  # the lease is taken: skipped, no merge
+        return counted_merge(sources, target)
+
+    assert compact(root, merge_while_another_worker_tries, force=True) is not None
+    assert len(merges) == 1
+
+    # A lease held by a worker that dies is released with it; the file left behind does not block anyone.
+    append_segment(root, _minhash_segment([{**NEW_ABSTRACT, "url": "https://arxiv.org/abs/0000.00005"}]))
+    holder = _hold_lock(root / index_segments.COMPACTION_LEASE_FILE)
+    try:
+        assert compact(root, counted_merge, force=True) is None
+    finally:
+        holder.kill()
+        holder.wait()
+    assert (root / index_segments.COMPACTION_LEASE_FILE).exists()
+    assert compact(root, counted_merge, force=True) is not None
+    assert len(merges) == 2
+
+
+def test_commit_lock_waits_for_its_holder_and_survives_its_death(tmp_path) -> None:
+    holder = _hold_lock(tmp_path / index_segments.LOCK_FILE)
+    try:
+        with pytest.raises(TimeoutError):
+            with index_segments._commit_lock(tmp_path, timeout=0.1):
+                pass
+    finally:
+        holder.kill()
+        holder.wait()
+    with index_segments._commit_lock(tmp_path, timeout=1.0):
+        with pytest.raises(TimeoutError):  # exclusive within one process too
+            with index_segments._commit_lock(tmp_path, timeout=0.05):
+                pass
+
+
+def _hold_lock(path) -> subprocess.Popen:
+    """Another process taking ``path``'s lock and keeping it until killed."""
+    holder = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import fcntl, sys, time\n"
+            "f = open(sys.argv[1], 'a')\n"
+            "fcntl.flock(f, fcntl.LOCK_EX)\n"
+            "print('locked', flush=True)\n"
+            "time.sleep(60)",
+            str(path),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert holder.stdout.readline().strip() == "locked"
+    return holder
+
+
+def test_minhash_compaction_preserves_near_duplicate_results(tmp_path) -> None:
+    root = tmp_path / "minhash"
+    corpus = list(iter_corpus(settings.ARXIV_DATASET_PATH))
+    create_index(root, _minhash_segment(corpus[:1]))
+    for record in corpus[1:] + [NEW_ABSTRACT]:
+        append_segment(root, _minhash_segment([record]))
+    minhash_index.configure_minhash_index(SegmentedIndex(root, minhash_index.open_segment, refresh_seconds=0))
+    queries = [record["abstract"].lower() for record in corpus + [NEW_ABSTRACT]]
+    before = [minhash_index.find_near_duplicates([query]) for query in queries]
+
+    assert index_segments.needs_compaction(read_segments(root))  # four segments
+    compact(root, minhash_index.merge_segments)
+    after = [minhash_index.find_near_duplicates([query]) for query in queries]
+
+    assert len(read_segments(root)["segments"]) == 1
+    assert [[(hit.url, hit.similarity) for hit in hits] for hits in after] == [
+        [(hit.url, hit.similarity) for hit in hits] for hits in before
+    ]
+    assert json.loads((root / read_segments(root)["segments"][0]["name"] / "manifest.json").read_text())["documents"] == 4
@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from backend.app.services.executor import TextRef
+from backend.app.services.ingest import ingest_upload
+
+
+def _upload(payload: bytes, filename: str = "paper.txt") -> UploadFile:
+    return UploadFile(file=io.BytesIO(payload), filename=filename)
+
+
+def test_small_upload_stays_in_memory() -> None:
+    payload = b"short paper"
+    upload = asyncio.run(ingest_upload(_upload(payload), max_bytes=1024, chunk_size=4, spool_min_bytes=64))
+    assert not upload.spooled
+    assert upload.data == payload
+    assert upload.sha256 == hashlib.sha256(payload).hexdigest()
+
+
+def test_large_upload_is_spooled_and_memory_mapped() -> None:
+    payload = ("paragraph é\n\n" * 100).encode()
+    upload = asyncio.run(ingest_upload(_upload(payload), max_bytes=10_000, chunk_size=64, spool_min_bytes=128))
+    try:
+        assert upload.spooled
+        assert upload.size == len(payload)
+        assert upload.sha256 == hashlib.sha256(payload).hexdigest()
+        with upload.open_buffer() as buffer:
+            assert bytes(buffer[:9]) == b"paragraph"
+        assert TextRef(path=str(upload.path), size=upload.size).load() == payload.decode()
+    finally:
+        path = upload.path
+        upload.cleanup()
+    assert not path.exists()
+
+
+def test_oversized_upload_is_rejected_mid_stream() -> None:
+    reads = []
+
+    class CountingFile(io.BytesIO):
+        def read(self, size=-1):
+            reads.append(size)
+            return super().read(size)
+
+    upload = UploadFile(file=CountingFile(b"x" * 10_000), filename="big.txt")
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(ingest_upload(upload, max_bytes=1000, chunk_size=256, spool_min_bytes=128))
+    assert excinfo.value.status_code == 413
+    assert len(reads) == 4
@@ -0,0 +1,110 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.core.database import get_session_factory
+from backend.app.main import app
+from backend.app.models.database import AnalysisHistory, AnalysisJob
+from backend.app.services.jobs import JobWorker
+from backend.app.services.persistence import get_result_writer
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _jobs_dir(monkeypatch, tmp_path):
+    """Keep queued payloads out of the real JOBS_DIR."""
+    monkeypatch.setattr(settings, "JOBS_DIR", tmp_path)
+
+
+def _drain(worker: JobWorker) -> None:
+    while worker.run_once():
+        pass
+
+
+def test_job_lifecycle_records_result_and_stage_timings() -> None:
+    paper = b"Job queue paper.\n\nIn this paper we propose a method, see doi 10.1000/job77 (p = 0.02)."
+    response = client.post("/api/jobs", files={"file": ("job.txt", paper, "text/plain")})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    queued = client.get(f"/api/jobs/{job_id}").json()
+    assert queued["status"] == "queued"
+
+    _drain(JobWorker())
+
+    finished = client.get(f"/api/jobs/{job_id}").json()
+    assert finished["status"] == "succeeded"
+    assert finished["attempts"] == 1
+    assert finished["result"]["filename"] == "job.txt"
+    assert "total" in finished["stage_timings"]
+
+
+def _run_job(filename: str, paper: bytes) -> dict:
+    job_id = client.post("/api/jobs", files={"file": (filename, paper, "text/plain")}).json()["job_id"]
+    _drain(JobWorker())
+    finished = client.get(f"/api/jobs/{job_id}").json()
+    assert finished["status"] == "succeeded"
+    return finished
+
+
+def test_cache_hit_renders_an_evicted_report_again() -> None:
+    paper = f"Evicted report probe {time.time_ns()}.\n\nWe propose a method.".encode()
+    first = _run_job("evicted.txt", paper)["result"]["report_path"]
+    report = settings.REPORTS_DIR / first.removeprefix("/files/")
+    report.unlink()  # as the ReportSweeper would
+
+    again = _run_job("evicted.txt", paper)
+    assert again["result"]["report_path"] == first and report.is_file()
+    assert "write_pdf_report" in again["stage_timings"] and "cache_lookup" in again["stage_timings"]
+
+
+def test_cache_hit_is_served_and_recorded_under_the_jobs_filename() -> None:
+    paper = f"Repeat job probe {time.time_ns()}.\n\nWe propose a method.".encode()
+    first = _run_job("original.txt", paper)["result"]
+    repeat = _run_job("resubmitted.txt", paper)["result"]
+    assert repeat["filename"] == "resubmitted.txt" and repeat["analyzed_at"] == first["analyzed_at"]
+
+    assert get_result_writer().flush()
+    session = get_session_factory()()
+    try:
+        assert session.query(AnalysisHistory).filter(AnalysisHistory.filename == "resubmitted.txt").count() == 1
+    finally:
+        session.close()
+
+
+def test_unknown_job_returns_404() -> None:
+    assert client.get("/api/jobs/does-not-exist").status_code == 404
+
+
+def test_expired_lease_is_reclaimed_then_failed_after_max_attempts(tmp_path) -> None:
+    _drain(JobWorker())  # finish anything queued by other tests
+    response = client.post("/api/jobs", files={"file": ("crash.txt", b"Crashing worker paper.", "text/plain")})
+    job_id = response.json()["job_id"]
+    session_factory = get_session_factory()
+    payload = tmp_path / f"{job_id}.txt"
+    assert payload.exists()
+
+    def expire(attempts: int) -> None:
+        session = session_factory()
+        job = session.get(AnalysisJob, job_id)
+        job.status = "running"
+        job.attempts = attempts
+        job.max_attempts = 2
+        job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        session.commit()
+        session.close()
+
+    expire(attempts=1)
+    reclaimed = JobWorker(worker_id="second").claim()
+    assert reclaimed is not None and reclaimed.id == job_id
+    assert reclaimed.attempts == 2
+
+    expire(attempts=2)
+    assert JobWorker(worker_id="third").claim() is None
+    assert client.get(f"/api/jobs/{job_id}").json()["status"] == "failed"
+    assert not payload.exists()
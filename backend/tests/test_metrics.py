@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.main import app
+from backend.app.models.database import Base, SystemMetrics
+from backend.app.services.metrics import API_CALL, ERROR, PERFORMANCE, Histogram, MetricsAggregator, summarize
+
+client = TestClient(app)
+
+
+def test_histogram_percentiles_are_within_half_a_bucket() -> None:
+    rng = random.Random(3)
+    samples = [rng.lognormvariate(3, 1) for _ in range(20000)]
+    histogram = Histogram()
+    for sample in samples:
+        histogram.observe(sample)
+    samples.sort()
+    for q in (50, 90, 99):
+        exact = samples[int(q / 100 * len(samples)) - 1]
+        assert abs(histogram.percentile(q) - exact) / exact < 0.05
+    assert histogram.percentile(100) == round(samples[-1], 3)
+
+
+def test_one_row_per_metric_per_interval_and_windowed_percentiles(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.sqlite3'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    now = [1_800_000_000.0]  # on an interval boundary
+    metrics = MetricsAggregator(interval_seconds=60, session_factory=factory, clock=lambda: now[0])
+
+    for i in range(1000):
+        metrics.observe(API_CALL, "POST /api/analyze", 10.0 if i < 900 else 100.0)
+        metrics.observe(PERFORMANCE, "text_profile", 2.0)
+    metrics.increment(ERROR, "POST /api/analyze 500")
+    now[0] += 61
+    metrics.observe(API_CALL, "POST /api/analyze", 1000.0)  # opens the next interval
+    assert metrics.flush() == 3  # only the closed interval
+    metrics.stop()  # writes the partial one
+    assert metrics.stats()["rows_written"] == 4
+
+    session = factory()
+    try:
+        assert session.query(SystemMetrics).count() == 4
+        row = session.query(SystemMetrics).filter(SystemMetrics.name == "POST /api/analyze").first()
+        assert row.value == 1000 and row.details["count"] == 1000
+    finally:
+        session.close()
+
+    start = datetime.utcfromtimestamp(1_800_000_000)
+    summary = summarize(start, start + timedelta(minutes=5), session_factory=factory)
+    by_name = {item["name"]: item for item in summary}
+    analyze = by_name["POST /api/analyze"]
+    assert analyze["count"] == 1001 and analyze["max_ms"] == 1000.0
+    assert abs(analyze["p50_ms"] - 10) < 0.5 and abs(analyze["p95_ms"] - 100) < 5
+    assert by_name["POST /api/analyze 500"]["count"] == 1 and by_name["POST /api/analyze 500"]["p50_ms"] is None
+
+    first_interval = summarize(start, start + timedelta(seconds=60), metric_type=API_CALL, session_factory=factory)
+    assert [item["count"] for item in first_interval] == [1000]
+
+
+def test_requests_are_recorded_by_route_template() -> None:
+    client.get("/api/jobs/does-not-exist")
+    client.get("/api/jobs/another-missing-job")
+    summary = client.get("/api/metrics/summary", params={"metric_type": API_CALL}).json()
+    names = {item["name"]: item for item in summary["metrics"]}
+    assert names["GET /api/jobs/{job_id}"]["count"] >= 2
+    assert names["GET /api/jobs/{job_id}"]["p50_ms"] is not None
+
+    errors = client.get("/api/metrics/summary", params={"metric_type": ERROR}).json()["metrics"]
+    assert any(item["name"] == "GET /api/jobs/{job_id} 404" for item in errors)
@@ -0,0 +1,112 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from backend.app.api import routes
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services.minhash_index import (
+    MinHashIndex,
+    MinHashParams,
+    build_index,
+    configure_minhash_index,
+    load_minhash_index,
+)
+from backend.app.services.plagiarism_index import iter_corpus
+from backend.app.services.text_profile import TextProfile
+
+
+client = TestClient(app)
+
+
+def _corpus_index(tmp_path) -> MinHashIndex:
+    build_index(iter_corpus(settings.ARXIV_DATASET_PATH), tmp_path / "minhash")
+    return MinHashIndex(tmp_path / "minhash")
+
+
+def _jaccard(hasher, left: str, right: str) -> float:
+    a, b = set(hasher.shingles(left).tolist()), set(hasher.shingles(right).tolist())
+    return len(a & b) / len(a | b)
+
+
+def test_index_finds_copied_abstract_but_not_unrelated_text(tmp_path) -> None:
+    index = _corpus_index(tmp_path)
+
+    hits = index.query(
+        ["This paper studies citation networks and knowledge graph embeddings in academia."], 0.5, top_k=5
+    )
+    misses = index.query(["An unrelated closing paragraph about the weather in spring and autumn."], 0.5, top_k=5)
+
+    assert index.documents == 3 and len(index) == 3
+    assert [(hit.title, hit.url, hit.similarity) for hit in hits] == [
+        ("Citation Networks and Knowledge Graph Embeddings", "https://arxiv.org/abs/0000.00002", 1.0)
+    ]
+    assert misses == []
+    index.close()
+
+
+def test_lsh_candidates_recall_brute_force_near_duplicates(tmp_path) -> None:
+    rng = random.Random(7)
+    vocabulary = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=7)) for _ in range(2000)]
+    corpus = [" ".join(rng.choices(vocabulary, k=80)) for _ in range(300)]
+    params = MinHashParams(bands=32, rows=4, shingle_words=3)
+    build_index(({"title": str(i), "abstract": text} for i, text in enumerate(corpus)), tmp_path / "minhash", params)
+    index = MinHashIndex(tmp_path / "minhash")
+
+    queries = []
+    for source in corpus[:40]:
+        words = source.split()
+        for position in rng.sample(range(len(words)), k=rng.randint(1, 6)):
+            words[position] = rng.choice(vocabulary)
+        queries.append(" ".join(words))
+
+    expected = {
+        (query, row)
+        for query, text in enumerate(queries)
+        for row, source in enumerate(corpus)
+        if _jaccard(index.hasher, text, source) >= 0.6
+    }
+    found = {tuple(pair) for pair in index.candidates(index.hasher.signatures(queries)).tolist()}
+
+    assert len(expected) >= 40
+    assert expected <= found
+    # Sublinear: random corpus paragraphs almost never share a bucket with a query.
+    assert len(found) < 2 * len(expected)
+    index.close()
+
+
+def test_plagiarism_score_reports_near_duplicate_sources(tmp_path) -> None:
+    _corpus_index(tmp_path)
+    load_minhash_index(tmp_path / "minhash")
+    try:
+        profile = TextProfile.build(
+            "Overlap paper.\n\n"
+            "We evaluate statistical anomalies in published research and propose new detection metrics.\n\n"
+            "An unrelated closing paragraph about the weather in spring."
+        )
+        score, matches = routes._plagiarism_score(profile, routes._query_paragraphs(profile))
+    finally:
+        configure_minhash_index(None)
+
+    assert matches[0].title == "Detecting Statistical Anomalies in Research"
+    assert matches[0].source == "https://arxiv.org/abs/0000.00003"
+    assert 60 <= matches[0].similarity < 100
+    assert score == int(round(matches[0].similarity))
+
+
+def test_plagiarism_config_exposes_band_parameters(tmp_path) -> None:
+    try:
+        assert load_minhash_index(tmp_path / "missing") is None
+        response = client.get("/api/plagiarism/config")
+        _corpus_index(tmp_path)
+        load_minhash_index(tmp_path / "minhash")
+        indexed = client.get("/api/plagiarism/config").json()["near_duplicate"]["index"]
+    finally:
+        configure_minhash_index(None)
+
+    assert response.status_code == 200
+    near_duplicate = response.json()["near_duplicate"]
+    assert (near_duplicate["bands"], near_duplicate["rows"]) == (settings.MINHASH_BANDS, settings.MINHASH_ROWS)
+    assert near_duplicate["candidate_threshold"] == round((1 / settings.MINHASH_BANDS) ** (1 / settings.MINHASH_ROWS), 3)
+    assert near_duplicate["index"] is None
+    assert indexed["documents"] == 3 and indexed["segments"][0]["bands"] == settings.MINHASH_BANDS
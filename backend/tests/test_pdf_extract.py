@@ -0,0 +1,100 @@
+import asyncio
+import tracemalloc
+
+import fitz
+from fastapi.testclient import TestClient
+
+from backend.app.api.routes import _score_document, _score_pdf
+from backend.app.main import app
+from backend.app.services.executor import AnalysisExecutor, TextRef
+from backend.app.services.pdf_extract import PDF_FORMAT, iter_page_texts, page_ranges, profile_pages
+from backend.app.services.text_profile import TextProfile
+
+
+client = TestClient(app)
+
+
+def _make_pdf(pages: int, filler_lines: int = 0) -> bytes:
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"Page {number}: in this paper we propose a novel framework.", fontsize=11)
+        page.insert_text((72, 200), f"Results were significant (p = 0.04), see doi 10.1000/page{number} from 2019.")
+        for line in range(filler_lines):
+            page.insert_text((72, 230 + 12 * line), "Filler text that pads the page to a realistic amount of prose.")
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def test_profile_pages_matches_joined_text() -> None:
+    text_ref = TextRef(data=_make_pdf(6), format=PDF_FORMAT)
+    pages = list(iter_page_texts(text_ref))
+    assert len(pages) == 6 and "novel framework" in pages[3]
+
+    streamed = profile_pages(text_ref)
+    assert streamed == TextProfile.build("\n\n".join(pages))
+    assert TextProfile.from_pages(pages, chunk_chars=1) == streamed
+    assert [reference.doi for reference in streamed.references] == [f"10.1000/page{number}" for number in range(6)]
+
+
+def test_page_ranges_split_into_contiguous_slices() -> None:
+    assert page_ranges(300, workers=4, min_pages=50) == [(0, 75), (75, 150), (150, 225), (225, 300)]
+    assert page_ranges(80, workers=4, min_pages=50) == [(0, 80)]
+    assert page_ranges(0, workers=4, min_pages=50) == [(0, 0)]
+
+
+def test_page_parallel_run_matches_sequential(monkeypatch) -> None:
+    from backend.app.core.config import settings
+
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 4)
+    text_ref = TextRef(data=_make_pdf(12), format=PDF_FORMAT)
+    executor = AnalysisExecutor(mode="process", workers=2)
+    try:
+        parallel = asyncio.run(_score_pdf(executor, text_ref))
+    finally:
+        executor.shutdown()
+    sequential = _score_document(text_ref)
+
+    assert "combine_profiles" in parallel.timings
+    parallel.timings = sequential.timings = {}
+    assert parallel == sequential
+
+
+def test_pdf_upload_is_analyzed_from_extracted_text() -> None:
+    response = client.post("/api/analyze", files={"file": ("paper.pdf", _make_pdf(3), "application/pdf")})
+    assert response.status_code == 200
+    assert response.json()["citation_validity_score"] > 0
+
+
+def test_corrupt_pdf_is_rejected() -> None:
+    response = client.post("/api/analyze", files={"file": ("broken.pdf", b"%PDF-1.7 not really", "application/pdf")})
+    assert response.status_code == 400
+
+
+def _traced_peak(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def test_page_extraction_memory_stays_below_document_size() -> None:
+    """Only extraction is streamed: the pages are never joined into one string."""
+    text_ref = TextRef(data=_make_pdf(100, filler_lines=40), format=PDF_FORMAT)
+    total_chars = sum(len(page) for page in iter_page_texts(text_ref))
+
+    peak = _traced_peak(lambda: [None for _ in iter_page_texts(text_ref)])
+    assert peak < total_chars // 8  # a few pages of text at most, never the whole document
+
+
+def test_profiling_memory_grows_with_the_profile_not_the_joined_text() -> None:
+    """The profile keeps every word and paragraph, so the whole path is linear in the document."""
+    text_ref = TextRef(data=_make_pdf(100, filler_lines=40), format=PDF_FORMAT)
+    total_chars = sum(len(page) for page in iter_page_texts(text_ref))
+
+    peak = _traced_peak(lambda: profile_pages(text_ref))
+    assert peak < total_chars * 24  # ~18x the text's length in CPython objects, as when profiling it joined
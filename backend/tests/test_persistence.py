@@ -0,0 +1,281 @@
+import hashlib
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.database import upgrade_schema
+from backend.app.main import app
+from backend.app.models.database import AnalysisHistory, Base
+from backend.app.models.database import AnalysisResult as AnalysisResultRecord
+from backend.app.models.schemas import AnalysisResult
+from backend.app.services.persistence import ResultWriter
+
+client = TestClient(app)
+
+
+def _session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'results.sqlite3'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _result(name: str, score: int = 80) -> AnalysisResult:
+    return AnalysisResult(
+        filename=name,
+        plagiarism_score=0,
+        plagiarism_summary="none",
+        plagiarism_matches=[],
+        ai_probability=10,
+        ai_confidence="low",
+        citation_validity_score=100,
+        citation_summary="ok",
+        citation_invalid_dois=[],
+        citation_missing_dois=[],
+        citation_year_mismatches=[],
+        statistical_risk_score=0,
+        statistical_summary="ok",
+        overall_research_credibility=score,
+        suspicious_paragraphs=[],
+        explanations=[],
+        report_path="",
+    )
+
+
+def test_writes_are_flushed_in_batches_with_history(tmp_path) -> None:
+    factory = _session_factory(tmp_path)
+    writer = ResultWriter(factory, batch_size=16, flush_interval_ms=60_000)
+    try:
+        for i in range(40):
+            writer.submit(f"hash{i % 20}", 100, "v1", _result(f"paper{i}.txt", score=i))
+        writer.submit("hash0", 100, "v1", _result("again.txt"), store_result=False)
+        assert writer.pending_result("hash19", "v1").filename == "paper39.txt"  # last 9 wait for the interval
+        assert writer.flush()
+    finally:
+        writer.close()
+
+    stats = writer.stats()
+    assert stats["queue_depth"] == 0 and stats["flushed"] == 41
+    assert stats["batches"] == 3
+    assert writer.pending_result("hash3", "v1") is None
+
+    session = factory()
+    try:
+        records = {record.file_hash: record for record in session.query(AnalysisResultRecord)}
+        assert len(records) == 20
+        assert records["hash3"].filename == "paper23.txt"  # the later submission wins
+        assert records["hash0"].overall_research_credibility == 20
+        assert session.query(AnalysisHistory).count() == 41
+        hit = session.query(AnalysisHistory).filter(AnalysisHistory.filename == "again.txt").one()
+        assert hit.result_id == records["hash0"].id
+    finally:
+        session.close()
+
+
+def test_failed_batches_are_retried(tmp_path) -> None:
+    factory = _session_factory(tmp_path)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return factory()
+
+    writer = ResultWriter(flaky, batch_size=8, flush_interval_ms=0, retry_seconds=0.01)
+    try:
+        writer.submit("retry", 10, "v1", _result("retry.txt"))
+        assert writer.flush()
+    finally:
+        writer.close()
+    assert writer.stats()["failures"] == 1
+    session = factory()
+    try:
+        assert session.query(AnalysisResultRecord).filter(AnalysisResultRecord.file_hash == "retry").count() == 1
+    finally:
+        session.close()
+
+
+def test_a_bad_row_is_dead_lettered_without_blocking_the_good_ones(tmp_path) -> None:
+    factory = _session_factory(tmp_path)
+    dead_letters = tmp_path / "dead-letter.jsonl"
+    writer = ResultWriter(
+        factory, batch_size=8, flush_interval_ms=0, retry_seconds=0.01, max_attempts=2, dead_letter_path=dead_letters
+    )
+    unstorable = _result("bad.txt").model_copy(update={"explanations": [object()]})  # not JSON-serializable
+    try:
+        writer.submit("good-1", 10, "v1", _result("good-1.txt"))
+        writer.submit("bad", 10, "v1", unstorable)
+        writer.submit("good-2", 10, "v1", _result("good-2.txt"))
+        assert writer.flush()
+        writer.submit("after", 10, "v1", _result("after.txt"))  # the queue keeps moving
+        assert writer.flush()
+    finally:
+        writer.close()
+
+    stats = writer.stats()
+    assert stats["dead_lettered"] == 1 and stats["failures"] == 2 and stats["flushed"] == 3
+    assert writer.pending_result("bad", "v1") is None
+    session = factory()
+    try:
+        stored = {record.file_hash for record in session.query(AnalysisResultRecord)}
+        assert stored == {"good-1", "good-2", "after"}
+    finally:
+        session.close()
+    [line] = dead_letters.read_text().splitlines()
+    entry = json.loads(line)
+    assert entry["write"]["file_hash"] == "bad" and entry["error"]
+
+
+def test_writes_succeed_on_an_upgraded_first_release_database(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.sqlite3'}")
+    with engine.begin() as conn:
+        # The tables as the first release created them.
+        conn.execute(
+            text(
+                "CREATE TABLE analysis_results (id INTEGER PRIMARY KEY, filename VARCHAR(255) NOT NULL, "
+                "file_size INTEGER NOT NULL, file_hash VARCHAR(64) UNIQUE, plagiarism_score INTEGER NOT NULL, "
+                "plagiarism_summary VARCHAR(255) NOT NULL, plagiarism_matches JSON, ai_probability FLOAT NOT NULL, "
+                "ai_confidence VARCHAR(50) NOT NULL, citation_validity_score INTEGER NOT NULL, "
+                "citation_summary VARCHAR(255) NOT NULL, citation_details JSON, statistical_risk_score INTEGER NOT NULL, "
+                "statistical_summary VARCHAR(255) NOT NULL, overall_research_credibility INTEGER NOT NULL, "
+                "explanations JSON NOT NULL, report_path VARCHAR(255), report_generated BOOLEAN, "
+                "analyzed_at DATETIME, created_at DATETIME, updated_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, result_id INTEGER NOT NULL, "
+                "filename VARCHAR(255) NOT NULL, credibility_score INTEGER NOT NULL, analyzed_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO analysis_results (id, filename, file_size, file_hash, plagiarism_score, "
+                "plagiarism_summary, ai_probability, ai_confidence, citation_validity_score, citation_summary, "
+                "statistical_risk_score, statistical_summary, overall_research_credibility, explanations) "
+                "VALUES (1, 'old.pdf', 10, 'old', 0, '', 0.1, 'low', 100, '', 0, '', 90, '[]')"
+            )
+        )
+    upgrade_schema(engine)
+    upgrade_schema(engine)  # idempotent
+    factory = sessionmaker(bind=engine)
+
+    writer = ResultWriter(factory, batch_size=8, flush_interval_ms=0)
+    try:
+        writer.submit("old", 10, "v2", _result("old.pdf", score=70))
+        writer.submit("new", 20, "v2", _result("new.pdf"))
+        assert writer.flush()
+    finally:
+        writer.close()
+    assert writer.stats()["failures"] == 0
+
+    session = factory()
+    try:
+        records = {record.file_hash: record for record in session.query(AnalysisResultRecord)}
+        assert records["old"].analysis_version == "v2" and records["old"].overall_research_credibility == 70
+        assert records["new"].suspicious_paragraphs == []
+        assert session.query(AnalysisHistory).count() == 2
+    finally:
+        session.close()
+    engine.dispose()
+
+
+def test_writes_overflowing_an_outage_are_dead_lettered_not_lost(tmp_path) -> None:
+    factory = _session_factory(tmp_path)
+    dead_letters = tmp_path / "dead-letter.jsonl"
+    journal = tmp_path / "journal"
+    database_up = False
+
+    def outage():
+        if not database_up:
+            raise OperationalError("SELECT 1", {}, ConnectionRefusedError("database unavailable"))
+        return factory()
+
+    writer = ResultWriter(
+        outage,
+        batch_size=8,
+        flush_interval_ms=60_000,  # nothing goes out until flush(): the buffer fills deterministically
+        max_pending=2,
+        journal_dir=journal,
+        retry_seconds=0.01,
+        dead_letter_path=dead_letters,
+    )
+    try:
+        for i in range(4):
+            writer.submit(f"outage{i}", 10, "v1", _result(f"outage{i}.txt"))
+        assert not writer.flush(timeout=0.2)  # still down: retried, never dead-lettered for it
+        database_up = True
+        assert writer.flush()
+    finally:
+        writer.close()
+
+    stats = writer.stats()
+    assert stats["dropped"] == 2 and stats["flushed"] == 2 and stats["failures"] >= 1
+    assert [path.name for path in journal.glob("pending-*.jsonl")] == [f"pending-{writer._segment}.jsonl"]
+    overflowed = [json.loads(line) for line in dead_letters.read_text().splitlines()]
+    assert [entry["write"]["file_hash"] for entry in overflowed] == ["outage0", "outage1"]
+    assert AnalysisResult(**overflowed[0]["write"]["result"]).filename == "outage0.txt"
+    session = factory()
+    try:
+        assert {record.file_hash for record in session.query(AnalysisResultRecord)} == {"outage2", "outage3"}
+    finally:
+        session.close()
+
+
+def test_journal_replays_writes_a_crashed_process_did_not_flush(tmp_path) -> None:
+    journal = tmp_path / "journal"
+
+    def down():
+        raise RuntimeError("database unavailable")
+
+    crashed = ResultWriter(down, batch_size=8, flush_interval_ms=0, journal_dir=journal, retry_seconds=0.01)
+    for i in range(3):
+        crashed.submit(f"journaled{i}", 10, "v1", _result(f"journaled{i}.txt"))
+    crashed.close(timeout=2)
+    assert crashed.stats()["flushed"] == 0
+    assert list(journal.glob("pending-*.jsonl"))
+
+    factory = _session_factory(tmp_path)
+    restarted = ResultWriter(factory, batch_size=8, flush_interval_ms=0, journal_dir=journal)
+    restarted.start()
+    try:
+        assert restarted.stats()["replayed"] == 3
+        assert restarted.flush()
+    finally:
+        restarted.close()
+    assert [path.name for path in journal.glob("pending-*.jsonl")] == [f"pending-{restarted._segment}.jsonl"]
+
+    session = factory()
+    try:
+        assert session.query(AnalysisResultRecord).count() == 3
+    finally:
+        session.close()
+
+
+def test_analyze_does_not_wait_for_the_database() -> None:
+    paper = b"""Write-behind probe paper.\n\nWe measure persistence latency. p = 0.04"""
+    response = client.post("/api/analyze", files={"file": ("behind.txt", paper, "text/plain")})
+    assert response.status_code == 200
+
+    queue = client.get("/api/persistence/queue").json()
+    assert queue["submitted"] >= 1
+    assert {"queue_depth", "in_flight", "batches", "failures", "dropped"} <= queue.keys()
+
+    from backend.app.services.persistence import get_result_writer
+
+    assert get_result_writer().flush()
+    from backend.app.core.database import get_session_factory
+
+    session = get_session_factory()()
+    try:
+        record = (
+            session.query(AnalysisResultRecord)
+            .filter(AnalysisResultRecord.file_hash == hashlib.sha256(paper).hexdigest())
+            .one()
+        )
+        assert session.query(AnalysisHistory).filter(AnalysisHistory.result_id == record.id).count() >= 1
+    finally:
+        session.close()
@@ -0,0 +1,46 @@
+import pytest
+
+from backend.app.services.phrase_lexicon import PhraseMatcher, get_phrase_matcher, load_lexicon
+from backend.app.services.text_profile import TextProfile
+
+
+def test_matcher_reports_overlapping_hits_with_token_positions() -> None:
+    matcher = PhraseMatcher([("in this paper", 2.0), ("this paper", 1.0), ("paper we propose", 0.5)])
+    words = TextProfile.build("In this paper we propose; this paper.").words
+
+    hits = [(hit.phrase, hit.start, hit.end) for hit in matcher.find_all(words)]
+
+    assert hits == [
+        ("in this paper", 0, 3),
+        ("this paper", 1, 3),
+        ("paper we propose", 2, 5),
+        ("this paper", 5, 7),
+    ]
+    assert matcher.score(words) == 2.0 + 1.0 + 0.5 + 1.0
+
+
+def test_hyphenated_phrases_match_on_words() -> None:
+    matcher = PhraseMatcher([("state-of-the-art", 1.0)])
+    words = TextProfile.build("A state-of-the-art model, truly state of the art.").words
+    assert len(matcher.find_all(words)) == 2
+
+
+def test_load_lexicon_parses_weights_and_comments(tmp_path) -> None:
+    path = tmp_path / "lexicon.tsv"
+    path.write_text("# header\nwe propose\t1.5\n\nnovel framework  # default weight\n", encoding="utf-8")
+    assert load_lexicon(path) == [("we propose", 1.5), ("novel framework", 1.0)]
+
+    path.write_text("we propose\tmany\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="invalid weight"):
+        load_lexicon(path)
+
+
+def test_duplicate_phrases_are_rejected() -> None:
+    with pytest.raises(ValueError, match="duplicates"):
+        PhraseMatcher([("We propose", 1.0), ("we  propose", 2.0)])
+
+
+def test_default_lexicon_loads() -> None:
+    matcher = get_phrase_matcher()
+    assert "we propose" in matcher.phrases
+    assert len(matcher.digest) == 64
@@ -0,0 +1,102 @@
+import zlib
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services import plagiarism_index
+from backend.app.services.embeddings import configure_encoder
+from backend.app.services.plagiarism_index import (
+    PlagiarismIndex,
+    build_index,
+    configure_plagiarism_index,
+    iter_corpus,
+    load_plagiarism_index,
+    write_index,
+)
+from backend.app.services.text_profile import WORD_PATTERN
+
+
+client = TestClient(app)
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words stand-in for the SBERT model."""
+
+    model_name = settings.SBERT_MODEL
+    dimension = 256
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD_PATTERN.findall(text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def _corpus_index(tmp_path) -> PlagiarismIndex:
+    build_index(iter_corpus(settings.ARXIV_DATASET_PATH), HashingEncoder(), tmp_path / "index")
+    return PlagiarismIndex(tmp_path / "index")
+
+
+def test_index_returns_titles_and_urls_of_closest_abstracts(tmp_path) -> None:
+    index = _corpus_index(tmp_path)
+    query = HashingEncoder().encode(["We evaluate statistical anomalies in published research and propose detection metrics."])
+
+    hits = index.top_documents(query, k=2, min_similarity=0.5)
+
+    assert len(index) == 3 and index.kind == "flat"
+    assert [hit.title for hit in hits] == ["Detecting Statistical Anomalies in Research"]
+    assert hits[0].url == "https://arxiv.org/abs/0000.00003"
+    assert hits[0].similarity > 0.99
+    index.close()
+
+
+def test_blockwise_flat_search_matches_brute_force(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(plagiarism_index, "FLAT_BLOCK_ROWS", 7)
+    rng = np.random.default_rng(3)
+    vectors = rng.standard_normal((50, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    write_index(tmp_path / "index", [(vectors, [{"title": str(i)} for i in range(50)])], "test-model")
+    queries = vectors[[4, 17, 42]]
+
+    similarities, ids = PlagiarismIndex(tmp_path / "index").search(queries, k=5)
+
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+    assert ids.tolist() == expected.tolist()
+    assert ids[:, 0].tolist() == [4, 17, 42]
+    assert np.allclose(similarities[:, 0], 1.0, atol=1e-5)
+
+
+def test_loader_skips_missing_or_mismatched_index(tmp_path) -> None:
+    try:
+        assert load_plagiarism_index(tmp_path / "missing") is None
+        write_index(tmp_path / "other", [(np.eye(2, dtype=np.float32), [{}, {}])], "some-other-model")
+        assert load_plagiarism_index(tmp_path / "other") is None
+    finally:
+        configure_plagiarism_index(None)
+
+
+def test_analysis_reports_semantic_matches_from_the_index(tmp_path) -> None:
+    _corpus_index(tmp_path)
+    load_plagiarism_index(tmp_path / "index")
+    configure_encoder(HashingEncoder())
+    try:
+        paper = (
+            "Semantic overlap paper.\n\n"
+            "This paper studies citation networks and knowledge graph embeddings in academia.\n\n"
+            "An unrelated closing paragraph about the weather in spring."
+        ).encode()
+        response = client.post("/api/analyze", files={"file": ("semantic.txt", paper, "text/plain")})
+    finally:
+        configure_plagiarism_index(None)
+        configure_encoder(None)
+
+    assert response.status_code == 200
+    payload = response.json()
+    top = payload["plagiarism_matches"][0]
+    assert top["title"] == "Citation Networks and Knowledge Graph Embeddings"
+    assert top["source"] == "https://arxiv.org/abs/0000.00002"
+    assert payload["plagiarism_score"] >= 99
@@ -0,0 +1,90 @@
+import pstats
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services import profiling
+
+client = TestClient(app)
+
+TOKEN = "s3cret-admin-token"
+
+
+def _paper() -> bytes:
+    return f"We propose a method {uuid.uuid4().hex}.\n\nReference: DOI 10.1000/xyz123\np < 0.04".encode()
+
+
+def _analyze(headers: dict):
+    return client.post("/api/analyze", files={"file": ("profiled.txt", _paper(), "text/plain")}, headers=headers)
+
+
+def _stages(header: str) -> dict:
+    return {item.split(";dur=")[0]: float(item.split(";dur=")[1]) for item in header.split(", ")}
+
+
+def test_admin_token_is_ignored_unless_configured(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", "")
+    response = _analyze({"X-Admin-Token": TOKEN, "X-Profile": "cprofile"})
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers and "x-profile-url" not in response.headers
+    assert client.get("/api/profiles/20260101000000000000-0123456789ab.pstats").status_code == 404
+
+
+def test_server_timing_for_admins_only(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", TOKEN)
+    assert "server-timing" not in _analyze({}).headers
+    assert _analyze({"X-Admin-Token": "wrong"}).status_code == 403
+    assert _analyze({"X-Admin-Token": TOKEN, "X-Profile": "gprof"}).status_code == 400
+
+    response = _analyze({"X-Admin-Token": TOKEN})
+    assert response.status_code == 200
+    stages = _stages(response.headers["server-timing"])
+    for stage in ("upload_read", "cache_lookup", "extract_text", "ai_probability", "plagiarism_score", "total"):
+        assert stage in stages, stage
+    assert stages["total"] >= stages["ai_probability"]
+    assert "x-profile-url" not in response.headers
+
+    empty = client.post(
+        "/api/analyze", files={"file": ("empty.txt", b"", "text/plain")}, headers={"X-Admin-Token": TOKEN}
+    )
+    assert empty.status_code == 400 and "upload_read" in _stages(empty.headers["server-timing"])
+
+
+def test_cprofile_dump_of_one_request(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(settings, "PROFILING_ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILES_DIR", tmp_path)
+    response = _analyze({"X-Admin-Token": TOKEN, "X-Profile": "cprofile"})
+    assert response.status_code == 200
+    url = response.headers["x-profile-url"]
+
+    assert client.get(url).status_code == 403
+    assert client.get("/api/profiles/..%2F..%2Fetc%2Fpasswd", headers={"X-Admin-Token": TOKEN}).status_code == 404
+    dump = client.get(url, headers={"X-Admin-Token": TOKEN})
+    assert dump.status_code == 200
+    (tmp_path / "download.pstats").write_bytes(dump.content)
+    functions = {name for _, _, name in pstats.Stats(str(tmp_path / "download.pstats")).stats}
+    assert {"_ai_probability", "_plagiarism_score", "_citation_validity", "_statistical_risk"} <= functions
+
+
+def test_sampling_profile_and_retention(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(settings, "PROFILES_DIR", tmp_path)
+    monkeypatch.setattr(settings, "PROFILES_MAX_FILES", 2)
+
+    def busy_wait(seconds: float) -> str:
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            pass
+        return "done"
+
+    names = []
+    for _ in range(3):
+        result, name = profiling.run_profiled(profiling.SAMPLE, busy_wait, 0.05)
+        assert result == "done"
+        names.append(name)
+    folded = profiling.artifact_path(names[-1]).read_text()
+    assert "busy_wait (test_profiling.py" in folded
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in folded.splitlines()) > 5
+    assert profiling.artifact_path(names[0]) is None and profiling.artifact_path(names[1]) is not None
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import uuid
+
+from fastapi.testclient import TestClient
+
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services import prometheus
+
+client = TestClient(app)
+
+
+def _samples(text: str) -> dict:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line and not line.startswith("#")
+    }
+
+
+def _record(directory: str, observations: int, hold: bool) -> None:
+    settings.METRICS_MULTIPROC_DIR = directory
+    for i in range(observations):
+        prometheus.STAGE_DURATION.observe(0.003 if i % 2 else 0.2, stage="ai_probability")
+        prometheus.HTTP_REQUESTS.inc(method="POST", route="/api/analyze", status="200")
+    prometheus.ANALYSES_IN_PROGRESS.inc(source="api")
+    if not hold:
+        prometheus.mark_process_dead()
+
+
+def test_values_are_summed_across_processes_and_gauges_only_over_live_ones(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", tmp_path)
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_record, args=(str(tmp_path), 1000, hold)) for hold in (False, False, True)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+
+    samples = _samples(prometheus.render(tmp_path))
+    assert samples['veripaper_http_requests_total{method="POST",route="/api/analyze",status="200"}'] == 3000
+    assert samples['veripaper_stage_duration_seconds_bucket{stage="ai_probability",le="0.005"}'] == 1500
+    assert samples['veripaper_stage_duration_seconds_bucket{stage="ai_probability",le="+Inf"}'] == 3000
+    assert samples['veripaper_stage_duration_seconds_count{stage="ai_probability"}'] == 3000
+    assert abs(samples['veripaper_stage_duration_seconds_sum{stage="ai_probability"}'] - 1500 * 0.203) < 1e-6
+    # The one process that kept its gauge file has exited too.
+    assert not any(name.startswith("veripaper_analyses_in_progress") for name in samples)
+
+
+def test_value_files_grow_and_reopen(tmp_path) -> None:
+    values = prometheus.ValueFile(tmp_path / "values_1.db")
+    keys = [f'["series_{i}_{"x" * 40}",[]]' for i in range(2000)]  # past the initial 64 KiB
+    for key in keys:
+        values.add(key, 1.5)
+    values.add(keys[0], 1.0)
+    values.close()
+
+    reopened = prometheus.ValueFile(tmp_path / "values_1.db")
+    reopened.add(keys[-1], 1.0)
+    reopened.close()
+    read = prometheus.read_values(tmp_path / "values_1.db")
+    assert len(read) == 2000
+    assert read[keys[0]] == 2.5 and read[keys[-1]] == 2.5 and read[keys[1]] == 1.5
+
+
+def test_metrics_endpoint_reports_analysis_stages_and_sizes() -> None:
+    before = _samples(client.get("/metrics").text)
+    paper = f"We propose a method {uuid.uuid4().hex}.\n\nReference: DOI 10.1000/xyz123\np < 0.04".encode()
+    assert client.post("/api/analyze", files={"file": ("metrics.txt", paper, "text/plain")}).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = _samples(response.text)
+
+    def delta(name: str) -> float:
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    for stage in ("upload_read", "extract_text", "ai_probability", "plagiarism_score", "citation_validity", "statistical_risk"):
+        assert delta(f'veripaper_stage_duration_seconds_count{{stage="{stage}"}}') == 1, stage
+    assert delta('veripaper_http_requests_total{method="POST",route="/api/analyze",status="200"}') == 1
+    assert delta("veripaper_upload_size_bytes_sum") == len(paper)
+    assert delta("veripaper_extracted_text_chars_count") == 1
+    assert after[f'process_resident_memory_bytes{{pid="{os.getpid()}"}}'] > 0
@@ -0,0 +1,74 @@
+from backend.app.api import routes
+from backend.app.services.references import Reference, parse_references
+from backend.app.services.text_profile import TextProfile
+
+
+def test_numbered_entries_fold_wrapped_lines() -> None:
+    entries = parse_references(
+        '\n[1] A. Vaswani, N. Shazeer, and N. Parmar, "Attention is all you need," in Proc. NeurIPS, 2017,\n'
+        "pp. 5998-6008. doi: 10.5555/3295222.3295349\n"
+        "12\n"
+        '[2] J. Devlin and K. Toutanova, "BERT: Pre-training of deep bidirectional\n'
+        'transformers," in Proc. NAACL, 2019. https://arxiv.org/abs/1810.04805\n'
+    )
+
+    assert entries[0] == Reference(
+        raw=entries[0].raw,
+        authors="A. Vaswani, N. Shazeer, and N. Parmar",
+        year=2017,
+        title="Attention is all you need",
+        doi="10.5555/3295222.3295349",
+    )
+    assert len(entries) == 2 and "12" not in entries[0].raw
+    assert entries[1].title == "BERT: Pre-training of deep bidirectional transformers"
+    assert entries[1].url == "https://arxiv.org/abs/1810.04805" and entries[1].doi is None
+
+
+def test_author_year_and_vancouver_entries() -> None:
+    author_year = parse_references(
+        "Smith, J., & Doe, A. (2019). A study of things in\n"
+        "the wild. Journal of Stuff, 12(3), 1-10. https://doi.org/10.1000/abc.2019.1\n"
+        "Jones (2012). Another result. Nature, 5, 3-4.\n"
+    )
+    assert [(e.authors, e.year, e.title, e.doi) for e in author_year] == [
+        ("Smith, J., & Doe, A", 2019, "A study of things in the wild", "10.1000/abc.2019.1"),
+        ("Jones", 2012, "Another result", None),
+    ]
+
+    vancouver = parse_references(
+        "Smith J, Doe A. Vancouver style title. Lancet. 2019;12:1-10.\ndoi:10.1016/x.2019.01\n\n"
+        "Brown K. Second paper. BMJ. 2020;1:2.\n"
+    )
+    assert [(e.authors, e.year, e.title) for e in vancouver] == [
+        ("Smith J, Doe A", 2019, "Vancouver style title"),
+        ("Brown K", 2020, "Second paper"),
+    ]
+
+
+PAPER = (
+    "Introduction\nWe cite nothing from 1850 or 2098 here, but see http://example.org/notes.\n\n"
+    "References\n"
+    "[1] A. Smith, \"First,\" J. Stud., 2019. doi: 10.1000/first.1\n"
+    "[2] B. Jones, \"Second,\" J. Stud., 2099. doi: 10.1000/second.2\n"
+    "\nAppendix A: Proofs\nThe proof cites doi: 10.1000/appendix.3 from 2018.\n"
+)
+
+
+def test_citation_checks_only_read_the_bibliography() -> None:
+    profile = TextProfile.build(PAPER)
+
+    assert [entry.doi for entry in profile.references] == ["10.1000/first.1", "10.1000/second.2"]
+    validity, invalid, missing, mismatches = routes._citation_validity(profile)
+    assert (validity, invalid, missing, mismatches) == (100, [], [], ["2099"])
+
+    pages = PAPER.split("\n\n")
+    assert TextProfile.from_pages(pages, chunk_chars=1) == TextProfile.build("\n\n".join(pages))
+    assert TextProfile.from_pages(pages, chunk_chars=1).references == profile.references
+
+
+def test_documents_without_a_reference_heading_fall_back_to_doi_lines() -> None:
+    profile = TextProfile.build("Body text.\nSee doi: 10.1000/only.1 (2015).\nMore body from 1850.\n")
+
+    assert profile.bibliography_open is None
+    assert [(entry.doi, entry.year) for entry in profile.references] == [("10.1000/only.1", 2015)]
+    assert routes._citation_validity(profile)[3] == []
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+from anyio.from_thread import start_blocking_portal
+from fastapi.testclient import TestClient
+
+from backend.app.api import routes
+from backend.app.core.config import settings
+from backend.app.main import app
+from backend.app.services.executor import TextRef, configure_executor, shutdown_executor
+from backend.app.services.reports import ReportSweeper, clear_pending, mark_pending
+
+client = TestClient(app)
+
+
+def test_pending_reports_answer_202_until_the_marker_goes_stale() -> None:
+    name = f"pending_probe_{time.time_ns()}.pdf"
+    mark_pending(name)
+    try:
+        response = client.get(f"/files/{name}")
+        assert response.status_code == 202
+        assert response.headers["Retry-After"] == str(settings.REPORT_RETRY_AFTER_SECONDS)
+
+        stale = time.time() - settings.REPORT_RENDER_TIMEOUT_SECONDS - 1
+        os.utime(settings.REPORTS_DIR / ".pending" / name, (stale, stale))
+        assert client.get(f"/files/{name}").status_code == 404
+        assert client.get(f"/files/.pending/{name}").status_code == 404
+    finally:
+        clear_pending(name)
+    assert client.get(f"/files/{name}").status_code == 404
+
+
+def test_analyze_answers_before_the_report_is_rendered(monkeypatch) -> None:
+    release = threading.Event()
+    render = routes._render_report
+
+    def slow_render(*args):
+        assert release.wait(10)
+        return render(*args)
+
+    monkeypatch.setattr(routes, "_render_report", slow_render)
+    monkeypatch.setattr(settings, "RESULT_CACHE_PERSISTENT", False)
+    configure_executor("thread", 1)
+    try:
+        paper = f"Lazy report probe {time.time_ns()}.\n\nWe propose a method. Reference: DOI 10.1000/lazy1".encode()
+        # Reports are named by result content; a fresh filename keeps earlier runs' reports out of the way.
+        filename = f"lazy_{time.time_ns()}.txt"
+        # One event loop for all requests: a per-request loop would cancel the render before it starts.
+        live = TestClient(app)
+        with start_blocking_portal() as live.portal:
+            response = live.post("/api/analyze", files={"file": (filename, paper, "text/plain")})
+            assert response.status_code == 200
+            report_path = response.json()["report_path"]
+            assert live.get(report_path).status_code == 202
+
+            release.set()
+            for _ in range(100):
+                download = live.get(report_path)
+                if download.status_code == 200:
+                    break
+                time.sleep(0.05)
+            assert download.status_code == 200 and download.content.startswith(b"%PDF")
+    finally:
+        release.set()
+        shutdown_executor()
+
+
+def test_identical_results_share_one_stored_report(monkeypatch) -> None:
+    renders = []
+    render = routes._render_report
+
+    def counting_render(*args):
+        renders.append(args[0])
+        return render(*args)
+
+    monkeypatch.setattr(routes, "_render_report", counting_render)
+    text = "Dedup probe.\n\nWe propose a method. Reference: DOI 10.1000/dedup1"
+    filename = f"dedup_{time.time_ns()}.txt"
+    first = routes._run_pipeline(filename, TextRef(text=text)).result
+    second = routes._run_pipeline(filename, TextRef(text=text)).result
+
+    assert first.report_path == second.report_path and len(renders) == 1
+    assert (settings.REPORTS_DIR / renders[0]).is_file()
+    assert routes._run_pipeline("renamed.txt", TextRef(text=text)).result.report_path != first.report_path
+
+
+def _stored(directory, name: str, size: int, age: float) -> None:
+    path = directory / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (time.time() - age, time.time() - age))
+
+
+def test_sweeper_expires_unused_reports_then_evicts_least_recently_used(tmp_path) -> None:
+    _stored(tmp_path, "expired.pdf", 100, age=3600)
+    _stored(tmp_path, "old.pdf", 100, age=300)
+    _stored(tmp_path, "recent.pdf", 100, age=200)
+    _stored(tmp_path, "newest.pdf", 100, age=100)
+    _stored(tmp_path, "notes.txt", 1000, age=3600)
+    (tmp_path / ".pending").mkdir()
+    _stored(tmp_path / ".pending", "lost.pdf", 0, age=settings.REPORT_RENDER_TIMEOUT_SECONDS + 1)
+    _stored(tmp_path / ".pending", "rendering.pdf", 0, age=1)
+
+    sweeper = ReportSweeper(directory=tmp_path, max_bytes=250, max_age_seconds=1800, interval=0)
+    assert sweeper.sweep() == 2
+
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["newest.pdf", "notes.txt", "recent.pdf"]
+    assert [p.name for p in (tmp_path / ".pending").iterdir()] == ["rendering.pdf"]
+    stats = sweeper.stats()
+    assert (stats["reports"], stats["disk_bytes"]) == (2, 200)
+    assert (stats["evicted_for_age"], stats["evicted_for_size"], stats["evicted_bytes"]) == (1, 1, 200)
+
+
+def test_repeat_upload_under_another_name_gets_its_own_report(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "RESULT_CACHE_PERSISTENT", False)
+    paper = f"Shared bytes probe {time.time_ns()}.\n\nWe propose a method. Reference: DOI 10.1000/shared1".encode()
+    first = client.post("/api/analyze", files={"file": ("alice_secret_draft.txt", paper, "text/plain")}).json()
+    second = client.post("/api/analyze", files={"file": ("bob.txt", paper, "text/plain")}).json()
+
+    assert first["report_path"].startswith("/files/alice_secret_draft_")
+    assert second["filename"] == "bob.txt" and second["report_path"].startswith("/files/bob_")
@@ -0,0 +1,53 @@
+import hashlib
+
+from fastapi.testclient import TestClient
+
+from backend.app.core.cache import LRUCache
+from backend.app.api.routes import ANALYSIS_VERSION
+from backend.app.main import app
+from backend.app.services.result_cache import AnalysisResultCache
+
+
+client = TestClient(app)
+
+
+def test_lru_cache_evicts_least_recently_used_and_expired() -> None:
+    now = [0.0]
+    cache = LRUCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 11.0
+    assert cache.get("c") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_repeat_upload_reuses_cached_result() -> None:
+    paper = b"""Cache probe paper.\n\nWe propose a method. Reference: DOI 10.1000/cache42\np = 0.03"""
+    first = client.post("/api/analyze", files={"file": ("first.txt", paper, "text/plain")})
+    second = client.post("/api/analyze", files={"file": ("second.txt", paper, "text/plain")})
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert second.json()["analyzed_at"] == first.json()["analyzed_at"]
+    # The scores are reused; the report is this upload's own.
+    assert second.json()["report_path"].startswith("/files/second_")
+    assert second.json()["filename"] == "second.txt"
+
+
+def test_persistent_tier_is_versioned() -> None:
+    paper = b"""Version probe paper.\n\nIn this paper we study caching."""
+    response = client.post("/api/analyze", files={"file": ("version.txt", paper, "text/plain")})
+    assert response.status_code == 200
+
+    file_hash = hashlib.sha256(paper).hexdigest()
+    stale = AnalysisResultCache(version="detector-0.0/threshold-0.5", max_entries=4, ttl_seconds=0)
+    assert stale.get_persistent(file_hash) is None
+
+    current = AnalysisResultCache(version=ANALYSIS_VERSION, max_entries=4, ttl_seconds=0)
+    restored = current.get_persistent(file_hash)
+    assert restored is not None
+    assert restored.report_path == response.json()["report_path"]
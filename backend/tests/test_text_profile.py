@@ -0,0 +1,34 @@
+import re
+from pathlib import Path
+
+from backend.app.services.text_profile import TextProfile, normalize_paragraph
+
+
+SAMPLE = (Path(__file__).resolve().parents[1] / "data" / "sample_paper.txt").read_text(encoding="utf-8")
+
+
+def test_profile_matches_per_analyzer_scans_on_sample_paper() -> None:
+    text = SAMPLE + '\n\nAs noted, "this quoted passage is certainly longer than forty characters" (p = 0.049).\n'
+    profile = TextProfile.build(text)
+    lowered = text.lower()
+
+    assert profile.words == re.findall(r"\b[a-zA-Z]{2,}\b", lowered)
+    assert profile.sentence_marks == len(re.findall(r"[.!?]", text))
+    assert profile.clause_marks == len(re.findall(r"[;:,]", text))
+    assert profile.paragraphs == [part.strip() for part in re.split(r"\n\s*\n", text) if part.strip()]
+    assert profile.normalized_paragraphs == [re.sub(r"\s+", " ", p.lower()) for p in profile.paragraphs]
+    assert [reference.doi for reference in profile.references] == re.findall(r"10\.\d{4,9}/[-._;()/:A-Za-z0-9]+", text)
+    assert profile.p_values == [float(v) for v in re.findall(r"p\s*[<=>]\s*(0?\.\d+)", lowered)]
+    assert profile.quote_blocks == len(re.findall(r'"[^"]{40,}"', text))
+    assert profile.reference_lines == [
+        line for line in text.splitlines() if "doi" in line.lower() or "http" in line.lower()
+    ]
+
+
+def test_quote_blocks_skip_short_quotes() -> None:
+    text = 'a "short" then "' + "x" * 45 + '" and "' + "y" * 10 + '"'
+    assert TextProfile.build(text).quote_blocks == len(re.findall(r'"[^"]{40,}"', text)) == 1
+
+
+def test_normalize_paragraph_collapses_whitespace() -> None:
+    assert normalize_paragraph("We  Propose\t\na  Method") == "we propose a method"